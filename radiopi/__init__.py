@@ -1,53 +1,163 @@
 from __future__ import annotations
 
-import logging
 from argparse import ArgumentParser
-from collections.abc import Generator
-from contextlib import contextmanager
+from collections.abc import Generator, Sequence
+from contextlib import ExitStack, closing, contextmanager, nullcontext
+from pathlib import Path
 from signal import pause
+from typing import Final
 
 from radiopi.buttons import create_buttons
-from radiopi.led_controller import LED_CONTROLLERS, LEDControllerName
-from radiopi.leds import create_leds, leds_watcher
-from radiopi.log import log_contextmanager
+from radiopi.compact import CompactingRunner
+from radiopi.compositor import create_compositor
+from radiopi.daemon import sharing_deadline
+from radiopi.led_controller import LED_CONTROLLERS, LEDControllerName, resolve_led_controller
+from radiopi.leds import LEDs, create_leds, leds_watcher
+from radiopi.log import dumping_log, log_contextmanager, logging_pipeline, naming_tuner
+from radiopi.persist import SAVE_DELAY, STATE_PATH, load_state, persist_daemon, restore_state
 from radiopi.pin_factory import PIN_FACTORIES, PinFactoryName, create_pin_factory
-from radiopi.radio import Radio, State, radio_watcher
-from radiopi.runner import RUNNERS, RunnerName, create_runner
-from radiopi.station import load_stations
+from radiopi.profiling import profiling_startup
+from radiopi.radio import Backoff, Radio, State, playing, radio_watcher
+from radiopi.runner import RUNNERS, Runner, RunnerName, create_runner
+from radiopi.station import STATION_ORDERS, StationCatalogue, StationOrderName, load_stations, order_stations
+from radiopi.stats import dumping_stats
+from radiopi.trace import tracing
+from radiopi.tuner import DeviceRunner, TunerConfig, check_stations, load_tuners, tuner_stations
+
+# Less than the systemd stop timeout, but more than the radio pause timeout.
+SHUTDOWN_TIMEOUT: Final = 20.0
 
 
-@log_contextmanager(name="Main")
 @contextmanager
-def running(
+def booting(
+    tuner: TunerConfig,
     *,
-    duration: float,
-    led_controller_name: LEDControllerName,
-    pin_factory_name: PinFactoryName,
+    catalogue: StationCatalogue,
     runner_name: RunnerName,
-) -> Generator[Radio, None, None]:
-    stations = load_stations()
+    standby_timeout: float | None,
+) -> Generator[tuple[Radio, Runner], None, None]:
     state = State(
         playing=False,
         station_index=0,
-        stations=stations,
+        stations=tuner_stations(catalogue, tuner.stations),
         stopping=False,
     )
-    led_controller_cls = LED_CONTROLLERS[led_controller_name]
+    # Restore the saved state before the first boot, so the radio only tunes once.
+    saved = load_state(tuner.state_path) if tuner.state_path is not None else None
+    if saved is not None:
+        state = restore_state(state, saved)
     radio = Radio(state)
-    runner = create_runner(runner_name)
-    # Start contexts.
     with (
-        create_pin_factory(pin_factory_name) as pin_factory,
-        create_buttons(pin_factory=pin_factory, radio=radio, runner=runner),
-        create_leds(led_controller_cls=led_controller_cls, pin_factory=pin_factory) as leds,
-        radio_watcher(radio, runner=runner),
-        leds_watcher(radio, led_controller_cls=led_controller_cls, leds=leds),
+        # Skip commands whose effect is already in place. Compact before selecting the device, so the commands match.
+        closing(CompactingRunner(DeviceRunner(create_runner(runner_name), tuner.device_args))) as runner,
+        radio_watcher(radio, runner=runner, backoff=Backoff(), standby_timeout=standby_timeout),
+        (
+            persist_daemon(radio, path=tuner.state_path, saved=saved, save_delay=SAVE_DELAY)
+            if tuner.state_path is not None
+            else nullcontext()
+        ),
+        # Play last, so the radio stops before its daemons exit.
+        playing(radio, play=saved is None or saved.playing),
     ):
-        radio.play()
+        yield radio, runner
+
+
+@log_contextmanager(name="Main")
+@contextmanager
+def running_tuners(
+    *,
+    tuners: Sequence[TunerConfig],
+    duration: float,
+    led_controller_name: LEDControllerName,
+    pin_factory_name: PinFactoryName,
+    runner_name: RunnerName,
+    station_order_name: StationOrderName,
+    prune_stations: bool,
+    standby_timeout: float | None,
+    stats_path: Path | None,
+) -> Generator[Sequence[Radio], None, None]:
+    # Load the stations once. Tuners select their stations from the shared catalogue.
+    catalogue = StationCatalogue(
+        order_stations(load_stations(), station_order_name=station_order_name, prune=prune_stations)
+    )
+    # Stations are only known once ordered and pruned, so check the tuner stations here, before booting any tuner.
+    check_stations(tuners, catalogue)
+    led_controller_cls = resolve_led_controller(led_controller_name)
+    # Start contexts. On exit, all daemons share one shutdown deadline.
+    with ExitStack() as stack:
+        booted: list[tuple[Radio, Runner]] = []
         try:
-            yield radio
+            stack.enter_context(sharing_deadline(SHUTDOWN_TIMEOUT))
+            if stats_path is not None:
+                stack.enter_context(dumping_stats(stats_path))
+            # Boot the radios first, since it's the slowest part of startup. Nothing else waits for them. Each tuner's
+            # contexts are started under its name, so their daemons log, record stats and trace under it too.
+            for tuner in tuners:
+                with naming_tuner(tuner.name):
+                    booted.append(
+                        stack.enter_context(
+                            booting(
+                                tuner, catalogue=catalogue, runner_name=runner_name, standby_timeout=standby_timeout
+                            )
+                        )
+                    )
+            pin_factory = stack.enter_context(create_pin_factory(pin_factory_name))
+            all_leds: list[LEDs] = []
+            for tuner in tuners:
+                with naming_tuner(tuner.name):
+                    all_leds.append(
+                        stack.enter_context(
+                            create_leds(led_controller_cls=led_controller_cls, pin_factory=pin_factory, pins=tuner.pins)
+                        )
+                    )
+            for tuner, (radio, runner) in zip(tuners, booted):
+                with naming_tuner(tuner.name):
+                    stack.enter_context(
+                        create_buttons(pin_factory=pin_factory, radio=radio, runner=runner, pins=tuner.pins)
+                    )
+            # All tuners share one compositor, so all LEDs animate on one frame clock.
+            compositor = stack.enter_context(create_compositor(led_controller_cls=led_controller_cls))
+            for tuner, (radio, _), leds in zip(tuners, booted, all_leds):
+                with naming_tuner(tuner.name):
+                    stack.enter_context(leds_watcher(radio, compositor=compositor, leds=leds))
+                    if tuner.control_address is not None:
+                        # Import lazily, since importing asyncio is slow.
+                        from radiopi.control import create_control_server
+
+                        stack.enter_context(create_control_server(radio, address=tuner.control_address))
+            yield tuple(radio for radio, _ in booted)
         finally:
-            radio.stop()
+            # Stop the radios before unwinding, so their daemons exit promptly, even if startup failed.
+            for radio, _ in booted:
+                radio.stop()
+
+
+@contextmanager
+def running(
+    *,
+    duration: float,
+    led_controller_name: LEDControllerName,
+    pin_factory_name: PinFactoryName,
+    runner_name: RunnerName,
+    station_order_name: StationOrderName,
+    prune_stations: bool,
+    standby_timeout: float | None,
+    stats_path: Path | None,
+    control_address: str | None,
+    state_path: Path | None,
+) -> Generator[Radio, None, None]:
+    with running_tuners(
+        tuners=(TunerConfig(control_address=control_address, state_path=state_path),),
+        duration=duration,
+        led_controller_name=led_controller_name,
+        pin_factory_name=pin_factory_name,
+        runner_name=runner_name,
+        station_order_name=station_order_name,
+        prune_stations=prune_stations,
+        standby_timeout=standby_timeout,
+        stats_path=stats_path,
+    ) as (radio,):
+        yield radio
 
 
 def main() -> None:  # pragma: no cover
@@ -56,15 +166,44 @@ def main() -> None:  # pragma: no cover
     parser.add_argument("--led-controller", choices=LED_CONTROLLERS, default="pwm")
     parser.add_argument("--pin-factory", choices=PIN_FACTORIES, default="rpigpio")
     parser.add_argument("--runner", choices=RUNNERS, default="subprocess")
+    parser.add_argument("--station-order", choices=STATION_ORDERS, default="file")
+    parser.add_argument("--prune-stations", action="store_true")
+    parser.add_argument("--standby-timeout", type=float, default=None)
+    parser.add_argument("--stats-path", type=Path, default=None)
+    parser.add_argument("--control-address", default=None)
+    parser.add_argument("--state-path", type=Path, default=STATE_PATH)
+    parser.add_argument("--profile-startup", action="store_true")
+    parser.add_argument("--log-dump-path", type=Path, default=None)
+    parser.add_argument("--trace-path", type=Path, default=None)
+    parser.add_argument("--tuners-path", type=Path, default=None)
     args = parser.parse_args()
     # Run radio.
-    logging.basicConfig(format="[%(levelname)s] %(message)s", level=logging.INFO)
-    with running(
-        duration=0.3,
-        led_controller_name=args.led_controller,
-        pin_factory_name=args.pin_factory,
-        runner_name=args.runner,
-    ):
+    with ExitStack() as stack:
+        ring_buffer = stack.enter_context(logging_pipeline())
+        if args.log_dump_path is not None:
+            stack.enter_context(dumping_log(ring_buffer, args.log_dump_path))
+        if args.trace_path is not None:
+            stack.enter_context(tracing(args.trace_path))
+        with profiling_startup() if args.profile_startup else nullcontext():
+            # Drive several tuners, if configured. Otherwise, drive one tuner with the default pins.
+            tuners = (
+                load_tuners(args.tuners_path)
+                if args.tuners_path is not None
+                else (TunerConfig(control_address=args.control_address, state_path=args.state_path),)
+            )
+            stack.enter_context(
+                running_tuners(
+                    tuners=tuners,
+                    duration=0.3,
+                    led_controller_name=args.led_controller,
+                    pin_factory_name=args.pin_factory,
+                    runner_name=args.runner,
+                    station_order_name=args.station_order,
+                    prune_stations=args.prune_stations,
+                    standby_timeout=args.standby_timeout,
+                    stats_path=args.stats_path,
+                )
+            )
         try:
             pause()
         except KeyboardInterrupt:
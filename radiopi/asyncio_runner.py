@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import asyncio
+from subprocess import CalledProcessError, TimeoutExpired
+from threading import Event, Thread
+from typing import ClassVar
+
+from radiopi.log import logger
+from radiopi.runner import Args, Preempted, Runner
+
+
+class AsyncioRunner(Runner):
+    poll_interval: ClassVar[float] = 0.01
+
+    def __init__(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._thread = Thread(name="Runner", daemon=True, target=self._loop.run_forever)
+        self._thread.start()
+
+    def _call(self, args: Args, *, preempt: Event | None, timeout: float | None) -> None:
+        # Preempt on the event loop, so the process is reaped before the call returns.
+        asyncio.run_coroutine_threadsafe(self._run(args, preempt=preempt, timeout=timeout), self._loop).result()
+
+    async def _run(self, args: Args, *, preempt: Event | None, timeout: float | None) -> None:
+        process = await asyncio.create_subprocess_exec(*args)
+        try:
+            returncode = await asyncio.wait_for(self._wait(process, args, preempt=preempt), timeout)
+        except asyncio.TimeoutError:
+            assert timeout is not None
+            logger.warning("Runner: Timed out: %s", " ".join(args))
+            raise TimeoutExpired(args, timeout) from None
+        finally:
+            # Kill the process if it timed out or was preempted.
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+        if returncode:
+            raise CalledProcessError(returncode, args)
+
+    async def _wait(self, process: asyncio.subprocess.Process, args: Args, *, preempt: Event | None) -> int:
+        if preempt is None:
+            return await process.wait()
+        wait = asyncio.ensure_future(process.wait())
+        # Cancel the command if a newer command supersedes it.
+        while not (await asyncio.wait((wait,), timeout=self.poll_interval))[0]:
+            if preempt.is_set():
+                logger.info("Runner: Preempted: %s", " ".join(args))
+                wait.cancel()
+                raise Preempted(args)
+        return wait.result()
+
+    def close(self) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import json
+import sys
+from argparse import ArgumentParser
+from collections.abc import Sequence
+from contextlib import AbstractContextManager, ExitStack, closing
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Event
+from time import perf_counter, thread_time
+from typing import ClassVar, Final
+
+from radiopi import running
+from radiopi.compositor import create_compositor
+from radiopi.curves import fade
+from radiopi.led_controller import MockLEDController
+from radiopi.pin_factory import PinFactory
+from radiopi.radio import Radio, State, watcher
+from radiopi.runner import ReplayRunner, RunnerName, create_runner
+from radiopi.scan import StationScan
+from radiopi.station import STATIONS_PATH, load_stations
+
+Results = dict[str, float]
+
+SPAWN_BALLAST: Final = 256 * 1024 * 1024
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[round(p * (len(ordered) - 1))]
+
+
+@watcher(name="Benchmark", policy="all", maxsize=100_000)
+def benchmark_watcher(prev_state: State, state: State, *, latencies: list[float], target: int, done: Event) -> None:
+    latencies.append(perf_counter() - state.changed_at)
+    if state.station_index == target:
+        done.set()
+
+
+def benchmark_transitions(*, transitions: int) -> Results:
+    latencies: list[float] = []
+    done = Event()
+    with running_mock() as radio, benchmark_watcher(radio, latencies=latencies, target=transitions, done=done):
+        started = perf_counter()
+        for _ in range(transitions):
+            radio.next_station()
+        done.wait()
+        elapsed = perf_counter() - started
+        radio.stop()
+    return {
+        "transitions_per_second": transitions / elapsed,
+        "handled": len(latencies),
+        "latency_p50": percentile(latencies, 0.5),
+        "latency_p99": percentile(latencies, 0.99),
+    }
+
+
+class TimingLEDController(MockLEDController):
+    transition_duration: ClassVar[float] = 0.3
+    frame_rate: ClassVar[float] = 100.0
+
+    def __init__(self) -> None:
+        super().__init__(0, name="Benchmark", pin_factory=PinFactory(None))
+        self.timestamps: list[float] = []
+
+    def _set_value(self, value: float) -> None:
+        self.timestamps.append(perf_counter())
+
+
+def benchmark_led_frames(*, led_controller_cls: type[TimingLEDController]) -> Results:
+    led = led_controller_cls()
+    with create_compositor(led_controller_cls=led_controller_cls) as compositor:
+        compositor.animate(fade(0.0, 1.0, steps=compositor.transition_steps), led)
+    intervals = [b - a for a, b in zip(led.timestamps, led.timestamps[1:])]
+    jitters = [abs(interval - compositor.frame_interval) for interval in intervals]
+    return {
+        "frames": len(led.timestamps),
+        "frame_interval": compositor.frame_interval,
+        "jitter_p50": percentile(jitters, 0.5),
+        "jitter_p99": percentile(jitters, 0.99),
+    }
+
+
+def benchmark_running(*, repeats: int) -> Results:
+    startups: list[float] = []
+    shutdowns: list[float] = []
+    for _ in range(repeats):
+        with ExitStack() as stack:
+            started = perf_counter()
+            stack.enter_context(running_mock())
+            startups.append(perf_counter() - started)
+            started = perf_counter()
+        shutdowns.append(perf_counter() - started)
+    return {
+        "startup_p50": percentile(startups, 0.5),
+        "startup_max": max(startups),
+        "shutdown_p50": percentile(shutdowns, 0.5),
+        "shutdown_max": max(shutdowns),
+    }
+
+
+def benchmark_stations(*, repeats: int) -> Results:
+    uncached: list[float] = []
+    cached: list[float] = []
+    with TemporaryDirectory() as tmp_dir:
+        cache_path = Path(tmp_dir) / "stations.cache"
+        load_stations(cache_path=cache_path)
+        for _ in range(repeats):
+            started = perf_counter()
+            load_stations(cache=False)
+            uncached.append(perf_counter() - started)
+            started = perf_counter()
+            load_stations(cache_path=cache_path)
+            cached.append(perf_counter() - started)
+    return {
+        "uncached_p50": percentile(uncached, 0.5),
+        "cached_p50": percentile(cached, 0.5),
+    }
+
+
+def benchmark_scan(*, repeats: int) -> Results:
+    output = STATIONS_PATH.read_text()
+    throughputs: list[float] = []
+    with TemporaryDirectory() as tmp_dir:
+        for _ in range(repeats):
+            scan = StationScan(ReplayRunner(output))
+            scan.run(Path(tmp_dir) / "stations.json")
+            throughputs.append(scan.ensembles_per_second)
+    return {
+        "ensembles_per_second_p50": percentile(throughputs, 0.5),
+    }
+
+
+def benchmark_spawn(*, runner_name: RunnerName, repeats: int, ballast: int = 0) -> Results:
+    # Hold resident memory, so spawns that copy the parent's page tables get slower.
+    ballast_data = b"\x01" * ballast
+    latencies: list[float] = []
+    cpu_times: list[float] = []
+    with closing(create_runner(runner_name)) as runner:
+        for _ in range(repeats):
+            started = perf_counter()
+            cpu_started = thread_time()
+            runner(("true",))
+            cpu_times.append(thread_time() - cpu_started)
+            latencies.append(perf_counter() - started)
+    # The parent's CPU time per spawn is the cost of spawning, excluding the time spent waiting for the child.
+    return {
+        "ballast": len(ballast_data),
+        "latency_p50": percentile(latencies, 0.5),
+        "latency_p99": percentile(latencies, 0.99),
+        "cpu_p50": percentile(cpu_times, 0.5),
+        "cpu_p99": percentile(cpu_times, 0.99),
+    }
+
+
+def running_mock() -> AbstractContextManager[Radio]:
+    return running(
+        duration=0.0,
+        led_controller_name="mock",
+        pin_factory_name="mock",
+        runner_name="mock",
+        station_order_name="file",
+        prune_stations=False,
+        standby_timeout=None,
+        stats_path=None,
+        control_address=None,
+        state_path=None,
+    )
+
+
+def run_benchmarks(*, transitions: int, repeats: int, ballast: int = SPAWN_BALLAST) -> dict[str, Results]:
+    return {
+        "transitions": benchmark_transitions(transitions=transitions),
+        "led_frames": benchmark_led_frames(led_controller_cls=TimingLEDController),
+        "running": benchmark_running(repeats=repeats),
+        "stations": benchmark_stations(repeats=repeats),
+        "scan": benchmark_scan(repeats=repeats),
+        "spawn_helper": benchmark_spawn(runner_name="spawn-helper", repeats=repeats),
+        "spawn": benchmark_spawn(runner_name="spawn", repeats=repeats),
+        "spawn_ballast": benchmark_spawn(runner_name="spawn", repeats=repeats, ballast=ballast),
+        "subprocess": benchmark_spawn(runner_name="subprocess", repeats=repeats),
+    }
+
+
+def main() -> None:  # pragma: no cover
+    # Parse args.
+    parser = ArgumentParser()
+    parser.add_argument("--transitions", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    # Run benchmarks.
+    results = run_benchmarks(transitions=args.transitions, repeats=args.repeats)
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write("\n")
@@ -1,32 +1,163 @@
 from __future__ import annotations
 
-from collections.abc import Generator
-from contextlib import contextmanager
+from collections.abc import Callable, Generator, Iterator
+from contextlib import contextmanager, nullcontext
 from functools import partial
+from threading import Event
+from typing import Any, Final
 
-from gpiozero import Button
-
+from radiopi.clock import REAL_CLOCK, Clock
+from radiopi.daemon import daemon
 from radiopi.log import log_contextmanager
 from radiopi.pin_factory import PinFactory
 from radiopi.radio import Radio
 from radiopi.runner import Runner
+from radiopi.tuner import DEFAULT_PIN_MAP, PinMap
+
+SCROLL_HOLD_TIME: Final = 0.5
+SCROLL_INTERVAL: Final = 0.5
+SCROLL_MIN_INTERVAL: Final = 0.05
+SCROLL_ACCELERATION: Final = 0.8
+SHUTDOWN_HOLD_TIME: Final = 1.0
+
+
+class Scroller:
+    def __init__(
+        self,
+        radio: Radio,
+        *,
+        interval: float = SCROLL_INTERVAL,
+        min_interval: float = SCROLL_MIN_INTERVAL,
+        acceleration: float = SCROLL_ACCELERATION,
+        clock: Clock = REAL_CLOCK,
+    ) -> None:
+        self._radio = radio
+        self.interval = interval
+        self.min_interval = min_interval
+        self.acceleration = acceleration
+        self._clock = clock
+        self._changed = Event()
+        self._held: set[int] = set()
+        self._step = 0
+        self._stopping = False
+
+    def hold(self, step: int) -> None:
+        self._held.add(step)
+        self._step = step
+        self._changed.set()
+
+    def release(self, step: int) -> None:
+        # A tap steps once on release, so holding to scroll never tunes to the next station first.
+        if step not in self._held:
+            if step > 0:
+                self._radio.next_station()
+            else:
+                self._radio.prev_station()
+            return
+        # Releasing a hold settles the scroll selection, unless another button took over scrolling.
+        self._held.discard(step)
+        if self._step == step:
+            self._step = 0
+            self._changed.set()
+
+    def stop(self) -> None:
+        self._stopping = True
+        self._changed.set()
+
+    def intervals(self) -> Iterator[float]:
+        interval = self.interval
+        while True:
+            yield interval
+            interval = max(self.min_interval, interval * self.acceleration)
+
+    def _wait_for(self, predicate: Callable[[], bool], timeout: float | None) -> bool:
+        # Wait on the clock, so the simulator can run the scroller in virtual time. Clearing the event before checking
+        # the predicate means a change can't be missed.
+        while True:
+            self._changed.clear()
+            if predicate():
+                return True
+            if not self._clock.wait(self._changed, timeout):
+                return False
+
+    def run(self) -> None:
+        while True:
+            # Wait for a button to be held. Waiting forever only gives up if the clock has nothing left to run.
+            if not self._wait_for(lambda: bool(self._step) or self._stopping, None) or self._stopping:
+                return
+            step = self._step
+            # Scroll, speeding up the longer the button is held.
+            for interval in self.intervals():
+                self._radio.scroll(step)
+                if self._wait_for(lambda: self._step != step or self._stopping, interval):
+                    break
+            # Tune once the button is released. Stopping abandons the scroll selection, so shutdown never tunes.
+            if self._stopping:
+                return
+            self._radio.settle()
+
+
+@daemon(name="Scroller")
+def scroller_daemon(scroller: Scroller) -> None:
+    scroller.run()
+
+
+@contextmanager
+def create_scroller(radio: Radio) -> Generator[Scroller, None, None]:
+    scroller = Scroller(radio)
+    with scroller_daemon(scroller):
+        try:
+            yield scroller
+        finally:
+            scroller.stop()
 
 
 @log_contextmanager(name="Buttons")
 @contextmanager
-def create_buttons(*, pin_factory: PinFactory, radio: Radio, runner: Runner) -> Generator[None, None, None]:
+def create_buttons(
+    *, pin_factory: PinFactory, radio: Radio, runner: Runner, pins: PinMap = DEFAULT_PIN_MAP
+) -> Generator[None, None, None]:
+    # Import lazily, since importing gpiozero is slow.
+    from gpiozero import Button
+
     with (
-        Button(21, pin_factory=pin_factory) as toggle_play_button,
-        Button(16, pin_factory=pin_factory, hold_time=1, hold_repeat=True) as next_station_button,
-        Button(12, pin_factory=pin_factory, hold_time=1, hold_repeat=True) as prev_station_button,
-        Button(26, pin_factory=pin_factory, hold_time=1, hold_repeat=False) as shutdown_button,
+        create_scroller(radio) as scroller,
+        Button(pins.toggle_play_button, pin_factory=pin_factory) as toggle_play_button,
+        Button(pins.next_station_button, pin_factory=pin_factory, hold_time=SCROLL_HOLD_TIME) as next_station_button,
+        Button(pins.prev_station_button, pin_factory=pin_factory, hold_time=SCROLL_HOLD_TIME) as prev_station_button,
+        (
+            Button(pins.shutdown_button, pin_factory=pin_factory, hold_time=SHUTDOWN_HOLD_TIME, hold_repeat=False)
+            if pins.shutdown_button is not None
+            else nullcontext()
+        ) as shutdown_button,
     ):
-        # Set event handlers.
-        toggle_play_button.when_pressed = radio.toggle_play
-        next_station_button.when_pressed = radio.next_station
-        next_station_button.when_held = radio.next_station
-        prev_station_button.when_pressed = radio.prev_station
-        prev_station_button.when_held = radio.prev_station
-        shutdown_button.when_held = partial(runner.__call__, ("poweroff", "-h"))
+        set_button_handlers(
+            toggle_play_button=toggle_play_button,
+            next_station_button=next_station_button,
+            prev_station_button=prev_station_button,
+            shutdown_button=shutdown_button,
+            radio=radio,
+            runner=runner,
+            scroller=scroller,
+        )
         # All done!
         yield
+
+
+def set_button_handlers(
+    *,
+    toggle_play_button: Any,
+    next_station_button: Any,
+    prev_station_button: Any,
+    shutdown_button: Any,
+    radio: Radio,
+    runner: Runner,
+    scroller: Scroller,
+) -> None:
+    toggle_play_button.when_pressed = radio.toggle_play
+    next_station_button.when_held = partial(scroller.hold, 1)
+    next_station_button.when_released = partial(scroller.release, 1)
+    prev_station_button.when_held = partial(scroller.hold, -1)
+    prev_station_button.when_released = partial(scroller.release, -1)
+    if shutdown_button is not None:
+        shutdown_button.when_held = partial(runner.__call__, ("poweroff", "-h"))
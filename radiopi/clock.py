@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from threading import Event
+from typing import Final
+
+
+class Clock(ABC):
+    @abstractmethod
+    def wait(self, event: Event, timeout: float | None) -> bool:
+        raise NotImplementedError
+
+
+class RealClock(Clock):
+    def wait(self, event: Event, timeout: float | None) -> bool:
+        return event.wait(timeout)
+
+
+REAL_CLOCK: Final = RealClock()
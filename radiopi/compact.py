@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import dataclasses
+from collections.abc import Iterator
+from threading import Event, Lock, Timer
+from time import monotonic
+from typing import Final, Optional
+
+from radiopi.log import current_tuner, logger
+from radiopi.radio import radio_boot_args, radio_mute_args, radio_pause_args
+from radiopi.runner import Args, Preempted, Runner
+
+# Commands separated by less than this are reported as one burst.
+BURST_INTERVAL: Final = 1.0
+
+# Preemptible pauses and tunes are held this long before running, so one superseded straight away never runs. Tunes
+# are held for less, since the listener is waiting for them.
+PAUSE_HOLD: Final = 0.25
+TUNE_HOLD: Final = 0.1
+
+
+@dataclasses.dataclass(frozen=True)
+class TunerState:
+    # None means the tuner state is unknown, so no commands can be skipped.
+    booted: Optional[bool] = None
+    tuned: Optional[Args] = None
+    muted: Optional[bool] = None
+
+
+UNKNOWN: Final = TunerState()
+
+
+def is_tune_args(args: Args) -> bool:
+    return is_tuner_args(args) and "--play" in args
+
+
+def is_tuner_args(args: Args) -> bool:
+    return args[:1] == ("radio_cli",)
+
+
+def is_pause_args(args: Args) -> bool:
+    return tuple(args) in (radio_pause_args(), radio_mute_args())
+
+
+def is_redundant(tuner_state: TunerState, args: Args) -> bool:
+    if tuple(args) == radio_boot_args():
+        return tuner_state.booted is True
+    if tuple(args) == radio_pause_args():
+        return tuner_state.booted is False
+    if tuple(args) == radio_mute_args():
+        return tuner_state.booted is True and tuner_state.muted is True
+    if is_tune_args(args):
+        return tuner_state.booted is True and tuner_state.tuned == tuple(args)
+    return False
+
+
+def apply_command(tuner_state: TunerState, args: Args) -> TunerState:
+    if tuple(args) == radio_boot_args():
+        return TunerState(booted=True, tuned=None, muted=False)
+    if tuple(args) == radio_pause_args():
+        return TunerState(booted=False, tuned=None, muted=False)
+    if tuple(args) == radio_mute_args():
+        return dataclasses.replace(tuner_state, tuned=None, muted=True)
+    if is_tune_args(args):
+        return dataclasses.replace(tuner_state, tuned=tuple(args), muted=False)
+    # Other commands have an unknown effect on the tuner.
+    return UNKNOWN
+
+
+def fail_command(tuner_state: TunerState, args: Args) -> TunerState:
+    # A failed or interrupted tune leaves the tuner untuned. Anything else leaves it unknown.
+    if is_tune_args(args):
+        return dataclasses.replace(tuner_state, tuned=None)
+    return UNKNOWN
+
+
+class CompactingRunner(Runner):
+    def __init__(
+        self,
+        runner: Runner,
+        *,
+        burst_interval: float = BURST_INTERVAL,
+        pause_hold: float = PAUSE_HOLD,
+        tune_hold: float = TUNE_HOLD,
+    ) -> None:
+        self._runner = runner
+        self.burst_interval = burst_interval
+        self.pause_hold = pause_hold
+        self.tune_hold = tune_hold
+        self._lock = Lock()
+        self.tuner_state = UNKNOWN
+        self._burst_commands = 0
+        self._burst_skipped = 0
+        self._burst_at = 0.0
+        self._burst_timer: Timer | None = None
+        # Bursts are reported from the timer thread and on close, so remember the tuner this runner was created for.
+        self._tuner = current_tuner.get()
+
+    def _call(self, args: Args, *, preempt: Event | None, timeout: float | None) -> None:
+        with self._lock:
+            self._start_command()
+            # Skip commands whose effect is already in place. Other commands are outside the tuner model.
+            if is_tuner_args(args) and is_redundant(self.tuner_state, args):
+                self._burst_skipped += 1
+                logger.info("Runner: Skipped: %s", " ".join(args))
+                return
+        # Hold the command, dropping it if it's superseded. The tuner state is unchanged, so a pause followed by a play
+        # skips the boot and tune.
+        hold = self.pause_hold if is_pause_args(args) else self.tune_hold if is_tune_args(args) else 0.0
+        if preempt is not None and hold > 0.0 and preempt.wait(hold):
+            with self._lock:
+                self._burst_skipped += 1
+            logger.info("Runner: Dropped: %s", " ".join(args))
+            raise Preempted(args)
+        # Once started, a pause runs to completion, so a preempted pause is one that never ran.
+        if is_pause_args(args):
+            preempt = None
+        # Run the command without the lock, so a shutdown isn't queued behind a slow boot or tune.
+        try:
+            self._runner._call(args, preempt=preempt, timeout=timeout)
+        except BaseException:
+            with self._lock:
+                self.tuner_state = fail_command(self.tuner_state, args)
+            raise
+        with self._lock:
+            self.tuner_state = apply_command(self.tuner_state, args)
+
+    def _stream(self, args: Args, *, timeout: float | None) -> Iterator[str]:
+        with self._lock:
+            self._start_command()
+            self.tuner_state = UNKNOWN
+        return self._runner._stream(args, timeout=timeout)
+
+    def _start_command(self) -> None:
+        now = monotonic()
+        if now - self._burst_at > self.burst_interval:
+            self._report_burst()
+        self._burst_commands += 1
+        self._burst_at = now
+        # Report the burst once it ends, rather than when the next command arrives.
+        if self._burst_timer is not None:
+            self._burst_timer.cancel()
+        self._burst_timer = Timer(self.burst_interval, self._end_burst)
+        self._burst_timer.daemon = True
+        self._burst_timer.start()
+
+    def _end_burst(self) -> None:
+        with self._lock:
+            self._report_burst()
+
+    def _report_burst(self) -> None:
+        if self._burst_commands:
+            logger.info(
+                "Runner: Burst: Skipped %s of %s commands",
+                self._burst_skipped,
+                self._burst_commands,
+                extra={"tuner": self._tuner},
+            )
+        self._burst_commands = 0
+        self._burst_skipped = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._burst_timer is not None:
+                self._burst_timer.cancel()
+            self._report_burst()
+        self._runner.close()
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Generator, Sequence
+from contextlib import contextmanager
+from threading import Condition
+from time import monotonic, sleep
+
+from radiopi.curves import EasingName, fade, pulse
+from radiopi.daemon import daemon
+from radiopi.led_controller import LEDController
+
+
+class LEDCompositor:
+    def __init__(
+        self,
+        *,
+        frame_rate: float,
+        transition_duration: float,
+        easing_name: EasingName = "linear",
+        gamma: float = 1.0,
+    ) -> None:
+        self.frame_interval = 1.0 / frame_rate
+        self.transition_steps = max(1, round(transition_duration * frame_rate))
+        self.easing_name: EasingName = easing_name
+        self.gamma = gamma
+        self._condition = Condition()
+        self._timelines: dict[LEDController, deque[float]] = {}
+        self._values: dict[LEDController, float] = {}
+        self._stopping = False
+
+    def fade(self, from_value: float, to_value: float) -> Sequence[float]:
+        return fade(from_value, to_value, steps=self.transition_steps, easing_name=self.easing_name, gamma=self.gamma)
+
+    def pulse(self, from_value: float, to_value: float) -> Sequence[float]:
+        return pulse(from_value, to_value, steps=self.transition_steps, easing_name=self.easing_name, gamma=self.gamma)
+
+    def animate(self, values: Sequence[float], *leds: LEDController) -> None:
+        with self._condition:
+            # Replace any running animation, blending from the current value.
+            for led in leds:
+                self._timelines[led] = deque(blend(self._values.get(led), values))
+            self._condition.notify()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+
+    def _next_frame(self) -> dict[LEDController, float]:
+        # Take the next frame from each timeline. The caller must hold the condition.
+        frame = {led: timeline.popleft() for led, timeline in self._timelines.items()}
+        self._timelines = {led: timeline for led, timeline in self._timelines.items() if timeline}
+        self._values.update(frame)
+        return frame
+
+    def run(self) -> None:
+        next_frame_at = monotonic()
+        while True:
+            with self._condition:
+                # Wait for an animation, or stop once all animations are done.
+                while not self._timelines:
+                    if self._stopping:
+                        return
+                    self._condition.wait()
+                    next_frame_at = monotonic()
+                frame = self._next_frame()
+            # Render the frame in one batch.
+            LEDController.set_values(frame)
+            # Wait for the next frame on a fixed schedule, dropping frames if we fall behind.
+            next_frame_at += self.frame_interval
+            delay = next_frame_at - monotonic()
+            if delay > 0.0:
+                sleep(delay)
+            else:
+                next_frame_at = monotonic()
+
+
+def blend(from_value: float | None, values: Sequence[float]) -> Sequence[float]:
+    # Offset the start of the animation to the current value, fading the offset out by the end.
+    if from_value is None or len(values) < 2 or from_value == values[0]:
+        return values
+    offset = from_value - values[0]
+    last = len(values) - 1
+    return [value + offset * (last - n) / last for n, value in enumerate(values)]
+
+
+@daemon(name="LED compositor")
+def compositor_daemon(compositor: LEDCompositor) -> None:
+    compositor.run()
+
+
+@contextmanager
+def create_compositor(*, led_controller_cls: type[LEDController]) -> Generator[LEDCompositor, None, None]:
+    compositor = LEDCompositor(
+        frame_rate=led_controller_cls.frame_rate,
+        transition_duration=led_controller_cls.transition_duration,
+        easing_name=led_controller_cls.easing_name,
+        gamma=led_controller_cls.gamma,
+    )
+    with compositor_daemon(compositor):
+        try:
+            yield compositor
+        finally:
+            compositor.stop()
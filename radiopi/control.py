@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from collections.abc import Callable, Generator, Mapping
+from contextlib import closing, contextmanager
+from socket import AF_INET, AF_UNIX, SO_REUSEADDR, SOCK_STREAM, SOL_SOCKET, socket
+from stat import S_ISSOCK
+from typing import Any, Final
+
+from typing_extensions import TypeAlias
+
+from radiopi.daemon import daemon
+from radiopi.log import log_contextmanager, logger
+from radiopi.radio import Radio, Snapshot
+
+# Allow hundreds of clients to connect at once.
+LISTEN_BACKLOG: Final = 1024
+
+Command: TypeAlias = Callable[[Radio, Mapping[str, Any]], None]
+
+COMMANDS: Mapping[str, Command] = {
+    "play": lambda radio, data: radio.play(),
+    "pause": lambda radio, data: radio.pause(),
+    "next": lambda radio, data: radio.next_station(),
+    "prev": lambda radio, data: radio.prev_station(),
+    "retune": lambda radio, data: radio.retune(int(data["station_index"])),
+}
+
+
+class ControlClient:
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self.line = b""
+        self.changed = asyncio.Event()
+
+    def send(self, data: Mapping[str, Any]) -> None:
+        self.writer.write(json.dumps(data).encode() + b"\n")
+
+    async def stream(self) -> None:
+        while True:
+            await self.changed.wait()
+            self.changed.clear()
+            self.writer.write(self.line)
+            await self.writer.drain()
+
+
+class ControlServer:
+    def __init__(self, radio: Radio) -> None:
+        self._radio = radio
+        self._line = b""
+        self._subscribers: set[ControlClient] = set()
+
+    async def serve(self, sock: socket) -> None:
+        loop = asyncio.get_running_loop()
+        if sock.family == AF_UNIX:
+            server = await asyncio.start_unix_server(self._handle, sock=sock, backlog=LISTEN_BACKLOG)
+        else:
+            server = await asyncio.start_server(self._handle, sock=sock, backlog=LISTEN_BACKLOG)
+        async with server:
+            with self._radio.subscribe() as subscription:
+                # Broadcast state changes to all subscribers, until the radio stops.
+                while True:
+                    snapshot = await loop.run_in_executor(None, subscription.get)
+                    assert snapshot is not None
+                    self._broadcast(snapshot)
+                    if snapshot.state.stopping:
+                        break
+        # Flush the final state to all subscribers.
+        for client in self._subscribers:
+            if client.changed.is_set():
+                client.writer.write(client.line)
+            client.writer.close()
+
+    def _broadcast(self, snapshot: Snapshot) -> None:
+        # Slow subscribers only receive the latest state, so they never hold up the radio.
+        self._line = json.dumps(snapshot_to_json(snapshot)).encode() + b"\n"
+        for client in self._subscribers:
+            client.line = self._line
+            client.changed.set()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        client = ControlClient(writer)
+        stream: asyncio.Future[None] | None = None
+        try:
+            async for line in reader:
+                try:
+                    data = json.loads(line)
+                    command_name = data["command"]
+                    if command_name == "subscribe":
+                        if stream is None:
+                            self._subscribers.add(client)
+                            client.line = self._line
+                            client.changed.set()
+                            stream = asyncio.ensure_future(client.stream())
+                        continue
+                    COMMANDS[command_name](self._radio, data)
+                except (ValueError, TypeError, KeyError) as ex:
+                    logger.warning("Control: Invalid command: %r: %r", line, ex)
+                    client.send({"error": repr(ex)})
+                else:
+                    client.send({"ok": True})
+        except ValueError as ex:
+            # Raised for a line over the reader limit. The rest of the stream cannot be framed, so drop the client.
+            logger.warning("Control: Invalid line: %r", ex)
+            client.send({"error": repr(ex)})
+        except ConnectionError:  # pragma: no cover
+            pass
+        finally:
+            self._subscribers.discard(client)
+            if stream is not None:
+                stream.cancel()
+            writer.close()
+
+
+def snapshot_to_json(snapshot: Snapshot) -> dict[str, Any]:
+    state = snapshot.state
+    station = state.station
+    return {
+        "version": snapshot.version,
+        "playing": state.playing,
+        "station_index": state.station_index,
+        "scroll_index": state.scroll_index,
+        "stopping": state.stopping,
+        "station": {
+            "frequency_index": station.frequency_index,
+            "service_id": station.service_id,
+            "component_id": station.component_id,
+            "label": station.label,
+        },
+    }
+
+
+def bind_control_socket(address: str) -> socket:
+    # A numeric address is a localhost TCP port. Anything else is a Unix socket path.
+    if address.isdigit():
+        sock = socket(AF_INET, SOCK_STREAM)
+        sock.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
+        sock.bind(("127.0.0.1", int(address)))
+    else:
+        unlink_socket(address)
+        sock = socket(AF_UNIX, SOCK_STREAM)
+        sock.bind(address)
+    sock.listen(LISTEN_BACKLOG)
+    return sock
+
+
+def unlink_socket(address: str) -> None:
+    # Only remove a socket, so a mistyped address can't delete a real file.
+    try:
+        if S_ISSOCK(os.lstat(address).st_mode):
+            os.unlink(address)
+    except FileNotFoundError:
+        pass
+
+
+@daemon(name="Control server")
+def control_server_daemon(server: ControlServer, sock: socket) -> None:
+    asyncio.run(server.serve(sock))
+
+
+@log_contextmanager(name="Control")
+@contextmanager
+def create_control_server(radio: Radio, *, address: str) -> Generator[socket, None, None]:
+    # Bind before starting, so clients can connect as soon as the server has started.
+    with closing(bind_control_socket(address)) as sock, control_server_daemon(ControlServer(radio), sock):
+        try:
+            yield sock
+        finally:
+            if sock.family == AF_UNIX:
+                unlink_socket(address)
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping, Sequence
+from functools import lru_cache
+from math import cos, pi
+from typing import Literal
+
+from typing_extensions import TypeAlias
+
+EasingName = Literal["linear", "ease-in-out"]
+
+Easing: TypeAlias = Callable[[float], float]
+
+
+def linear(t: float) -> float:
+    return t
+
+
+def ease_in_out(t: float) -> float:
+    return (1.0 - cos(t * pi)) / 2.0
+
+
+EASINGS: Mapping[EasingName, Easing] = {
+    "linear": linear,
+    "ease-in-out": ease_in_out,
+}
+
+
+@lru_cache(maxsize=None)
+def easing_table(easing_name: EasingName, steps: int) -> Sequence[float]:
+    easing = EASINGS[easing_name]
+    return (*(easing(n / steps) for n in range(steps)), 1.0)
+
+
+@lru_cache(maxsize=None)
+def fade(
+    from_value: float,
+    to_value: float,
+    *,
+    steps: int,
+    easing_name: EasingName = "linear",
+    gamma: float = 1.0,
+) -> Sequence[float]:
+    # Interpolate in perceived brightness, then gamma-correct to output brightness.
+    return tuple((from_value + (to_value - from_value) * t) ** gamma for t in easing_table(easing_name, steps))
+
+
+@lru_cache(maxsize=None)
+def pulse(
+    from_value: float,
+    to_value: float,
+    *,
+    steps: int,
+    easing_name: EasingName = "linear",
+    gamma: float = 1.0,
+) -> Sequence[float]:
+    return (
+        *fade(from_value, to_value, steps=steps, easing_name=easing_name, gamma=gamma),
+        *fade(to_value, from_value, steps=steps, easing_name=easing_name, gamma=gamma),
+    )
@@ -2,18 +2,98 @@ from __future__ import annotations
 
 from collections.abc import Callable, Generator
 from contextlib import AbstractContextManager, contextmanager
-from functools import wraps
-from threading import Thread
+from contextvars import Context, ContextVar, copy_context
+from functools import partial, wraps
+from queue import SimpleQueue
+from threading import Event, Lock, Thread, current_thread
+from time import monotonic
+from typing import Final, NamedTuple, Optional
 
 from typing_extensions import ParamSpec, TypeAlias
 
-from radiopi.log import log_contextmanager
+from radiopi.log import log_contextmanager, logger
 
 P = ParamSpec("P")
 
 DaemonCallable: TypeAlias = Callable[P, None]
 DaemonContextManagerCallable: TypeAlias = Callable[P, AbstractContextManager[None]]
 
+DAEMON_TIMEOUT: Final = 15.0
+
+
+class Task(NamedTuple):
+    name: str
+    fn: Callable[[], None]
+    context: Context
+    done: Event
+
+
+class DaemonPool:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._idle: list[SimpleQueue[Task]] = []
+
+    def submit(self, name: str, fn: Callable[[], None]) -> Event:
+        # Run in a copy of the caller's context, so daemons inherit its tuner.
+        task = Task(name=name, fn=fn, context=copy_context(), done=Event())
+        # Reuse an idle worker, if possible.
+        with self._lock:
+            if self._idle:
+                self._idle.pop().put(task)
+                return task.done
+        # Start a new worker.
+        tasks: SimpleQueue[Task] = SimpleQueue()
+        tasks.put(task)
+        Thread(name=name, daemon=True, target=self._work, args=(tasks,)).start()
+        return task.done
+
+    def _work(self, tasks: SimpleQueue[Task]) -> None:
+        thread = current_thread()
+        while True:
+            task = tasks.get()
+            thread.name = task.name
+            try:
+                task.context.run(task.fn)
+            except Exception:
+                task.context.run(logger.exception, "%s: Failed", task.name)
+            # Return the worker to the pool before marking the task done, so it can be reused straight away.
+            thread.name = "Idle"
+            with self._lock:
+                self._idle.append(tasks)
+            task.done.set()
+
+
+pool: Final = DaemonPool()
+
+
+class Deadline:
+    def __init__(self, timeout: float) -> None:
+        self.timeout = timeout
+        self._expires_at: float | None = None
+
+    def start(self) -> None:
+        if self._expires_at is None:
+            self._expires_at = monotonic() + self.timeout
+
+    def remaining(self) -> float:
+        if self._expires_at is None:
+            return self.timeout
+        return max(0.0, self._expires_at - monotonic())
+
+
+shutdown_deadline: ContextVar[Optional[Deadline]] = ContextVar("shutdown_deadline", default=None)
+
+
+@contextmanager
+def sharing_deadline(timeout: float) -> Generator[Deadline, None, None]:
+    # All daemons stopped in this context share one deadline, which starts when the first daemon stops.
+    deadline = Deadline(timeout)
+    token = shutdown_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        shutdown_deadline.reset(token)
+
 
 def daemon(*, name: str) -> Callable[[DaemonCallable[P]], DaemonContextManagerCallable[P]]:
     def decorator(fn: DaemonCallable[P]) -> DaemonContextManagerCallable[P]:
@@ -21,13 +101,13 @@ def daemon(*, name: str) -> Callable[[DaemonCallable[P]], DaemonContextManagerCa
         @log_contextmanager(name=name)
         @contextmanager
         def daemon_wrapper(*args: P.args, **kwargs: P.kwargs) -> Generator[None, None, None]:
-            thread = Thread(name=name, daemon=True, target=fn, args=args, kwargs=kwargs)
-            thread.start()
+            done = pool.submit(name, partial(fn, *args, **kwargs))
             try:
                 yield
             finally:
-                thread.join(timeout=15.0)
-                if thread.is_alive():  # pragma: no cover
+                deadline = shutdown_deadline.get() or Deadline(DAEMON_TIMEOUT)
+                deadline.start()
+                if not done.wait(deadline.remaining()):
                     raise RuntimeError(f"{name}: Zombie")
 
         return daemon_wrapper
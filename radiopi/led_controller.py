@@ -1,12 +1,13 @@
 from __future__ import annotations
 
+import logging
 from abc import ABC, abstractmethod
 from collections.abc import Mapping
+from pkgutil import resolve_name
 from typing import ClassVar, Literal, final
 
-from gpiozero import PWMLED
-
-from radiopi.log import logger
+from radiopi.curves import EasingName
+from radiopi.log import current_tuner, logger
 from radiopi.pin_factory import PinFactory
 
 LEDControllerName = Literal["mock", "pwm"]
@@ -14,15 +15,28 @@ LEDControllerName = Literal["mock", "pwm"]
 
 class LEDController(ABC):
     transition_duration: ClassVar[float]
-    transition_steps: ClassVar[int]
+    frame_rate: ClassVar[float]
+    easing_name: ClassVar[EasingName]
+    gamma: ClassVar[float]
 
     def __init__(self, pin: int, *, name: str, pin_factory: PinFactory) -> None:
         self.name = name
+        # Tuners share a compositor, so remember the tuner this LED was created for.
+        self.tuner = current_tuner.get()
 
     @final
     def set_value(self, value: float) -> None:
-        logger.debug("LED: %s: Value: %s", self.name, value)
-        self._set_value(value)
+        LEDController.set_values({self: value})
+
+    @final
+    @staticmethod
+    def set_values(values: Mapping[LEDController, float]) -> None:
+        # Only log if enabled, and set values without per-LED call overhead.
+        if logger.isEnabledFor(logging.DEBUG):
+            for led, value in values.items():
+                logger.debug("LED: %s: Value: %s", led.name, value, extra={"tuner": led.tuner})
+        for led, value in values.items():
+            led._set_value(value)
 
     @abstractmethod
     def _set_value(self, value: float) -> None:
@@ -35,7 +49,9 @@ class LEDController(ABC):
 
 class MockLEDController(LEDController):
     transition_duration: ClassVar[float] = 0.0
-    transition_steps: ClassVar[int] = 1
+    frame_rate: ClassVar[float] = 1000.0
+    easing_name: ClassVar[EasingName] = "linear"
+    gamma: ClassVar[float] = 1.0
 
     def _set_value(self, value: float) -> None:
         pass
@@ -44,22 +60,13 @@ class MockLEDController(LEDController):
         pass
 
 
-class PWMLEDController(LEDController):  # pragma: no cover
-    transition_duration: ClassVar[float] = 0.3
-    transition_steps: ClassVar[int] = 100
-
-    def __init__(self, pin: int, *, name: str, pin_factory: PinFactory) -> None:
-        super().__init__(pin, name=name, pin_factory=pin_factory)
-        self.led = PWMLED(pin, pin_factory=pin_factory)
-
-    def _set_value(self, value: float) -> None:
-        self.led.value = value
-
-    def close(self) -> None:
-        self.led.close()
+LED_CONTROLLERS: Mapping[LEDControllerName, str] = {
+    "mock": "radiopi.led_controller:MockLEDController",
+    "pwm": "radiopi.pwm_led_controller:PWMLEDController",
+}
 
 
-LED_CONTROLLERS: Mapping[LEDControllerName, type[LEDController]] = {
-    "mock": MockLEDController,
-    "pwm": PWMLEDController,
-}
+def resolve_led_controller(led_controller_name: LEDControllerName) -> type[LEDController]:
+    led_controller_path = LED_CONTROLLERS[led_controller_name]
+    led_controller_cls: type[LEDController] = resolve_name(led_controller_path)
+    return led_controller_cls
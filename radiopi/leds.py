@@ -3,12 +3,13 @@ from __future__ import annotations
 import dataclasses
 from collections.abc import Generator, Sequence
 from contextlib import closing, contextmanager
-from time import sleep
 
+from radiopi.compositor import LEDCompositor
 from radiopi.led_controller import LEDController
 from radiopi.log import log_contextmanager
 from radiopi.pin_factory import PinFactory
 from radiopi.radio import State, watcher
+from radiopi.tuner import DEFAULT_PIN_MAP, PinMap
 
 
 @dataclasses.dataclass(frozen=True)
@@ -22,13 +23,19 @@ class LEDs:
         return (self.play_led, self.next_station_led, self.prev_station_led)
 
 
-@log_contextmanager(name="Buttons")
+@log_contextmanager(name="LED controllers")
 @contextmanager
-def create_leds(*, led_controller_cls: type[LEDController], pin_factory: PinFactory) -> Generator[LEDs, None, None]:
+def create_leds(
+    *, led_controller_cls: type[LEDController], pin_factory: PinFactory, pins: PinMap = DEFAULT_PIN_MAP
+) -> Generator[LEDs, None, None]:
     with (
-        closing(led_controller_cls(13, name="Play", pin_factory=pin_factory)) as play_led,
-        closing(led_controller_cls(6, name="Next station", pin_factory=pin_factory)) as next_station_led,
-        closing(led_controller_cls(5, name="Prev station", pin_factory=pin_factory)) as prev_station_led,
+        closing(led_controller_cls(pins.play_led, name="Play", pin_factory=pin_factory)) as play_led,
+        closing(
+            led_controller_cls(pins.next_station_led, name="Next station", pin_factory=pin_factory)
+        ) as next_station_led,
+        closing(
+            led_controller_cls(pins.prev_station_led, name="Prev station", pin_factory=pin_factory)
+        ) as prev_station_led,
     ):
         yield LEDs(
             play_led=play_led,
@@ -38,41 +45,27 @@ def create_leds(*, led_controller_cls: type[LEDController], pin_factory: PinFact
 
 
 @watcher(name="LEDs")
-def leds_watcher(prev_state: State, state: State, *, led_controller_cls: type[LEDController], leds: LEDs) -> None:
-    duration = led_controller_cls.transition_duration
-    steps = led_controller_cls.transition_steps
-    if state.playing:
+def leds_watcher(prev_state: State, state: State, *, compositor: LEDCompositor, leds: LEDs) -> None:
+    if state.scroll_index is not None:
+        # Show scroll progress through the stations on the play LED.
+        progress = (state.scroll_index % len(state.stations)) / max(1, len(state.stations) - 1)
+        compositor.animate(compositor.fade(progress, progress), leds.play_led)
+    elif state.playing:
         # Fade in the LEDs.
         if not prev_state.playing:
-            transition(fade(0.0, 1.0, steps=steps), *leds.all_leds, duration=duration)
+            compositor.animate(compositor.fade(0.0, 1.0), *leds.all_leds)
+        # Pulse the LEDs once scrolling settles.
+        elif prev_state.scroll_index is not None:
+            compositor.animate(compositor.pulse(1.0, 0.0), *leds.all_leds)
         # Pulse the play and next station buttons.
         elif prev_state.station_index == state.station_index - 1:
-            transition(pulse(1.0, 0.0, steps=steps), leds.play_led, leds.next_station_led, duration=duration)
+            compositor.animate(compositor.pulse(1.0, 0.0), leds.play_led, leds.next_station_led)
         # Pulse the play and prev station buttons.
         elif prev_state.station_index == state.station_index + 1:
-            transition(pulse(1.0, 0.0, steps=steps), leds.play_led, leds.prev_station_led, duration=duration)
+            compositor.animate(compositor.pulse(1.0, 0.0), leds.play_led, leds.prev_station_led)
         # Pulse the LEDs.
         elif prev_state.station != state.station:
-            transition(pulse(1.0, 0.0, steps=steps), *leds.all_leds, duration=duration)
+            compositor.animate(compositor.pulse(1.0, 0.0), *leds.all_leds)
     elif prev_state.playing:
         # Fade out the LEDs.
-        transition(fade(1.0, 0.0, steps=steps), *leds.all_leds, duration=duration)
-
-
-def transition(values: Sequence[float], *leds: LEDController, duration: float) -> None:
-    sleep_interval = duration / len(values)
-    for value in values:
-        for led in leds:
-            led.set_value(value)
-        sleep(sleep_interval)
-
-
-def fade(from_value: float, to_value: float, *, steps: int) -> Sequence[float]:
-    return [from_value + ((to_value - from_value) / steps) * n for n in range(steps)] + [to_value]
-
-
-def pulse(from_value: float, to_value: float, *, steps: int) -> Sequence[float]:
-    return [
-        *fade(from_value, to_value, steps=steps),
-        *fade(to_value, from_value, steps=steps),
-    ]
+        compositor.animate(compositor.fade(1.0, 0.0), *leds.all_leds)
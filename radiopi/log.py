@@ -1,33 +1,195 @@
 from __future__ import annotations
 
 import logging
+from collections import deque
 from collections.abc import Callable, Generator
 from contextlib import AbstractContextManager, contextmanager
-from functools import wraps
-from typing import TypeVar
+from contextvars import ContextVar
+from functools import partial, wraps
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from queue import SimpleQueue
+from signal import SIGUSR2, Signals, getsignal, signal
+from threading import Thread
+from time import monotonic, perf_counter
+from types import FrameType
+from typing import Final, TextIO, TypeVar
 
 from typing_extensions import ParamSpec, TypeAlias
 
+from radiopi.atomic import write_atomic
+
 P = ParamSpec("P")
 T = TypeVar("T")
 
 ContextManagerCallable: TypeAlias = Callable[P, AbstractContextManager[T]]
 
+LOG_FORMAT: Final = "[%(levelname)s] %(message)s"
+TUNER_LOG_FORMAT: Final = "[%(levelname)s] %(tuner)s: %(message)s"
+
+# Keep this many recent records in memory, to dump on demand.
+RING_BUFFER_SIZE: Final = 1000
+
+# Allow this many records with the same message per interval, so per-frame messages can't flood the log.
+RATE_LIMIT: Final = 20
+RATE_LIMIT_INTERVAL: Final = 1.0
+
 logger = logging.getLogger(__name__)
 
+# The name of the tuner being driven, so its log lines, stats and spans can be told apart from other tuners'.
+current_tuner: ContextVar[str] = ContextVar("current_tuner", default="")
+
+
+@contextmanager
+def naming_tuner(name: str) -> Generator[None, None, None]:
+    token = current_tuner.set(name)
+    try:
+        yield
+    finally:
+        current_tuner.reset(token)
+
 
 def log_contextmanager(*, name: str) -> Callable[[ContextManagerCallable[P, T]], ContextManagerCallable[P, T]]:
     def decorator(fn: ContextManagerCallable[P, T]) -> ContextManagerCallable[P, T]:
         @wraps(fn)
         @contextmanager
         def log_contextmanager_wrapper(*args: P.args, **kwargs: P.kwargs) -> Generator[T, None, None]:
-            logger.info("%s: Starting", name)
+            started = perf_counter()
+            # Contexts can be stopped outside the tuner they were started for, so keep its name.
+            extra = {"tuner": current_tuner.get()}
+            logger.info("%s: Starting", name, extra=extra)
             with fn(*args, **kwargs) as ctx:
-                logger.info("%s: Started", name)
+                logger.info("%s: Started in %.3fs", name, perf_counter() - started, extra=extra)
                 yield ctx
-                logger.info("%s: Stopping", name)
-            logger.info("%s: Stopped", name)
+                stopped = perf_counter()
+                logger.info("%s: Stopping", name, extra=extra)
+            logger.info("%s: Stopped in %.3fs", name, perf_counter() - stopped, extra=extra)
 
         return log_contextmanager_wrapper
 
     return decorator
+
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self, *, limit: int = RATE_LIMIT, interval: float = RATE_LIMIT_INTERVAL) -> None:
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self.suppressed = 0
+        self._windows: dict[tuple[str, object], tuple[float, int]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Count records with the same message in fixed windows, dropping any over the limit.
+        key = (record.name, record.msg)
+        now = monotonic()
+        window_started, count = self._windows.get(key, (now, 0))
+        if now - window_started >= self.interval:
+            window_started, count = now, 0
+        self._windows[key] = (window_started, count + 1)
+        if count < self.limit:
+            return True
+        self.suppressed += 1
+        return False
+
+
+class TunerFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Records are formatted on the listener thread, so tag them with the caller's tuner now, unless given as extra.
+        if not hasattr(record, "tuner"):
+            record.tuner = current_tuner.get()
+        return True
+
+
+class TunerFormatter(logging.Formatter):
+    def __init__(self) -> None:
+        super().__init__(LOG_FORMAT)
+        self._tuner_formatter = logging.Formatter(TUNER_LOG_FORMAT)
+
+    def format(self, record: logging.LogRecord) -> str:
+        # Only prefix records logged for a named tuner, so single-tuner logs are unchanged.
+        if getattr(record, "tuner", ""):
+            return self._tuner_formatter.format(record)
+        return super().format(record)
+
+
+class RingBufferHandler(logging.Handler):
+    def __init__(self, capacity: int = RING_BUFFER_SIZE) -> None:
+        super().__init__()
+        self.lines: deque[str] = deque(maxlen=capacity)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.lines.append(self.format(record))
+
+    def dump(self, path: Path) -> None:
+        with self.lock:  # type: ignore[union-attr]
+            data = "".join(f"{line}\n" for line in self.lines)
+        write_atomic(path, data.encode())
+        logger.info("Log: Dumped: %s", path)
+
+
+@contextmanager
+def logging_pipeline(
+    *,
+    level: int = logging.INFO,
+    stream: TextIO | None = None,
+    capacity: int = RING_BUFFER_SIZE,
+    rate_limit_filter: RateLimitFilter | None = None,
+) -> Generator[RingBufferHandler, None, None]:
+    # Log calls only queue records. A background thread writes them, so a slow journal never stalls the caller.
+    formatter = TunerFormatter()
+    stream_handler = logging.StreamHandler(stream)
+    stream_handler.setFormatter(formatter)
+    ring_buffer = RingBufferHandler(capacity)
+    ring_buffer.setFormatter(formatter)
+    queue: SimpleQueue[logging.LogRecord] = SimpleQueue()
+    queue_handler = QueueHandler(queue)
+    queue_handler.addFilter(TunerFilter())
+    queue_handler.addFilter(RateLimitFilter() if rate_limit_filter is None else rate_limit_filter)
+    listener = QueueListener(queue, stream_handler, ring_buffer)
+    root_logger = logging.getLogger()
+    prev_level = root_logger.level
+    root_logger.setLevel(level)
+    root_logger.addHandler(queue_handler)
+    listener.start()
+    try:
+        yield ring_buffer
+    finally:
+        root_logger.removeHandler(queue_handler)
+        root_logger.setLevel(prev_level)
+        # Write all queued records before returning.
+        listener.stop()
+
+
+@contextmanager
+def dumping_on_signal(dump: Callable[[], None], *, signum: Signals) -> Generator[None, None, None]:
+    # Signal handlers run on the main thread, which might hold a lock the dump needs. Only queue a request, since that
+    # is safe in a signal handler, and dump from a thread.
+    requests: SimpleQueue[bool] = SimpleQueue()
+
+    def handle_signal(signum: int, frame: FrameType | None) -> None:
+        requests.put(True)
+
+    def dump_requested() -> None:
+        while requests.get():
+            dump()
+
+    thread = Thread(name="Dump", daemon=True, target=dump_requested)
+    thread.start()
+    prev_handler = getsignal(signum)
+    signal(signum, handle_signal)
+    try:
+        yield
+    finally:
+        signal(signum, prev_handler)
+        requests.put(False)
+        thread.join()
+        dump()
+
+
+@log_contextmanager(name="Log")
+@contextmanager
+def dumping_log(
+    ring_buffer: RingBufferHandler, path: Path, *, signum: Signals = SIGUSR2
+) -> Generator[None, None, None]:
+    with dumping_on_signal(partial(ring_buffer.dump, path), signum=signum):
+        yield
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+from pathlib import Path
+from typing import Final, NamedTuple
+
+from radiopi.atomic import write_atomic
+from radiopi.daemon import daemon
+from radiopi.log import logger
+from radiopi.radio import TUNER_FIELDS, Radio, State
+from radiopi.station import STATIONS_PATH, StationKey, station_key
+
+STATE_PATH: Final = STATIONS_PATH.with_name(".state.json")
+
+# Wait for changes to settle before saving, so bursts of changes only write once.
+SAVE_DELAY: Final = 2.0
+
+
+class SavedState(NamedTuple):
+    playing: bool
+    station_key: StationKey
+
+
+def saved_state(state: State) -> SavedState:
+    return SavedState(playing=state.playing, station_key=station_key(state.station))
+
+
+def load_state(path: Path) -> SavedState | None:
+    try:
+        data = json.loads(path.read_bytes())
+        frequency_index, service_id, component_id = data["station_key"]
+        saved = SavedState(
+            playing=bool(data["playing"]),
+            station_key=(int(frequency_index), int(service_id), int(component_id)),
+        )
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, TypeError, KeyError) as ex:
+        logger.warning("Persist: Invalid state: %s: %r", path, ex)
+        return None
+    return saved
+
+
+def save_state(path: Path, saved: SavedState) -> None:
+    data = {"playing": saved.playing, "station_key": saved.station_key}
+    try:
+        write_atomic(path, json.dumps(data).encode())
+    except OSError as ex:
+        logger.warning("Persist: State not saved: %s: %s", path, ex)
+    else:
+        logger.info("Persist: Saved: %s", saved)
+
+
+def restore_state(state: State, saved: SavedState) -> State:
+    # Find the station by identity, so the saved state survives reordered stations.
+    try:
+        station_index = state.stations.index_by_key(saved.station_key)
+    except KeyError:
+        logger.warning("Persist: Station not found: %s", saved.station_key)
+        return state
+    logger.info("Persist: Restored: %s", saved)
+    return dataclasses.replace(state, station_index=station_index)
+
+
+@daemon(name="Persist")
+def persist_daemon(radio: Radio, *, path: Path, saved: SavedState | None, save_delay: float) -> None:
+    prev_saved = saved
+    state: State | None = None
+    with radio.subscribe(fields=TUNER_FIELDS) as subscription:
+        while True:
+            # Wait for changes to settle, so bursts of changes only save once.
+            pending = state is not None and saved_state(state) != prev_saved
+            snapshot = subscription.get(timeout=save_delay if pending else None)
+            if snapshot is not None and not snapshot.state.stopping:
+                state = snapshot.state
+                continue
+            # Save the state. The radio pauses on stop, so the state from before the stop is saved.
+            if pending:
+                assert state is not None
+                prev_saved = saved_state(state)
+                save_state(path, prev_saved)
+            # Possibly stop.
+            if snapshot is not None:
+                break
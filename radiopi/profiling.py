@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import re
+import sys
+from collections import defaultdict
+from collections.abc import Generator, Mapping, Sequence
+from contextlib import contextmanager
+from cProfile import Profile
+from subprocess import run
+from time import perf_counter
+from typing import Final
+
+from radiopi.log import logger
+
+# Lines of `python -X importtime` output: self time, cumulative time and module name.
+IMPORT_TIME_RE: Final = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|\s+(.+)$")
+
+
+@contextmanager
+def profiling_startup(*, limit: int = 20, package: str | None = "radiopi") -> Generator[None, None, None]:
+    started = perf_counter()
+    profiler = Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+    # Report the most expensive modules.
+    import_durations, run_durations = profile_modules(profiler)
+    logger.info("Profile: Startup in %.3fs", perf_counter() - started)
+    for module_name, duration in import_durations[:limit]:
+        logger.info("Profile: Import: %s: %.3fs", module_name, duration)
+    for module_name, duration in run_durations[:limit]:
+        logger.info("Profile: Run: %s: %.3fs", module_name, duration)
+    # The package was imported before profiling started, so time its import in a fresh interpreter.
+    if package is not None:
+        for module_name, duration in profile_imports(package)[:limit]:
+            logger.info("Profile: Import time: %s: %.3fs", module_name, duration)
+
+
+def profile_imports(module_name: str) -> Sequence[tuple[str, float]]:
+    result = run(
+        (sys.executable, "-X", "importtime", "-c", f"import {module_name}"), capture_output=True, text=True, check=True
+    )
+    import_durations: dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_RE.match(line)
+        if match is not None:
+            import_durations[match[3].strip()] = int(match[2]) / 1_000_000
+    return sort_durations(import_durations)
+
+
+def profile_modules(profiler: Profile) -> tuple[Sequence[tuple[str, float]], Sequence[tuple[str, float]]]:
+    module_names = {getattr(module, "__file__", None): name for name, module in sys.modules.items()}
+    import_durations: defaultdict[str, float] = defaultdict(float)
+    run_durations: defaultdict[str, float] = defaultdict(float)
+    for entry in profiler.getstats():
+        code = entry.code
+        if isinstance(code, str):
+            run_durations["<built-in>"] += entry.inlinetime
+            continue
+        module_name = module_names.get(code.co_filename, code.co_filename)
+        # Module code runs once on import, so its total time is the import time, including nested imports.
+        if code.co_name == "<module>":
+            import_durations[module_name] += entry.totaltime
+        else:
+            run_durations[module_name] += entry.inlinetime
+    return sort_durations(import_durations), sort_durations(run_durations)
+
+
+def sort_durations(durations: Mapping[str, float]) -> Sequence[tuple[str, float]]:
+    return sorted(durations.items(), key=lambda item: item[1], reverse=True)
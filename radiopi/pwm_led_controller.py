@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from typing import ClassVar
+
+from gpiozero import PWMLED
+
+from radiopi.curves import EasingName
+from radiopi.led_controller import LEDController
+from radiopi.pin_factory import PinFactory
+
+
+class PWMLEDController(LEDController):  # pragma: no cover
+    transition_duration: ClassVar[float] = 0.3
+    frame_rate: ClassVar[float] = 100.0
+    easing_name: ClassVar[EasingName] = "ease-in-out"
+    gamma: ClassVar[float] = 2.2
+
+    def __init__(self, pin: int, *, name: str, pin_factory: PinFactory) -> None:
+        super().__init__(pin, name=name, pin_factory=pin_factory)
+        self.led = PWMLED(pin, pin_factory=pin_factory)
+
+    def _set_value(self, value: float) -> None:
+        self.led.value = value
+
+    def close(self) -> None:
+        self.led.close()
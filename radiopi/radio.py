@@ -1,126 +1,396 @@
 from __future__ import annotations
 
 import dataclasses
-from collections.abc import Callable, Sequence
-from contextlib import AbstractContextManager
+from collections import deque
+from collections.abc import Callable, Collection, Generator
+from contextlib import AbstractContextManager, contextmanager
 from functools import wraps
-from threading import Condition
-from typing import Final
+from subprocess import TimeoutExpired
+from threading import Condition, Event, RLock
+from time import perf_counter
+from typing import Final, Literal, NamedTuple, Optional
 
 from typing_extensions import Concatenate, ParamSpec, TypeAlias
 
+from radiopi.clock import REAL_CLOCK, Clock
 from radiopi.daemon import daemon
-from radiopi.log import logger
-from radiopi.runner import Args, Runner
-from radiopi.station import Station
+from radiopi.log import current_tuner, logger, naming_tuner
+from radiopi.runner import Args, Preempted, Runner
+from radiopi.station import Station, StationCatalogue
+from radiopi.stats import stats
+from radiopi.trace import tracer
 
 P = ParamSpec("P")
 
+SubscriptionPolicyName = Literal["latest", "all", "first-last"]
+
 
 @dataclasses.dataclass(frozen=True)
 class State:
     playing: bool
     station_index: int
-    stations: Sequence[Station]
+    stations: StationCatalogue
     stopping: bool
+    scroll_index: int | None = None
+    # Set once the tuner state is superseded. Scroll states share the event of the state they scroll from.
+    superseded: Event = dataclasses.field(default_factory=Event, repr=False, compare=False)
+    changed_at: float = dataclasses.field(default_factory=perf_counter, init=False, repr=False, compare=False)
 
     @property
     def station(self) -> Station:
         return self.stations[self.station_index % len(self.stations)]
 
 
+STATE_FIELDS: Final = tuple(field.name for field in dataclasses.fields(State) if field.compare)
+
+# The fields that affect the tuner. Scrolling does not.
+TUNER_FIELDS: Final = ("playing", "station_index", "stations", "stopping")
+
+
+class Snapshot(NamedTuple):
+    version: int
+    state: State
+    trace_id: int = 0
+
+
+class Subscription:
+    def __init__(self, *, policy: SubscriptionPolicyName, fields: Collection[str] | None, maxsize: int) -> None:
+        self.policy: SubscriptionPolicyName = policy
+        self.fields = None if fields is None else frozenset(fields)
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._condition = Condition()
+        self._snapshots: deque[Snapshot] = deque()
+
+    def wants(self, changed_fields: Collection[str]) -> bool:
+        # Stopping is always delivered, so subscribers can exit.
+        return self.fields is None or "stopping" in changed_fields or not self.fields.isdisjoint(changed_fields)
+
+    def put(self, snapshot: Snapshot) -> None:
+        with self._condition:
+            snapshots = self._snapshots
+            # Coalesce undelivered snapshots.
+            if self.policy == "latest":
+                snapshots.clear()
+            elif self.policy == "first-last" and len(snapshots) >= 2:
+                snapshots.pop()
+            snapshots.append(snapshot)
+            # Drop the oldest snapshots if the subscriber falls too far behind.
+            while len(snapshots) > self.maxsize:
+                snapshots.popleft()
+                self.dropped += 1
+            self._condition.notify()
+
+    def get(self, *, timeout: float | None = None) -> Snapshot | None:
+        with self._condition:
+            if self._condition.wait_for(lambda: self._snapshots, timeout):
+                return self._snapshots.popleft()
+            return None
+
+
 class Radio:
     def __init__(self, state: State) -> None:
         self._init_state: Final = state
         self._state = state
-        self._condition = Condition()
+        self._version = 0
+        self._trace_id = 0
+        # State changes come from button and control threads, so remember the tuner this radio was created for.
+        self._tuner = current_tuner.get()
+        self._lock = RLock()
+        self._subscriptions: tuple[Subscription, ...] = ()
 
     @property
     def state(self) -> State:
         return self._state
 
+    @contextmanager
+    def subscribe(
+        self,
+        *,
+        policy: SubscriptionPolicyName = "latest",
+        fields: Collection[str] | None = None,
+        maxsize: int = 64,
+    ) -> Generator[Subscription, None, None]:
+        subscription = Subscription(policy=policy, fields=fields, maxsize=maxsize)
+        with self._lock:
+            # Deliver the current state, so late subscribers see any changes made before they subscribed.
+            subscription.put(Snapshot(self._version, self._state, self._trace_id))
+            self._subscriptions = (*self._subscriptions, subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+
     def _set_state(self, state: State) -> None:
-        self._state = state
-        self._condition.notify_all()
+        prev_state = self._state
+        # Stopping is final, so calls racing with a stop can't restart the radio.
+        if state != prev_state and not prev_state.stopping:
+            changed_fields = {name for name in STATE_FIELDS if getattr(state, name) != getattr(prev_state, name)}
+            self._state = state
+            self._version += 1
+            # Start a trace, so watcher and runner spans can be joined to this state change.
+            trace_id = self._trace_id = tracer.next_trace_id()
+            with naming_tuner(self._tuner), tracer.span("Radio: Set state", trace_id):
+                # Only wake subscribers that care about the changed fields.
+                snapshot = Snapshot(self._version, state, trace_id)
+                for subscription in self._subscriptions:
+                    if subscription.wants(changed_fields):
+                        subscription.put(snapshot)
+            # Preempt only once the new state is published, so a preempted watcher always finds it.
+            if state.superseded is not prev_state.superseded:
+                prev_state.superseded.set()
 
     def play(self) -> None:
-        with self._condition:
-            self._set_state(dataclasses.replace(self._state, playing=True))
+        with self._lock:
+            self._set_state(dataclasses.replace(self._state, superseded=Event(), playing=True))
 
     def pause(self) -> None:
-        with self._condition:
-            self._set_state(dataclasses.replace(self._state, playing=False))
+        with self._lock:
+            # Pausing abandons the scroll selection, so the LEDs stop showing it.
+            self._set_state(dataclasses.replace(self._state, superseded=Event(), playing=False, scroll_index=None))
 
     def toggle_play(self) -> None:
-        with self._condition:
-            self._set_state(dataclasses.replace(self._state, playing=not self._state.playing))
+        with self._lock:
+            if self._state.playing:
+                self.pause()
+            else:
+                self.play()
 
     def retune(self, station_index: int) -> None:
-        with self._condition:
-            self._set_state(dataclasses.replace(self._state, playing=True, station_index=station_index))
+        with self._lock:
+            self._set_state(
+                dataclasses.replace(self._state, superseded=Event(), playing=True, station_index=station_index)
+            )
+
+    def retune_by_service(self, service_id: int) -> None:
+        with self._lock:
+            station_index = self._state.stations.index_by_service_id(service_id)
+            self._set_state(
+                dataclasses.replace(self._state, superseded=Event(), playing=True, station_index=station_index)
+            )
+
+    def retune_by_label(self, label: str) -> None:
+        with self._lock:
+            station_index = self._state.stations.index_by_label(label)
+            self._set_state(
+                dataclasses.replace(self._state, superseded=Event(), playing=True, station_index=station_index)
+            )
 
     def next_station(self) -> None:
-        with self._condition:
-            self._set_state(dataclasses.replace(self._state, playing=True, station_index=self._state.station_index + 1))
+        with self._lock:
+            self._set_state(
+                dataclasses.replace(
+                    self._state, superseded=Event(), playing=True, station_index=self._state.station_index + 1
+                )
+            )
 
     def prev_station(self) -> None:
-        with self._condition:
-            self._set_state(dataclasses.replace(self._state, playing=True, station_index=self._state.station_index - 1))
+        with self._lock:
+            self._set_state(
+                dataclasses.replace(
+                    self._state, superseded=Event(), playing=True, station_index=self._state.station_index - 1
+                )
+            )
+
+    def scroll(self, step: int) -> None:
+        with self._lock:
+            # Move the scroll selection without retuning, starting from the current station. Scrolling does not
+            # supersede the tuner state, so share its event for preempting tunes.
+            scroll_index = self._state.station_index if self._state.scroll_index is None else self._state.scroll_index
+            self._set_state(
+                dataclasses.replace(self._state, scroll_index=scroll_index + step, superseded=self._state.superseded)
+            )
+
+    def settle(self) -> None:
+        with self._lock:
+            # Tune to the scroll selection.
+            if self._state.scroll_index is not None:
+                self._set_state(
+                    dataclasses.replace(
+                        self._state,
+                        superseded=Event(),
+                        playing=True,
+                        station_index=self._state.scroll_index,
+                        scroll_index=None,
+                    )
+                )
 
     def stop(self) -> None:
-        with self._condition:
-            self._set_state(dataclasses.replace(self._state, playing=False, stopping=True))
+        with self._lock:
+            self._set_state(
+                dataclasses.replace(self._state, superseded=Event(), playing=False, stopping=True, scroll_index=None)
+            )
+
 
+@contextmanager
+def playing(radio: Radio, *, play: bool = True) -> Generator[None, None, None]:
+    if play:
+        radio.play()
+    try:
+        yield
+    finally:
+        radio.stop()
 
-WatcherCallable: TypeAlias = Callable[Concatenate[State, State, P], None]
+
+WatcherCallable: TypeAlias = Callable[Concatenate[State, State, P], Optional[State]]
 WatcherContextManagerCallable: TypeAlias = Callable[Concatenate[Radio, P], AbstractContextManager[None]]
 
 
-def watcher(*, name: str) -> Callable[[WatcherCallable[P]], WatcherContextManagerCallable[P]]:
+def watcher(
+    *,
+    name: str,
+    policy: SubscriptionPolicyName = "latest",
+    fields: Collection[str] | None = None,
+    maxsize: int = 64,
+) -> Callable[[WatcherCallable[P]], WatcherContextManagerCallable[P]]:
     def decorator(fn: WatcherCallable[P]) -> WatcherContextManagerCallable[P]:
         @wraps(fn)
         @daemon(name=name)
         def watcher_wrapper(radio: Radio, /, *args: P.args, **kwargs: P.kwargs) -> None:
             prev_state: State = radio._init_state
-            while True:
-                # Wait for a state change.
-                with radio._condition:
-                    while True:
-                        state = radio._state
-                        if state != prev_state:
-                            break
-                        radio._condition.wait()
-                # Call the state watcher.
-                fn(prev_state, state, *args, **kwargs)
-                prev_state = state
-                # Possibly stop.
-                if state.stopping:
-                    break
+            state = prev_state
+            trace_id = 0
+            with radio.subscribe(policy=policy, fields=fields, maxsize=maxsize) as subscription:
+                while True:
+                    # Wait for a state change. If the last state was not reached, retry it unless a newer one is queued.
+                    snapshot = subscription.get(timeout=None if state == prev_state else 0.0)
+                    if snapshot is not None:
+                        state = snapshot.state
+                        trace_id = snapshot.trace_id
+                    if state == prev_state:
+                        continue
+                    stats.record(f"{name}: Woken", perf_counter() - state.changed_at)
+                    # Call the state watcher. It can return the state actually reached, if it differs.
+                    with tracer.span(name, trace_id):
+                        reached_state = fn(prev_state, state, *args, **kwargs)
+                    prev_state = state if reached_state is None else reached_state
+                    stats.record(f"{name}: Handled", perf_counter() - state.changed_at)
+                    # Possibly stop.
+                    if state.stopping:
+                        break
 
         return watcher_wrapper
 
     return decorator
 
 
-@watcher(name="Radio")
-def radio_watcher(prev_state: State, state: State, *, runner: Runner) -> None:
+# A placeholder station, used when a tune did not complete and the tuner station is unknown.
+UNTUNED: Final = Station(frequency_index=-1, service_id=-1, component_id=-1, label="")
+UNTUNED_STATIONS: Final = StationCatalogue((UNTUNED,))
+
+BOOT_TIMEOUT: Final = 30.0
+TUNE_TIMEOUT: Final = 15.0
+MUTE_TIMEOUT: Final = 15.0
+PAUSE_TIMEOUT: Final = 15.0
+SCAN_TIMEOUT: Final = 300.0
+
+# Failed commands are retried after a delay, doubling with each consecutive failure.
+RETRY_DELAY: Final = 0.5
+RETRY_MAX_DELAY: Final = 30.0
+
+
+class Backoff:
+    def __init__(self, *, delay: float = RETRY_DELAY, max_delay: float = RETRY_MAX_DELAY) -> None:
+        self.delay = delay
+        self.max_delay = max_delay
+        self.failures = 0
+
+    def failed(self) -> float:
+        delay = min(self.max_delay, self.delay * 2.0**self.failures)
+        self.failures += 1
+        return delay
+
+    def succeeded(self) -> None:
+        self.failures = 0
+
+
+# The radio ignores scrolling, and only tunes once the scroll selection settles.
+@watcher(name="Radio", fields=TUNER_FIELDS)
+def radio_watcher(
+    prev_state: State,
+    state: State,
+    *,
+    runner: Runner,
+    backoff: Backoff,
+    standby_timeout: float | None = None,
+    clock: Clock = REAL_CLOCK,
+) -> State | None:
     if state.playing:
         # Boot the radio.
         if not prev_state.playing:
             logger.info("Radio: Booting")
-            runner(radio_boot_args())
+            try:
+                runner(radio_boot_args(), timeout=BOOT_TIMEOUT)
+            except TimeoutExpired:
+                # The radio is not booted, so the boot is retried.
+                logger.warning("Radio: Boot timed out")
+                retry_after(state, backoff=backoff, clock=clock)
+                return dataclasses.replace(state, playing=False)
+            backoff.succeeded()
             logger.info("Radio: Booted")
+            stats.record("Radio: Booted", perf_counter() - state.changed_at)
         # Tune the radio.
         station = state.station
         if not prev_state.playing or station != prev_state.station:
             logger.info("Radio: Tuning: %r", station)
-            runner(radio_tune_args(station))
+            try:
+                runner(radio_tune_args(station), preempt=state.superseded, timeout=TUNE_TIMEOUT)
+            except Preempted:
+                logger.info("Radio: Preempted: %r", station)
+                return untuned_state(state)
+            except TimeoutExpired:
+                # The radio is not tuned, so the tune is retried.
+                logger.warning("Radio: Tune timed out: %r", station)
+                retry_after(state, backoff=backoff, clock=clock)
+                return untuned_state(state)
+            backoff.succeeded()
             logger.info("Radio: Tuned: %r", station)
+            stats.record("Radio: Tuned", perf_counter() - state.changed_at)
     elif prev_state.playing:
+        # Mute the radio, keeping it booted until the standby timeout expires.
+        if standby_timeout is not None and not state.stopping:
+            logger.info("Radio: Muting")
+            try:
+                runner(radio_mute_args(), preempt=state.superseded, timeout=MUTE_TIMEOUT)
+            except Preempted:
+                # A superseded mute can be dropped, leaving the radio playing.
+                logger.info("Radio: Mute preempted")
+                return untuned_state(state)
+            except TimeoutExpired:
+                logger.warning("Radio: Mute timed out")
+            else:
+                logger.info("Radio: Muted")
+                stats.record("Radio: Muted", perf_counter() - state.changed_at)
+                # If the radio resumes before the standby timeout, it only needs to tune.
+                if clock.wait(state.superseded, standby_timeout):
+                    return untuned_state(state)
         # Pause the radio.
         logger.info("Radio: Pausing")
-        runner(radio_pause_args())
-        logger.info("Radio: Paused")
+        try:
+            runner(radio_pause_args(), preempt=state.superseded, timeout=PAUSE_TIMEOUT)
+        except Preempted:
+            # A superseded pause can be dropped, leaving the radio playing. Retuning is skipped if it's still tuned.
+            logger.info("Radio: Pause preempted")
+            return untuned_state(state)
+        except TimeoutExpired:
+            logger.warning("Radio: Pause timed out")
+        else:
+            logger.info("Radio: Paused")
+            stats.record("Radio: Paused", perf_counter() - state.changed_at)
+    # All done!
+    return None
+
+
+def retry_after(state: State, *, backoff: Backoff, clock: Clock) -> None:
+    # Back off before retrying, so a dead tuner is not hammered. A newer state is handled straight away.
+    delay = backoff.failed()
+    logger.info("Radio: Retrying in %ss", delay)
+    clock.wait(state.superseded, delay)
+
+
+def untuned_state(state: State) -> State:
+    return dataclasses.replace(state, playing=True, station_index=0, stations=UNTUNED_STATIONS)
 
 
 def radio_boot_args() -> Args:
@@ -138,5 +408,13 @@ def radio_tune_args(station: Station) -> Args:
     )
 
 
+def radio_scan_args() -> Args:
+    return ("radio_cli", "--scan")
+
+
+def radio_mute_args() -> Args:
+    return ("radio_cli", "--level=0")
+
+
 def radio_pause_args() -> Args:
     return ("radio_cli", "--shutdown")
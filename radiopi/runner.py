@@ -1,45 +1,143 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from collections.abc import Mapping, Sequence
-from subprocess import check_call
-from typing import Literal, final
+from collections.abc import Iterator, Mapping, Sequence
+from pkgutil import resolve_name
+from subprocess import PIPE, CalledProcessError, Popen, TimeoutExpired, check_call
+from threading import Event, Timer
+from time import monotonic, perf_counter
+from typing import ClassVar, Literal, final
 
 from typing_extensions import TypeAlias
 
 from radiopi.log import logger
+from radiopi.stats import stats
+from radiopi.trace import tracer
 
-RunnerName = Literal["mock", "subprocess"]
+RunnerName = Literal["async", "mock", "preemptible", "spawn", "spawn-helper", "subprocess"]
 
 Args: TypeAlias = Sequence[str]
 
 
+class Preempted(Exception):
+    pass
+
+
 class Runner(ABC):
     @final
-    def __call__(self, args: Args) -> None:
+    def __call__(self, args: Args, *, preempt: Event | None = None, timeout: float | None = None) -> None:
         logger.info("Runner: %s", " ".join(args))
-        self._call(args)
+        name = f"Runner: {command_name(args)}"
+        started = perf_counter()
+        try:
+            with tracer.span(name):
+                self._call(args, preempt=preempt, timeout=timeout)
+        finally:
+            stats.record(name, perf_counter() - started)
 
     @abstractmethod
-    def _call(self, args: Args) -> None:
+    def _call(self, args: Args, *, preempt: Event | None, timeout: float | None) -> None:
         raise NotImplementedError
 
+    @final
+    def stream(self, args: Args, *, timeout: float | None = None) -> Iterator[str]:
+        logger.info("Runner: %s", " ".join(args))
+        return self._stream(args, timeout=timeout)
+
+    def _stream(self, args: Args, *, timeout: float | None) -> Iterator[str]:
+        timed_out = Event()
+        with Popen(args, stdout=PIPE, text=True) as process:
+            assert process.stdout is not None
+            # Kill the process if it runs out of time, so a hung command can't block the stream forever.
+            timer = Timer(timeout, kill_timed_out, (process, timed_out)) if timeout is not None else None
+            if timer is not None:
+                timer.start()
+            try:
+                yield from process.stdout
+            finally:
+                if timer is not None:
+                    timer.cancel()
+        if timed_out.is_set():
+            assert timeout is not None
+            logger.warning("Runner: Timed out: %s", " ".join(args))
+            raise TimeoutExpired(args, timeout)
+        if process.returncode:
+            raise CalledProcessError(process.returncode, args)
+
+    def close(self) -> None:
+        pass
+
 
 class MockRunner(Runner):
-    def _call(self, args: Args) -> None:
+    def _call(self, args: Args, *, preempt: Event | None, timeout: float | None) -> None:
         pass
 
+    def _stream(self, args: Args, *, timeout: float | None) -> Iterator[str]:
+        return iter(())
 
-class SubprocessRunner(Runner):
-    def _call(self, args: Args) -> None:
-        check_call(args)
 
+class ReplayRunner(MockRunner):
+    def __init__(self, output: str, *, chunk_size: int = 1024) -> None:
+        self.output = output
+        self.chunk_size = chunk_size
+
+    def _stream(self, args: Args, *, timeout: float | None) -> Iterator[str]:
+        for offset in range(0, len(self.output), self.chunk_size):
+            yield self.output[offset : offset + self.chunk_size]
 
-RUNNERS: Mapping[RunnerName, type[Runner]] = {
-    "mock": MockRunner,
-    "subprocess": SubprocessRunner,
+
+class SubprocessRunner(Runner):
+    def _call(self, args: Args, *, preempt: Event | None, timeout: float | None) -> None:
+        check_call(args, timeout=timeout)
+
+
+class PreemptibleSubprocessRunner(Runner):
+    poll_interval: ClassVar[float] = 0.01
+
+    def _call(self, args: Args, *, preempt: Event | None, timeout: float | None) -> None:
+        started = monotonic()
+        with Popen(args) as process:
+            while True:
+                try:
+                    returncode = process.wait(self.poll_interval)
+                except TimeoutExpired:
+                    # Terminate the process if a newer command supersedes it.
+                    if preempt is not None and preempt.is_set():
+                        logger.info("Runner: Preempted: %s", " ".join(args))
+                        process.terminate()
+                        raise Preempted(args) from None
+                    # Kill the process if it runs out of time.
+                    if timeout is not None and monotonic() - started > timeout:
+                        logger.warning("Runner: Timed out: %s", " ".join(args))
+                        process.kill()
+                        raise TimeoutExpired(args, timeout) from None
+                else:
+                    break
+        if returncode:
+            raise CalledProcessError(returncode, args)
+
+
+def kill_timed_out(process: Popen[str], timed_out: Event) -> None:
+    timed_out.set()
+    process.kill()
+
+
+def command_name(args: Args) -> str:
+    # Strip option values, so commands with different values share a name.
+    return " ".join(arg.split("=", 1)[0] for arg in args)
+
+
+RUNNERS: Mapping[RunnerName, str] = {
+    "async": "radiopi.asyncio_runner:AsyncioRunner",
+    "mock": "radiopi.runner:MockRunner",
+    "preemptible": "radiopi.runner:PreemptibleSubprocessRunner",
+    "spawn": "radiopi.spawn_runner:SpawnRunner",
+    "spawn-helper": "radiopi.spawn_runner:HelperSpawnRunner",
+    "subprocess": "radiopi.runner:SubprocessRunner",
 }
 
 
 def create_runner(runner_name: RunnerName) -> Runner:
-    return RUNNERS[runner_name]()
+    runner_path = RUNNERS[runner_name]
+    runner_cls: type[Runner] = resolve_name(runner_path)
+    return runner_cls()
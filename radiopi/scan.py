@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+import logging
+import re
+from argparse import ArgumentParser
+from collections.abc import Sequence
+from contextlib import closing
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Final
+
+from radiopi.atomic import write_atomic
+from radiopi.log import logger
+from radiopi.radio import BOOT_TIMEOUT, PAUSE_TIMEOUT, SCAN_TIMEOUT, radio_boot_args, radio_pause_args, radio_scan_args
+from radiopi.runner import RUNNERS, ReplayRunner, Runner, create_runner
+from radiopi.station import STATIONS_PATH, Station, parse_ensemble
+
+ENSEMBLE_LIST_RE: Final = re.compile(r'"ensembleList"\s*:\s*\[')
+
+decoder: Final = json.JSONDecoder()
+
+
+class ScanParser:
+    def __init__(self) -> None:
+        self._chunks: list[str] = []
+        # Only the undecoded tail of the source is buffered, so long scans decode in linear time.
+        self._buffer = ""
+        self._offset: int | None = None
+
+    @property
+    def source(self) -> str:
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> Sequence[dict[str, Any]]:
+        self._chunks.append(chunk)
+        self._buffer += chunk
+        # Find the start of the ensemble list.
+        if self._offset is None:
+            match = ENSEMBLE_LIST_RE.search(self._buffer)
+            if match is None:
+                return ()
+            self._offset = match.end()
+        # Decode all complete ensembles.
+        ensembles: list[dict[str, Any]] = []
+        while True:
+            while self._offset < len(self._buffer) and self._buffer[self._offset] in " \t\r\n,":
+                self._offset += 1
+            if self._buffer.startswith("]", self._offset):
+                break
+            try:
+                ensemble_data, self._offset = decoder.raw_decode(self._buffer, self._offset)
+            except json.JSONDecodeError:
+                break
+            ensembles.append(ensemble_data)
+        # Drop the decoded ensembles from the buffer.
+        self._buffer = self._buffer[self._offset :]
+        self._offset = 0
+        # All done!
+        return ensembles
+
+
+class StationScan:
+    def __init__(self, runner: Runner) -> None:
+        self._runner = runner
+        self.stations: list[Station] = []
+        self.ensembles = 0
+        self.duration = 0.0
+
+    @property
+    def ensembles_per_second(self) -> float:
+        return self.ensembles / self.duration if self.duration else 0.0
+
+    def run(self, path: Path) -> Sequence[Station]:
+        started = perf_counter()
+        parser = ScanParser()
+        logger.info("Scan: Booting")
+        self._runner(radio_boot_args(), timeout=BOOT_TIMEOUT)
+        try:
+            for chunk in self._runner.stream(radio_scan_args(), timeout=SCAN_TIMEOUT):
+                for ensemble_data in parser.feed(chunk):
+                    # Publish partial results as each ensemble completes.
+                    stations = parse_ensemble(ensemble_data)
+                    self.stations.extend(stations)
+                    self.ensembles += 1
+                    logger.info("Scan: Ensemble %s: %s stations", ensemble_data["EnsembleNo"], len(stations))
+        finally:
+            self._runner(radio_pause_args(), timeout=PAUSE_TIMEOUT)
+            self.duration = perf_counter() - started
+        # Write the complete scan, checking it's valid first.
+        source = parser.source
+        json.loads(source)
+        write_atomic(path, source.encode())
+        logger.info("Scan: Scanned %s stations in %s ensembles: %s", len(self.stations), self.ensembles, path)
+        return (*self.stations,)
+
+
+def main() -> None:  # pragma: no cover
+    # Parse args.
+    parser = ArgumentParser()
+    parser.add_argument("--runner", choices=RUNNERS, default="subprocess")
+    parser.add_argument("--replay", type=Path, default=None)
+    parser.add_argument("--output", type=Path, default=STATIONS_PATH)
+    args = parser.parse_args()
+    # Run scan.
+    logging.basicConfig(format="[%(levelname)s] %(message)s", level=logging.INFO)
+    runner = create_runner(args.runner) if args.replay is None else ReplayRunner(args.replay.read_text())
+    with closing(runner):
+        scan = StationScan(runner)
+        scan.run(args.output)
+    logger.info("Scan: %.1f ensembles per second", scan.ensembles_per_second)
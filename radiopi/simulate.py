@@ -0,0 +1,419 @@
+from __future__ import annotations
+
+import json
+import sys
+from argparse import ArgumentParser
+from collections import Counter
+from collections.abc import Callable, Mapping, Sequence
+from contextlib import ExitStack
+from functools import partial
+from heapq import heappop, heappush
+from inspect import unwrap
+from itertools import count
+from math import inf
+from pathlib import Path
+from random import Random
+from subprocess import TimeoutExpired
+from threading import Event, Semaphore, Thread, current_thread
+from time import perf_counter
+from typing import Any, ClassVar, Final, Literal, NamedTuple, Optional
+
+from typing_extensions import TypeAlias
+
+from radiopi.benchmark import percentile
+from radiopi.buttons import SCROLL_HOLD_TIME, SHUTDOWN_HOLD_TIME, Scroller, set_button_handlers
+from radiopi.clock import Clock
+from radiopi.compact import is_pause_args
+from radiopi.compositor import LEDCompositor
+from radiopi.curves import EasingName
+from radiopi.led_controller import LEDController, MockLEDController
+from radiopi.leds import LEDs, leds_watcher
+from radiopi.pin_factory import PinFactory
+from radiopi.radio import TUNER_FIELDS, Backoff, Radio, State, Subscription, radio_watcher
+from radiopi.runner import Args, Preempted, Runner, command_name
+from radiopi.station import StationCatalogue, load_stations
+
+ButtonName = Literal["toggle_play", "next_station", "prev_station", "shutdown"]
+
+Handler: TypeAlias = Optional[Callable[[], object]]
+
+StateHandler: TypeAlias = Callable[[State, State], Optional[State]]
+
+# Typical radio_cli latencies, in seconds.
+SIMULATED_LATENCIES: Final[Mapping[str, float]] = {
+    "radio_cli --boot": 2.0,
+    "radio_cli --component --service --frequency --play --level": 0.8,
+    "radio_cli --level": 0.1,
+    "radio_cli --shutdown": 0.5,
+}
+SIMULATED_DEFAULT_LATENCY: Final = 0.1
+
+# The radio is left this long after the last button event before stopping, so a trailing release can settle.
+SIMULATED_DRAIN_TIME: Final = 5.0
+
+
+class ButtonEvent(NamedTuple):
+    at: float
+    button_name: ButtonName
+    pressed: bool
+
+
+class VirtualTask(Thread):
+    # A thread that only runs when resumed by its clock, so tasks take turns like coroutines.
+    def __init__(self, clock: VirtualClock, target: Callable[[], object], *, name: str) -> None:
+        super().__init__(name=name, daemon=True)
+        self.clock = clock
+        self.target = target
+        self.result = False
+        self.error: BaseException | None = None
+        self.resumed = Semaphore(0)
+
+    def run(self) -> None:
+        try:
+            self.target()
+        except BaseException as ex:
+            self.error = ex
+        finally:
+            self.clock._yielded.release()
+
+
+class VirtualClock(Clock):
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.on_step: Callable[[], None] = lambda: None
+        # Callbacks in time order. Waits that time out are queued without a callback.
+        self._queue: list[tuple[float, int, Optional[Callable[[], None]]]] = []
+        self._counter = count()
+        # Tasks waiting to be resumed, in the order they started waiting.
+        self._waiting: dict[int, tuple[Callable[[], bool], VirtualTask]] = {}
+        self._yielded = Semaphore(0)
+
+    def call_at(self, at: float, callback: Callable[[], None]) -> None:
+        heappush(self._queue, (at, next(self._counter), callback))
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> None:
+        self.call_at(self.now + delay, callback)
+
+    def spawn(self, target: Callable[[], object], *, name: str) -> None:
+        # Start a task now. It runs until it waits on the clock, then the clock resumes it when the wait is over.
+        task = VirtualTask(self, target, name=name)
+        self.call_at(self.now, partial(self._resume, task, True))
+
+    def advance(self, until: float, *, interrupt: Event | None = None) -> bool:
+        return self._run(until, lambda: False if interrupt is None else interrupt.is_set())
+
+    def wait(self, event: Event, timeout: float | None) -> bool:
+        return self.wait_for(event.is_set, timeout)
+
+    def wait_for(self, predicate: Callable[[], bool], timeout: float | None) -> bool:
+        task = current_thread()
+        # Waiting outside a task runs the clock until the wait is over.
+        if not isinstance(task, VirtualTask) or task.clock is not self:
+            return self._run(inf if timeout is None else self.now + timeout, predicate)
+        if predicate():
+            return True
+        # Yield to the clock until the wait is over.
+        token = next(self._counter)
+        self._waiting[token] = (predicate, task)
+        if timeout is not None:
+            heappush(self._queue, (self.now + timeout, token, None))
+        self._yielded.release()
+        task.resumed.acquire()
+        return task.result
+
+    def _run(self, until: float, done: Callable[[], bool]) -> bool:
+        # Resume tasks and run callbacks in time order, stopping early once done.
+        while not done():
+            # Drop the timeouts of waits that are already over, so they don't move time on.
+            while self._queue and self._queue[0][2] is None and self._queue[0][1] not in self._waiting:
+                heappop(self._queue)
+            ready = next((token for token, (predicate, _) in self._waiting.items() if predicate()), None)
+            if ready is not None:
+                # Resume a task whose wait is over, before time moves on.
+                self._resume(self._waiting.pop(ready)[1], True)
+            elif self._queue and self._queue[0][0] <= until:
+                at, token, callback = heappop(self._queue)
+                self.now = max(self.now, at)
+                if callback is None:
+                    predicate, task = self._waiting.pop(token)
+                    self._resume(task, predicate())
+                else:
+                    callback()
+            elif until == inf and self._waiting:
+                # Waiting forever returns once nothing else can happen.
+                self._resume(self._waiting.pop(next(iter(self._waiting)))[1], False)
+            else:
+                # Running forever leaves the clock at the last callback.
+                if until < inf:
+                    self.now = max(self.now, until)
+                return False
+            self.on_step()
+        return True
+
+    def _resume(self, task: VirtualTask, result: bool) -> None:
+        task.result = result
+        if task.ident is None:
+            task.start()
+        else:
+            task.resumed.release()
+        # Wait for the task to wait again, or finish.
+        self._yielded.acquire()
+        if task.error is not None:
+            raise task.error
+
+
+class SimulatedRunner(Runner):
+    def __init__(
+        self,
+        clock: VirtualClock,
+        *,
+        latencies: Mapping[str, float] = SIMULATED_LATENCIES,
+        default_latency: float = SIMULATED_DEFAULT_LATENCY,
+    ) -> None:
+        self._clock = clock
+        self.latencies = latencies
+        self.default_latency = default_latency
+        self.commands: list[tuple[float, Args]] = []
+
+    def _call(self, args: Args, *, preempt: Event | None, timeout: float | None) -> None:
+        self.commands.append((self._clock.now, args))
+        latency = self.latencies.get(command_name(args), self.default_latency)
+        # Like the compacting runner, never interrupt a started pause.
+        if is_pause_args(args):
+            preempt = None
+        # Simulate a command that takes time, and can be preempted or time out.
+        if self._clock.wait(
+            Event() if preempt is None else preempt, latency if timeout is None else min(latency, timeout)
+        ):
+            raise Preempted(args)
+        if timeout is not None and latency > timeout:
+            raise TimeoutExpired(args, timeout)
+
+
+class SimulatedButton:
+    def __init__(self, clock: VirtualClock, *, hold_time: float) -> None:
+        self._clock = clock
+        self.hold_time = hold_time
+        self.when_pressed: Handler = None
+        self.when_held: Handler = None
+        self.when_released: Handler = None
+        self.is_pressed = False
+        self._presses = 0
+
+    def press(self) -> None:
+        if not self.is_pressed:
+            self.is_pressed = True
+            self._presses += 1
+            self._clock.call_later(self.hold_time, partial(self._hold, self._presses))
+            self._call(self.when_pressed)
+
+    def _hold(self, presses: int) -> None:
+        # Only fire if this press is still held.
+        if self.is_pressed and self._presses == presses:
+            self._call(self.when_held)
+
+    def release(self) -> None:
+        if self.is_pressed:
+            self.is_pressed = False
+            self._call(self.when_released)
+
+    def _call(self, handler: Handler) -> None:
+        # Run each handler as its own task, like gpiozero runs handlers in its own thread.
+        if handler is not None:
+            self._clock.spawn(handler, name="Button")
+
+
+class SimulatedCompositor(LEDCompositor):
+    def __init__(self, clock: VirtualClock, *, led_controller_cls: type[LEDController]) -> None:
+        super().__init__(
+            frame_rate=led_controller_cls.frame_rate,
+            transition_duration=led_controller_cls.transition_duration,
+            easing_name=led_controller_cls.easing_name,
+            gamma=led_controller_cls.gamma,
+        )
+        self._clock = clock
+        self._rendering = False
+
+    def animate(self, values: Sequence[float], *leds: LEDController) -> None:
+        super().animate(values, *leds)
+        if not self._rendering:
+            self._rendering = True
+            self._render()
+
+    def _render(self) -> None:
+        # Render a frame, then schedule the next one on the virtual clock.
+        with self._condition:
+            frame = self._next_frame()
+            self._rendering = bool(self._timelines)
+        LEDController.set_values(frame)
+        if self._rendering:
+            self._clock.call_later(self.frame_interval, self._render)
+
+
+class SimulatedLEDController(MockLEDController):
+    transition_duration: ClassVar[float] = 0.3
+    frame_rate: ClassVar[float] = 100.0
+    easing_name: ClassVar[EasingName] = "ease-in-out"
+    value: float = 0.0
+
+    def _set_value(self, value: float) -> None:
+        self.value = value
+
+
+class SimulatedWatcher:
+    def __init__(self, clock: VirtualClock, subscription: Subscription, handler: StateHandler, *, state: State) -> None:
+        self._clock = clock
+        self._subscription = subscription
+        self._handler = handler
+        self.prev_state = state
+        self.state = state
+        self.version = 0
+        self.handled: list[tuple[int, float]] = []
+
+    def run(self) -> None:
+        # Handle states like the watcher threads do, waiting on the virtual clock for newer states.
+        # Waiting forever only gives up if the clock has nothing left to run.
+        while not self.prev_state.stopping and self._clock.wait_for(self._changed, None):
+            state = self.state
+            reached_state = self._handler(self.prev_state, state)
+            self.prev_state = state if reached_state is None else reached_state
+            self.handled.append((self.version, self._clock.now))
+
+    def _changed(self) -> bool:
+        # If the last state was not reached, retry it unless a newer one is queued.
+        snapshot = self._subscription.get(timeout=0.0)
+        if snapshot is not None:
+            self.state = snapshot.state
+            self.version = snapshot.version
+        return self.state != self.prev_state
+
+
+def simulate(
+    trace: Sequence[ButtonEvent],
+    *,
+    stations: StationCatalogue,
+    latencies: Mapping[str, float] = SIMULATED_LATENCIES,
+    standby_timeout: float | None = None,
+) -> dict[str, Any]:
+    started = perf_counter()
+    clock = VirtualClock()
+    radio = Radio(State(playing=False, station_index=0, stations=stations, stopping=False))
+    runner = SimulatedRunner(clock, latencies=latencies)
+    scroller = Scroller(radio, clock=clock)
+    buttons: dict[ButtonName, SimulatedButton] = {
+        "toggle_play": SimulatedButton(clock, hold_time=1.0),
+        "next_station": SimulatedButton(clock, hold_time=SCROLL_HOLD_TIME),
+        "prev_station": SimulatedButton(clock, hold_time=SCROLL_HOLD_TIME),
+        "shutdown": SimulatedButton(clock, hold_time=SHUTDOWN_HOLD_TIME),
+    }
+    set_button_handlers(
+        toggle_play_button=buttons["toggle_play"],
+        next_station_button=buttons["next_station"],
+        prev_station_button=buttons["prev_station"],
+        shutdown_button=buttons["shutdown"],
+        radio=radio,
+        runner=runner,
+        scroller=scroller,
+    )
+    pin_factory = PinFactory(None)
+    led_controllers = (
+        SimulatedLEDController(13, name="Play", pin_factory=pin_factory),
+        SimulatedLEDController(6, name="Next station", pin_factory=pin_factory),
+        SimulatedLEDController(5, name="Prev station", pin_factory=pin_factory),
+    )
+    leds = LEDs(*led_controllers)
+    compositor = SimulatedCompositor(clock, led_controller_cls=SimulatedLEDController)
+    with ExitStack() as stack:
+        # Record when each state was set, then run the real watcher functions on the virtual clock.
+        changes = stack.enter_context(radio.subscribe(policy="all"))
+        changed_at: dict[int, float] = {}
+        radio_state_watcher = SimulatedWatcher(
+            clock,
+            stack.enter_context(radio.subscribe(fields=TUNER_FIELDS)),
+            partial(
+                unwrap(radio_watcher), runner=runner, backoff=Backoff(), standby_timeout=standby_timeout, clock=clock
+            ),
+            state=radio.state,
+        )
+        leds_state_watcher = SimulatedWatcher(
+            clock,
+            stack.enter_context(radio.subscribe()),
+            partial(unwrap(leds_watcher), compositor=compositor, leds=leds),
+            state=radio.state,
+        )
+
+        def step() -> None:
+            while (snapshot := changes.get(timeout=0.0)) is not None:
+                changed_at.setdefault(snapshot.version, clock.now)
+
+        def stop() -> None:
+            scroller.stop()
+            radio.stop()
+
+        # Run the scroller and watchers as tasks, each resumed by the clock when its wait is over.
+        clock.on_step = step
+        clock.spawn(scroller.run, name="Scroller")
+        clock.spawn(radio_state_watcher.run, name="Radio")
+        clock.spawn(leds_state_watcher.run, name="LEDs")
+        # Replay the trace, then let the radio settle before stopping it, and run until nothing else can happen.
+        clock.call_at(0.0, radio.play)
+        for event in trace:
+            button = buttons[event.button_name]
+            clock.call_at(event.at, button.press if event.pressed else button.release)
+        clock.call_at((trace[-1].at if trace else 0.0) + SIMULATED_DRAIN_TIME, stop)
+        clock.advance(inf)
+    # Report the command stream and how long each tuner state took to handle.
+    handling_latencies = [handled_at - changed_at[version] for version, handled_at in radio_state_watcher.handled]
+    wall_time = perf_counter() - started
+    return {
+        "duration": clock.now,
+        "wall_time": wall_time,
+        "speedup": clock.now / wall_time,
+        "button_events": len(trace),
+        "state_changes": len(changed_at),
+        "commands": dict(Counter(command_name(args) for _, args in runner.commands)),
+        "command_stream": [[at, " ".join(args)] for at, args in runner.commands],
+        "latency_p50": percentile(handling_latencies, 0.5),
+        "latency_p99": percentile(handling_latencies, 0.99),
+        "latency_max": max(handling_latencies),
+        "led_values": {led.name: led.value for led in led_controllers},
+    }
+
+
+def load_button_trace(path: Path) -> Sequence[ButtonEvent]:
+    return [
+        ButtonEvent(float(at), button_name, bool(pressed)) for at, button_name, pressed in json.loads(path.read_text())
+    ]
+
+
+def random_button_trace(*, duration: float, seed: int, interval: float = 60.0) -> Sequence[ButtonEvent]:
+    # Press a button every so often, usually tapping and sometimes holding to scroll.
+    random = Random(seed)
+    trace: list[ButtonEvent] = []
+    at = random.expovariate(1.0 / interval)
+    while at < duration:
+        button_name: ButtonName = random.choice(("toggle_play", "next_station", "next_station", "prev_station"))
+        held = button_name != "toggle_play" and random.random() < 0.2
+        trace.append(ButtonEvent(at, button_name, True))
+        trace.append(ButtonEvent(at + (random.uniform(1.0, 5.0) if held else 0.1), button_name, False))
+        at += 5.0 + random.expovariate(1.0 / interval)
+    return trace
+
+
+def main() -> None:  # pragma: no cover
+    # Parse args.
+    parser = ArgumentParser()
+    parser.add_argument("--trace", type=Path, default=None)
+    parser.add_argument("--duration", type=float, default=3600.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--standby-timeout", type=float, default=None)
+    args = parser.parse_args()
+    # Run simulation.
+    trace = (
+        random_button_trace(duration=args.duration, seed=args.seed)
+        if args.trace is None
+        else load_button_trace(args.trace)
+    )
+    report = simulate(trace, stations=StationCatalogue(load_stations()), standby_timeout=args.standby_timeout)
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+from select import select
+from signal import pidfd_send_signal
+from typing import Any, BinaryIO
+
+# A small helper process that spawns commands on request. It's started early, with `python -S -I`, so it stays
+# small and never imports the rest of the app. Each request and response is a JSON object on one line, tagged with
+# the id of the command it belongs to, so several commands can run at once. A request with `args` spawns a command.
+# Its responses are the pid of the spawned process, followed by its return code. A request with `signal` signals a
+# running command.
+
+
+def serve(requests: int, responses: BinaryIO) -> None:
+    # The id and pid of each running command, by pidfd.
+    processes: dict[int, tuple[int, int]] = {}
+    buffer = b""
+    reading = True
+    # Once the requests are closed, wait for the running commands to exit.
+    while reading or processes:
+        fds = list(processes)
+        if reading:
+            fds.append(requests)
+        for fd in select(fds, [], [], None)[0]:
+            if fd == requests:
+                chunk = os.read(requests, 4096)
+                reading = bool(chunk)
+                *lines, buffer = (buffer + chunk).split(b"\n")
+                for line in lines:
+                    handle(json.loads(line), processes, responses)
+            else:
+                # A pidfd becomes readable when the process exits.
+                request_id, pid = processes.pop(fd)
+                os.close(fd)
+                _, status = os.waitpid(pid, 0)
+                respond(responses, {"id": request_id, "returncode": os.waitstatus_to_exitcode(status)})
+
+
+def handle(request: dict[str, Any], processes: dict[int, tuple[int, int]], responses: BinaryIO) -> None:
+    request_id: int = request["id"]
+    if "signal" in request:
+        # Signal through the pidfd, so a reaped pid that's been reused is never signalled. Commands that have already
+        # been reaped are no longer running, so are ignored.
+        for fd, (running_id, _) in processes.items():
+            if running_id == request_id:
+                pidfd_send_signal(fd, request["signal"])
+        return
+    args = request["args"]
+    try:
+        pid = os.posix_spawnp(args[0], args, os.environ)
+    except OSError as ex:
+        respond(responses, {"id": request_id, "errno": ex.errno or 0})
+        return
+    processes[os.pidfd_open(pid)] = (request_id, pid)
+    respond(responses, {"id": request_id, "pid": pid})
+
+
+def respond(responses: BinaryIO, data: dict[str, int]) -> None:
+    responses.write(json.dumps(data).encode() + b"\n")
+    responses.flush()
+
+
+if __name__ == "__main__":  # pragma: no cover
+    serve(sys.stdin.fileno(), sys.stdout.buffer)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+from contextlib import suppress
+from itertools import count
+from queue import Empty, SimpleQueue
+from select import select
+from signal import SIGKILL, SIGTERM
+from subprocess import PIPE, CalledProcessError, Popen, TimeoutExpired
+from threading import Event, Lock, Thread
+from time import monotonic
+from typing import Any, ClassVar, Optional
+
+from radiopi import spawn_helper
+from radiopi.log import logger
+from radiopi.runner import Args, Preempted, Runner
+
+
+class SpawnRunner(Runner):
+    poll_interval: ClassVar[float] = 0.01
+
+    def _call(self, args: Args, *, preempt: Event | None, timeout: float | None) -> None:
+        pid, fd = self._spawn(args)
+        try:
+            self._wait(args, pid, fd, preempt=preempt, timeout=timeout)
+        finally:
+            returncode = self._reap(pid, fd)
+        if returncode:
+            raise CalledProcessError(returncode, args)
+
+    def _wait(self, args: Args, pid: int, fd: int, *, preempt: Event | None, timeout: float | None) -> None:
+        started = monotonic()
+        # Wake immediately when the process exits. Only poll if the process can be preempted or time out.
+        poll_interval = None if preempt is None and timeout is None else self.poll_interval
+        while not self._poll(fd, poll_interval):
+            # Terminate the process if a newer command supersedes it.
+            if preempt is not None and preempt.is_set():
+                logger.info("Runner: Preempted: %s", " ".join(args))
+                os.kill(pid, SIGTERM)
+                raise Preempted(args)
+            # Kill the process if it runs out of time.
+            if timeout is not None and monotonic() - started > timeout:
+                logger.warning("Runner: Timed out: %s", " ".join(args))
+                os.kill(pid, SIGKILL)
+                raise TimeoutExpired(args, timeout)
+
+    def _spawn(self, args: Args) -> tuple[int, int]:
+        # Spawn without forking the interpreter, which is slow and memory-hungry on a Pi.
+        pid = os.posix_spawnp(args[0], tuple(args), os.environ)
+        return pid, os.pidfd_open(pid)
+
+    def _poll(self, fd: int, timeout: float | None) -> bool:
+        # A pidfd becomes readable when the process exits.
+        return bool(select([fd], [], [], timeout)[0])
+
+    def _reap(self, pid: int, fd: int) -> int:
+        os.close(fd)
+        _, status = os.waitpid(pid, 0)
+        return os.waitstatus_to_exitcode(status)
+
+
+class HelperSpawnRunner(Runner):
+    poll_interval: ClassVar[float] = SpawnRunner.poll_interval
+
+    def __init__(self) -> None:
+        # Start the helper while the app is still small. It spawns all commands from then on.
+        self._helper = Popen(
+            (sys.executable, "-S", "-I", spawn_helper.__file__),
+            stdin=PIPE,
+            stdout=PIPE,
+        )
+        # The lock is only held while sending a request or routing a response, so commands run concurrently.
+        self._lock = Lock()
+        self._ids = count()
+        self._responses: dict[int, SimpleQueue[Optional[dict[str, Any]]]] = {}
+        self._reader = Thread(target=self._read, name="Spawn helper", daemon=True)
+        self._reader.start()
+
+    def _call(self, args: Args, *, preempt: Event | None, timeout: float | None) -> None:
+        responses: SimpleQueue[Optional[dict[str, Any]]] = SimpleQueue()
+        with self._lock:
+            request_id = next(self._ids)
+            self._responses[request_id] = responses
+        try:
+            self._send({"id": request_id, "args": list(args)})
+            response = self._receive(responses, None)
+            if "errno" in response:
+                raise OSError(response["errno"], os.strerror(response["errno"]), args[0])
+            returncode: int = self._wait(args, request_id, responses, preempt=preempt, timeout=timeout)["returncode"]
+        finally:
+            with self._lock:
+                del self._responses[request_id]
+        if returncode:
+            raise CalledProcessError(returncode, args)
+
+    def _wait(
+        self,
+        args: Args,
+        request_id: int,
+        responses: SimpleQueue[Optional[dict[str, Any]]],
+        *,
+        preempt: Event | None,
+        timeout: float | None,
+    ) -> dict[str, Any]:
+        started = monotonic()
+        # Wake immediately when the process exits. Only poll if the process can be preempted or time out.
+        poll_interval = None if preempt is None and timeout is None else self.poll_interval
+        while True:
+            with suppress(Empty):
+                return self._receive(responses, poll_interval)
+            # Terminate the process if a newer command supersedes it. The helper signals it, since only the helper
+            # knows if it's been reaped. Wait for the helper to reap it, so it can't overlap the next command.
+            if preempt is not None and preempt.is_set():
+                logger.info("Runner: Preempted: %s", " ".join(args))
+                self._send({"id": request_id, "signal": SIGTERM})
+                self._receive(responses, None)
+                raise Preempted(args)
+            # Kill the process if it runs out of time.
+            if timeout is not None and monotonic() - started > timeout:
+                logger.warning("Runner: Timed out: %s", " ".join(args))
+                self._send({"id": request_id, "signal": SIGKILL})
+                self._receive(responses, None)
+                raise TimeoutExpired(args, timeout)
+
+    def _send(self, request: dict[str, Any]) -> None:
+        assert self._helper.stdin is not None
+        with self._lock:
+            try:
+                self._helper.stdin.write(json.dumps(request).encode() + b"\n")
+                self._helper.stdin.flush()
+            except BrokenPipeError:
+                raise self._exited_error() from None
+
+    def _receive(self, responses: SimpleQueue[Optional[dict[str, Any]]], timeout: float | None) -> dict[str, Any]:
+        response = responses.get(timeout=timeout)
+        if response is None:
+            raise self._exited_error()
+        return response
+
+    def _read(self) -> None:
+        assert self._helper.stdout is not None
+        # Route each response to the command it belongs to.
+        for line in self._helper.stdout:
+            response: dict[str, Any] = json.loads(line)
+            with self._lock:
+                self._responses[response["id"]].put(response)
+        # The helper has exited, so wake all running commands. Later commands fail to send.
+        with self._lock:
+            for responses in self._responses.values():
+                responses.put(None)
+
+    def _exited_error(self) -> RuntimeError:
+        return RuntimeError(f"Spawn helper exited: {self._helper.wait()}")
+
+    def close(self) -> None:
+        with self._helper:
+            assert self._helper.stdin is not None
+            # A request that failed to send is still buffered if the helper exited.
+            with suppress(BrokenPipeError):
+                self._helper.stdin.close()
+        self._reader.join()
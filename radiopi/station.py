@@ -2,8 +2,37 @@ from __future__ import annotations
 
 import dataclasses
 import json
-from collections.abc import Sequence
+import struct
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from hashlib import sha256
 from pathlib import Path
+from typing import Any, Final, Literal, NamedTuple, overload
+
+from typing_extensions import TypeAlias
+
+from radiopi.atomic import write_atomic
+from radiopi.log import logger
+
+StationOrderName = Literal["file", "signal"]
+
+STATIONS_PATH: Final = Path(__file__).parent.parent / "stations.json"
+STATIONS_CACHE_PATH: Final = STATIONS_PATH.with_name(".stations.cache")
+
+CACHE_MAGIC: Final = b"radiopi-stations-2\n"
+CACHE_HEADER: Final = struct.Struct("<qq32sI")  # Source mtime, source size, source hash, station count.
+CACHE_STATION: Final = struct.Struct("<qqqH")  # Frequency index, service ID, component ID, label length.
+CACHE_QUALITY: Final = struct.Struct("<?qqqq??")  # Has quality, RSSI, SNR, CNR, FIC quality, valid, acquired.
+
+
+@dataclasses.dataclass(frozen=True)
+class SignalQuality:
+    rssi: int
+    snr: int
+    cnr: int
+    fic_quality: int
+    valid: bool
+    acquired: bool
 
 
 @dataclasses.dataclass(frozen=True)
@@ -12,32 +41,227 @@ class Station:
     service_id: int
     component_id: int
     label: str
+    quality: SignalQuality | None = dataclasses.field(default=None, repr=False, compare=False)
+
+
+StationKey: TypeAlias = tuple[int, int, int]
+
+
+def station_key(station: Station) -> StationKey:
+    return (station.frequency_index, station.service_id, station.component_id)
+
+
+def normalize_label(label: str) -> str:
+    return " ".join(label.casefold().split())
+
+
+class StationCatalogue(Sequence[Station]):
+    def __init__(self, stations: Iterable[Station]) -> None:
+        self._stations = (*stations,)
+        # Build the indexes. Where stations share a service ID or label, the first station wins.
+        self._by_service_id: dict[int, int] = {}
+        self._by_key: dict[StationKey, int] = {}
+        self._by_label: dict[str, int] = {}
+        for index, station in enumerate(self._stations):
+            self._by_service_id.setdefault(station.service_id, index)
+            self._by_key.setdefault(station_key(station), index)
+            self._by_label.setdefault(normalize_label(station.label), index)
+        self._sorted_labels = sorted(self._by_label)
+
+    @overload
+    def __getitem__(self, index: int) -> Station: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[Station]: ...
+
+    def __getitem__(self, index: int | slice) -> Station | Sequence[Station]:
+        return self._stations[index]
+
+    def __len__(self) -> int:
+        return len(self._stations)
+
+    def __repr__(self) -> str:
+        return f"StationCatalogue({self._stations!r})"
+
+    def index_by_service_id(self, service_id: int) -> int:
+        return self._by_service_id[service_id]
+
+    def index_by_key(self, key: StationKey) -> int:
+        return self._by_key[key]
+
+    def index_by_label(self, label: str) -> int:
+        return self._by_label[normalize_label(label)]
+
+    def search(self, prefix: str) -> Sequence[Station]:
+        prefix = normalize_label(prefix)
+        stations: list[Station] = []
+        for label in self._sorted_labels[bisect_left(self._sorted_labels, prefix) :]:
+            if not label.startswith(prefix):
+                break
+            stations.append(self._stations[self._by_label[label]])
+        return (*stations,)
+
 
+class StationsCache(NamedTuple):
+    mtime_ns: int
+    size: int
+    digest: bytes
+    stations: Sequence[Station]
 
-def load_stations() -> Sequence[Station]:
+
+def load_stations(
+    path: Path = STATIONS_PATH, *, cache: bool = True, cache_path: Path | None = None
+) -> Sequence[Station]:
+    if not cache:
+        return parse_stations(path.read_bytes())
+    # Look up the default cache path on each call, so it can be moved.
+    if cache_path is None:
+        cache_path = STATIONS_CACHE_PATH
+    # If the source file is unchanged, use the cache.
+    stat = path.stat()
+    cache = read_stations_cache(cache_path)
+    if cache is not None and cache.mtime_ns == stat.st_mtime_ns and cache.size == stat.st_size:
+        return cache.stations
+    # If the source file has the same content, use the cache. Otherwise, parse the source file.
+    data = path.read_bytes()
+    digest = sha256(data).digest()
+    stations = cache.stations if cache is not None and cache.digest == digest else parse_stations(data)
+    # Update the cache.
+    write_stations_cache(
+        cache_path,
+        StationsCache(mtime_ns=stat.st_mtime_ns, size=stat.st_size, digest=digest, stations=stations),
+    )
+    # All done!
+    return stations
+
+
+def parse_stations(source: bytes) -> Sequence[Station]:
     # Load station data.
-    data = json.loads((Path(__file__).parent.parent / "stations.json").read_bytes())
+    data = json.loads(source)
     # Build the station mapping.
     stations: list[Station] = []
     for ensemble_data in data["ensembleList"]:
-        frequency_index = ensemble_data["EnsembleNo"]
-        digital_service_list_data = ensemble_data.get("DigitalServiceList", {})
-        service_list_data = digital_service_list_data.get("ServiceList", [])
-        # Look at all services.
-        for service_data in service_list_data:
-            service_id = service_data["ServId"]
-            label = service_data["Label"].strip()
-            # Look at all components.
-            for component_data in service_data["ComponentList"]:
-                component_id = component_data["comp_ID"]
-                # Create the station info.
-                station = Station(
-                    frequency_index=frequency_index,
-                    service_id=service_id,
-                    component_id=component_id,
-                    label=label,
-                )
-                # Store the mapping.
-                stations.append(station)
+        stations.extend(parse_ensemble(ensemble_data))
     # All done!
     return (*stations,)
+
+
+def parse_ensemble(ensemble_data: Mapping[str, Any]) -> Sequence[Station]:
+    frequency_index = ensemble_data["EnsembleNo"]
+    quality = parse_signal_quality(ensemble_data["DigradStatus"]) if "DigradStatus" in ensemble_data else None
+    digital_service_list_data = ensemble_data.get("DigitalServiceList", {})
+    service_list_data = digital_service_list_data.get("ServiceList", [])
+    stations: list[Station] = []
+    # Look at all services.
+    for service_data in service_list_data:
+        service_id = service_data["ServId"]
+        label = service_data["Label"].strip()
+        # Look at all components.
+        for component_data in service_data["ComponentList"]:
+            component_id = component_data["comp_ID"]
+            # Create the station info.
+            station = Station(
+                frequency_index=frequency_index,
+                service_id=service_id,
+                component_id=component_id,
+                label=label,
+                quality=quality,
+            )
+            # Store the mapping.
+            stations.append(station)
+    # All done!
+    return stations
+
+
+def parse_signal_quality(data: Mapping[str, int]) -> SignalQuality:
+    return SignalQuality(
+        rssi=data["rssi"],
+        snr=data["snr"],
+        cnr=data["cnr"],
+        fic_quality=data["FIC_quality"],
+        valid=bool(data["valid"]),
+        acquired=bool(data["acq"]),
+    )
+
+
+def signal_rank(station: Station) -> tuple[bool, bool, int, int, int]:
+    quality = station.quality
+    if quality is None:
+        return (False, False, 0, 0, 0)
+    return (quality.acquired, quality.valid, quality.fic_quality, quality.cnr, quality.rssi)
+
+
+def order_by_file(stations: Sequence[Station]) -> Sequence[Station]:
+    return (*stations,)
+
+
+def order_by_signal(stations: Sequence[Station]) -> Sequence[Station]:
+    # The sort is stable, so stations in the same ensemble keep their file order.
+    return (*sorted(stations, key=signal_rank, reverse=True),)
+
+
+STATION_ORDERS: Mapping[StationOrderName, Callable[[Sequence[Station]], Sequence[Station]]] = {
+    "file": order_by_file,
+    "signal": order_by_signal,
+}
+
+
+def order_stations(
+    stations: Sequence[Station], *, station_order_name: StationOrderName, prune: bool
+) -> Sequence[Station]:
+    # Drop stations in ensembles that were not acquired by the scan, since they will never play.
+    if prune:
+        stations = [station for station in stations if station.quality is None or station.quality.acquired]
+    return STATION_ORDERS[station_order_name](stations)
+
+
+def read_stations_cache(cache_path: Path) -> StationsCache | None:
+    try:
+        data = cache_path.read_bytes()
+        if not data.startswith(CACHE_MAGIC):
+            raise ValueError("Invalid magic")
+        offset = len(CACHE_MAGIC)
+        mtime_ns, size, digest, count = CACHE_HEADER.unpack_from(data, offset)
+        offset += CACHE_HEADER.size
+        stations: list[Station] = []
+        for _ in range(count):
+            frequency_index, service_id, component_id, label_size = CACHE_STATION.unpack_from(data, offset)
+            offset += CACHE_STATION.size
+            label = data[offset : offset + label_size].decode()
+            offset += label_size
+            has_quality, rssi, snr, cnr, fic_quality, valid, acquired = CACHE_QUALITY.unpack_from(data, offset)
+            offset += CACHE_QUALITY.size
+            quality = SignalQuality(rssi, snr, cnr, fic_quality, valid, acquired) if has_quality else None
+            stations.append(Station(frequency_index, service_id, component_id, label, quality))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, struct.error) as ex:
+        logger.warning("Stations: Invalid cache: %s: %s", cache_path, ex)
+        return None
+    return StationsCache(mtime_ns=mtime_ns, size=size, digest=digest, stations=(*stations,))
+
+
+def write_stations_cache(cache_path: Path, cache: StationsCache) -> None:
+    chunks = [CACHE_MAGIC, CACHE_HEADER.pack(cache.mtime_ns, cache.size, cache.digest, len(cache.stations))]
+    for station in cache.stations:
+        label = station.label.encode()
+        chunks.append(CACHE_STATION.pack(station.frequency_index, station.service_id, station.component_id, len(label)))
+        chunks.append(label)
+        quality = station.quality or SignalQuality(0, 0, 0, 0, False, False)
+        chunks.append(
+            CACHE_QUALITY.pack(
+                station.quality is not None,
+                quality.rssi,
+                quality.snr,
+                quality.cnr,
+                quality.fic_quality,
+                quality.valid,
+                quality.acquired,
+            )
+        )
+    try:
+        write_atomic(cache_path, b"".join(chunks))
+    except OSError as ex:
+        logger.warning("Stations: Cache not written: %s: %s", cache_path, ex)
+    else:
+        logger.info("Stations: Cache written: %s", cache_path)
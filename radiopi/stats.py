@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+from bisect import bisect_left
+from collections.abc import Generator, Sequence
+from contextlib import contextmanager
+from functools import partial
+from math import inf
+from pathlib import Path
+from signal import SIGUSR1, Signals
+from threading import Lock
+from typing import Final
+
+from radiopi.atomic import write_atomic
+from radiopi.log import current_tuner, dumping_on_signal, log_contextmanager, logger
+
+# Histogram bucket upper bounds, in seconds.
+BUCKETS: Final[Sequence[float]] = (
+    0.001,
+    0.002,
+    0.005,
+    0.01,
+    0.02,
+    0.05,
+    0.1,
+    0.2,
+    0.5,
+    1.0,
+    2.0,
+    5.0,
+    10.0,
+    20.0,
+    50.0,
+    inf,
+)
+
+
+class Histogram:
+    def __init__(self) -> None:
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def to_json(self) -> dict[str, object]:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "max": self.max,
+            "buckets": {("+Inf" if bound == inf else str(bound)): count for bound, count in zip(BUCKETS, self.counts)},
+        }
+
+
+class Stats:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._histograms: dict[str, Histogram] = {}
+
+    def record(self, name: str, value: float) -> None:
+        # Keep each tuner's histograms apart.
+        tuner = current_tuner.get()
+        if tuner:
+            name = f"{tuner}: {name}"
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.record(value)
+
+    def to_json(self) -> dict[str, object]:
+        with self._lock:
+            return {name: histogram.to_json() for name, histogram in sorted(self._histograms.items())}
+
+    def dump(self, path: Path) -> None:
+        write_atomic(path, json.dumps(self.to_json(), indent=2).encode())
+        logger.info("Stats: Dumped: %s", path)
+
+
+stats: Final = Stats()
+
+
+@log_contextmanager(name="Stats")
+@contextmanager
+def dumping_stats(path: Path, *, signum: Signals = SIGUSR1) -> Generator[None, None, None]:
+    with dumping_on_signal(partial(stats.dump, path), signum=signum):
+        yield
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import json
+import logging
+import sys
+from argparse import ArgumentParser
+from collections.abc import Callable, Generator, Mapping
+from contextlib import contextmanager
+from random import Random
+from threading import Barrier, Thread
+from time import perf_counter, sleep
+from typing import Final
+
+from radiopi.benchmark import Results, percentile, running_mock
+from radiopi.log import logger
+from radiopi.radio import Radio, State, radio_pause_args, radio_tune_args
+
+STRESS_TIMEOUT: Final = 10.0
+
+OPERATIONS: Final[Mapping[str, Callable[[Radio, Random], None]]] = {
+    "toggle_play": lambda radio, random: radio.toggle_play(),
+    "next_station": lambda radio, random: radio.next_station(),
+    "prev_station": lambda radio, random: radio.prev_station(),
+    "retune": lambda radio, random: radio.retune(random.randrange(len(radio.state.stations))),
+}
+
+
+class StressObserver(logging.Handler):
+    # Observe commands and LED values through the log, like the tests do.
+    def __init__(self) -> None:
+        super().__init__(logging.DEBUG)
+        self.last_command = ""
+        self.led_values: dict[str, float] = {}
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # Other records can have no args, or a mapping, so only read the args of observed messages.
+        if record.msg == "Runner: %s":
+            assert isinstance(record.args, tuple)
+            self.last_command = str(record.args[0])
+        elif record.msg == "LED: %s: Value: %s":
+            assert isinstance(record.args, tuple)
+            name, value = record.args
+            self.led_values[str(name)] = float(str(value))
+
+    def commands_match(self, state: State) -> bool:
+        args = radio_tune_args(state.station) if state.playing else radio_pause_args()
+        return self.last_command == " ".join(args)
+
+    def leds_match(self, state: State) -> bool:
+        value = 1.0 if state.playing else 0.0
+        return bool(self.led_values) and all(led_value == value for led_value in self.led_values.values())
+
+
+@contextmanager
+def observing() -> Generator[StressObserver, None, None]:
+    observer = StressObserver()
+    prev_level = logger.level
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(observer)
+    try:
+        yield observer
+    finally:
+        logger.removeHandler(observer)
+        logger.setLevel(prev_level)
+
+
+def wait_until(predicate: Callable[[], bool], *, timeout: float) -> bool:
+    deadline = perf_counter() + timeout
+    while not predicate():
+        if perf_counter() > deadline:
+            return False
+        sleep(0.01)
+    return True
+
+
+def run_threads(radio: Radio, *, threads: int, calls: int, seed: int, stop: bool) -> list[float]:
+    # Start all threads at once, so their calls interleave.
+    barrier = Barrier(threads)
+    latencies: list[list[float]] = [[] for _ in range(threads)]
+
+    def run(thread_index: int) -> None:
+        random = Random(seed + thread_index)
+        operations = list(OPERATIONS.values())
+        barrier.wait()
+        for n in range(calls):
+            operation = random.choice(operations)
+            started = perf_counter()
+            # Possibly stop half way through.
+            if stop and n == calls // 2:
+                radio.stop()
+            else:
+                operation(radio, random)
+            latencies[thread_index].append(perf_counter() - started)
+
+    workers = [Thread(target=run, args=(thread_index,)) for thread_index in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return [latency for thread_latencies in latencies for latency in thread_latencies]
+
+
+def run_stress(*, threads: int, calls: int, seed: int = 0, timeout: float = STRESS_TIMEOUT) -> Results:
+    with observing() as observer:
+        with running_mock() as radio:
+            # Fire interleaved calls from many threads.
+            started = perf_counter()
+            latencies = run_threads(radio, threads=threads, calls=calls, seed=seed, stop=False)
+            elapsed = perf_counter() - started
+            # The last command and the LEDs catch up with the final state.
+            settle_started = perf_counter()
+            commands_match = wait_until(lambda: observer.commands_match(radio.state), timeout=timeout)
+            leds_match = wait_until(lambda: observer.leds_match(radio.state), timeout=timeout)
+            settle_time = perf_counter() - settle_started
+            # Stop the radio in the middle of more interleaved calls. Zombie watchers raise on exit.
+            run_threads(radio, threads=threads, calls=calls, seed=seed + threads, stop=True)
+        # The radio pauses on stop, and the LEDs fade out.
+        stopped_state = radio.state
+    return {
+        "calls": len(latencies),
+        "calls_per_second": len(latencies) / elapsed,
+        "call_latency_p50": percentile(latencies, 0.5),
+        "call_latency_p99": percentile(latencies, 0.99),
+        "call_latency_max": max(latencies),
+        "settle_time": settle_time,
+        "commands_match": commands_match,
+        "leds_match": leds_match,
+        "stopped_commands_match": observer.commands_match(stopped_state),
+        "stopped_leds_match": observer.leds_match(stopped_state),
+    }
+
+
+def main() -> None:  # pragma: no cover
+    # Parse args.
+    parser = ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    # Run stress test.
+    results = run_stress(threads=args.threads, calls=args.calls, seed=args.seed)
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write("\n")
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Generator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from contextvars import ContextVar, Token
+from itertools import count
+from pathlib import Path
+from threading import get_ident
+from time import perf_counter
+from typing import Any, Final
+
+from radiopi.atomic import write_atomic
+from radiopi.log import current_tuner, log_contextmanager, logger
+
+# Keep this many of the most recent spans.
+TRACE_CAPACITY: Final = 100_000
+
+# The trace ID of the state change being handled, so nested spans can join its trace.
+current_trace_id: ContextVar[int] = ContextVar("current_trace_id", default=0)
+
+NULL_SPAN: Final[AbstractContextManager[None]] = nullcontext()
+
+
+class Span:
+    __slots__ = ("_name", "_started", "_token", "_trace_id", "_tracer", "_tuner")
+
+    def __init__(self, tracer: Tracer, name: str, trace_id: int, tuner: str) -> None:
+        self._tracer = tracer
+        self._name = name
+        self._trace_id = trace_id
+        self._tuner = tuner
+
+    def __enter__(self) -> None:
+        self._token: Token[int] = current_trace_id.set(self._trace_id)
+        self._started = perf_counter()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._tracer.record(self._name, self._trace_id, self._tuner, self._started, perf_counter() - self._started)
+        current_trace_id.reset(self._token)
+
+
+class Tracer:
+    def __init__(self, capacity: int = TRACE_CAPACITY) -> None:
+        self.enabled = False
+        self.capacity = capacity
+        self._trace_ids = count(1)
+        self._indexes = count()
+        self._recorded = 0
+        # Preallocate the buffer, so recording a span never allocates.
+        self._names = [""] * capacity
+        self._span_trace_ids = [0] * capacity
+        self._tuners = [""] * capacity
+        self._starts = [0.0] * capacity
+        self._durations = [0.0] * capacity
+        self._thread_ids = [0] * capacity
+
+    def next_trace_id(self) -> int:
+        return next(self._trace_ids) if self.enabled else 0
+
+    def span(self, name: str, trace_id: int | None = None) -> AbstractContextManager[None]:
+        # Tracing is off by default, so spans cost one attribute check.
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, current_trace_id.get() if trace_id is None else trace_id, current_tuner.get())
+
+    def record(self, name: str, trace_id: int, tuner: str, started: float, duration: float) -> None:
+        # Counting is atomic, so each thread gets its own slot. Old spans are overwritten when the buffer is full.
+        index = next(self._indexes)
+        slot = index % self.capacity
+        self._names[slot] = name
+        self._span_trace_ids[slot] = trace_id
+        self._tuners[slot] = tuner
+        self._starts[slot] = started
+        self._durations[slot] = duration
+        self._thread_ids[slot] = get_ident()
+        self._recorded = max(self._recorded, index + 1)
+
+    def to_json(self) -> dict[str, Any]:
+        # Export as Chrome trace-event JSON, which Perfetto and chrome://tracing can load.
+        pid = os.getpid()
+        recorded = self._recorded
+        events = [
+            {
+                "name": self._names[slot],
+                "cat": "radiopi",
+                "ph": "X",
+                "ts": self._starts[slot] * 1_000_000,
+                "dur": self._durations[slot] * 1_000_000,
+                "pid": pid,
+                "tid": self._thread_ids[slot],
+                "args": {"trace_id": self._span_trace_ids[slot], "tuner": self._tuners[slot]},
+            }
+            for slot in (index % self.capacity for index in range(max(0, recorded - self.capacity), recorded))
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump(self, path: Path) -> None:
+        write_atomic(path, json.dumps(self.to_json()).encode())
+        logger.info("Trace: Dumped: %s", path)
+
+
+tracer: Final = Tracer()
+
+
+@log_contextmanager(name="Trace")
+@contextmanager
+def tracing(path: Path) -> Generator[None, None, None]:
+    tracer.enabled = True
+    try:
+        yield
+    finally:
+        tracer.enabled = False
+        tracer.dump(path)
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+from collections import Counter
+from collections.abc import Collection, Hashable, Iterator, Sequence
+from pathlib import Path
+from threading import Event
+from typing import Final, NamedTuple, Optional
+
+from radiopi.runner import Args, Runner
+from radiopi.station import StationCatalogue
+
+
+class PinMap(NamedTuple):
+    toggle_play_button: int = 21
+    next_station_button: int = 16
+    prev_station_button: int = 12
+    # Enclosures with several tuners only need one shutdown button.
+    shutdown_button: Optional[int] = 26
+    play_led: int = 13
+    next_station_led: int = 6
+    prev_station_led: int = 5
+
+
+DEFAULT_PIN_MAP: Final = PinMap()
+
+
+@dataclasses.dataclass(frozen=True)
+class TunerConfig:
+    # Prefixed to the tuner's log lines, stats and spans. A single tuner needs no name.
+    name: str = ""
+    pins: PinMap = DEFAULT_PIN_MAP
+    # Extra `radio_cli` args, selecting the tuner device.
+    device_args: Args = ()
+    # Station labels, selected from the shared station catalogue. None means all stations.
+    stations: Optional[Sequence[str]] = None
+    control_address: Optional[str] = None
+    state_path: Optional[Path] = None
+
+
+def load_tuners(path: Path) -> Sequence[TunerConfig]:
+    tuners = tuple(
+        TunerConfig(
+            name=str(data.get("name", f"Tuner {index}")),
+            pins=PinMap(**data.get("pins", {})),
+            device_args=tuple(map(str, data.get("device_args", ()))),
+            stations=None if data.get("stations") is None else tuple(map(str, data["stations"])),
+            control_address=data.get("control_address"),
+            state_path=None if data.get("state_path") is None else Path(data["state_path"]),
+        )
+        for index, data in enumerate(json.loads(path.read_bytes()))
+    )
+    # Tuners share one machine, so reject anything two tuners would fight over.
+    check_unique("name", [tuner.name for tuner in tuners])
+    check_unique("pin", [pin for tuner in tuners for pin in tuner.pins if pin is not None])
+    check_unique("state_path", [tuner.state_path for tuner in tuners if tuner.state_path is not None])
+    check_unique("control_address", [tuner.control_address for tuner in tuners if tuner.control_address is not None])
+    return tuners
+
+
+def check_unique(name: str, values: Collection[Hashable]) -> None:
+    duplicates = [str(value) for value, count in Counter(values).items() if count > 1]
+    if duplicates:
+        raise ValueError(f"Duplicate {name}: {', '.join(duplicates)}")
+
+
+def check_stations(tuners: Sequence[TunerConfig], catalogue: StationCatalogue) -> None:
+    for tuner in tuners:
+        for label in tuner.stations or ():
+            try:
+                catalogue.index_by_label(label)
+            except KeyError:
+                raise ValueError(f"{tuner.name}: Unknown station: {label}") from None
+
+
+def tuner_stations(catalogue: StationCatalogue, labels: Sequence[str] | None) -> StationCatalogue:
+    # Select from the shared catalogue, so tuners share the parsed stations.
+    if labels is None:
+        return catalogue
+    return StationCatalogue(catalogue[catalogue.index_by_label(label)] for label in labels)
+
+
+class DeviceRunner(Runner):
+    def __init__(self, runner: Runner, device_args: Args) -> None:
+        self._runner = runner
+        self.device_args = device_args
+
+    def _call(self, args: Args, *, preempt: Event | None, timeout: float | None) -> None:
+        self._runner._call(self._device(args), preempt=preempt, timeout=timeout)
+
+    def _stream(self, args: Args, *, timeout: float | None) -> Iterator[str]:
+        return self._runner._stream(self._device(args), timeout=timeout)
+
+    def _device(self, args: Args) -> Args:
+        # Only tuner commands select a device.
+        if args[:1] == ("radio_cli",):
+            return (args[0], *self.device_args, *args[1:])
+        return args
+
+    def close(self) -> None:
+        self._runner.close()
@@ -2,17 +2,30 @@ from __future__ import annotations
 
 from collections.abc import Generator
 from contextlib import contextmanager
+from pathlib import Path
 
 from radiopi import running as running_
 from radiopi.radio import Radio
 
 
 @contextmanager
-def running() -> Generator[Radio, None, None]:
+def running(
+    *,
+    standby_timeout: float | None = None,
+    stats_path: Path | None = None,
+    control_address: str | None = None,
+    state_path: Path | None = None,
+) -> Generator[Radio, None, None]:
     with running_(
         duration=0.0,
         led_controller_name="mock",
         pin_factory_name="mock",
         runner_name="mock",
+        station_order_name="file",
+        prune_stations=False,
+        standby_timeout=standby_timeout,
+        stats_path=stats_path,
+        control_address=control_address,
+        state_path=state_path,
     ) as radio:
         yield radio
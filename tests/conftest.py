@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from radiopi import station
+
+
+@pytest.fixture(autouse=True)
+def stations_cache_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    # Compile the stations cache into the test directory, not next to the packaged stations file.
+    cache_path = tmp_path / ".stations.cache"
+    monkeypatch.setattr(station, "STATIONS_CACHE_PATH", cache_path)
+    return cache_path
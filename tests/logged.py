@@ -1,11 +1,76 @@
 from __future__ import annotations
 
+from pathlib import Path
+
 from logot import Logged, logged
 
-from radiopi.radio import radio_boot_args, radio_pause_args, radio_tune_args
+from radiopi.radio import radio_boot_args, radio_mute_args, radio_pause_args, radio_tune_args
 from radiopi.runner import Args
 from radiopi.station import Station
 
+# Context helpers.
+
+
+def context_starting(name: str) -> Logged:
+    return logged.info(f"{name}: Starting")
+
+
+def context_started(name: str) -> Logged:
+    return logged.info(f"{name}: Started in %ss")
+
+
+# Control helpers.
+
+
+def control_invalid_line() -> Logged:
+    return logged.warning("Control: Invalid line: %s")
+
+
+# Daemon helpers.
+
+
+def daemon_failed(name: str) -> Logged:
+    return logged.error(f"{name}: Failed")
+
+
+# Persist helpers.
+
+
+def persist_saved() -> Logged:
+    return logged.info("Persist: Saved: %s")
+
+
+def persist_invalid(path: Path) -> Logged:
+    return logged.warning(f"Persist: Invalid state: {path}: %s")
+
+
+def persist_not_saved(path: Path) -> Logged:
+    return logged.warning(f"Persist: State not saved: {path}: %s")
+
+
+def persist_station_not_found() -> Logged:
+    return logged.warning("Persist: Station not found: %s")
+
+
+# Profile helpers.
+
+
+def profile_startup() -> Logged:
+    return logged.info("Profile: Startup in %ss")
+
+
+def profile_import(module_name: str) -> Logged:
+    return logged.info(f"Profile: Import: {module_name}: %ss")
+
+
+def profile_run(module_name: str) -> Logged:
+    return logged.info(f"Profile: Run: {module_name}: %ss")
+
+
+def profile_import_time(module_name: str) -> Logged:
+    return logged.info(f"Profile: Import time: {module_name}: %ss")
+
+
 # Runner helpers.
 
 
@@ -13,6 +78,18 @@ def runner_call(args: Args) -> Logged:
     return logged.info(f"Runner: {' '.join(args)}")
 
 
+def runner_skipped(args: Args) -> Logged:
+    return logged.info(f"Runner: Skipped: {' '.join(args)}")
+
+
+def runner_dropped(args: Args) -> Logged:
+    return logged.info(f"Runner: Dropped: {' '.join(args)}")
+
+
+def runner_burst(skipped: int, commands: int) -> Logged:
+    return logged.info(f"Runner: Burst: Skipped {skipped} of {commands} commands")
+
+
 # LED helpers.
 
 
@@ -39,16 +116,73 @@ def radio_tune(station: Station) -> Logged:
     return runner_call(radio_tune_args(station))
 
 
+def radio_mute() -> Logged:
+    return runner_call(radio_mute_args())
+
+
 def radio_pause() -> Logged:
     return runner_call(radio_pause_args())
 
 
+def radio_booted() -> Logged:
+    return radio_boot() >> logged.info("Radio: Booted")
+
+
+def radio_tuned(station: Station) -> Logged:
+    return radio_tune(station) >> logged.info(f"Radio: Tuned: {station!r}")
+
+
+def radio_muted() -> Logged:
+    return radio_mute() >> logged.info("Radio: Muted")
+
+
+def radio_paused() -> Logged:
+    return radio_pause() >> logged.info("Radio: Paused")
+
+
+def radio_mute_preempted() -> Logged:
+    return runner_dropped(radio_mute_args()) >> logged.info("Radio: Mute preempted")
+
+
+def radio_pause_preempted() -> Logged:
+    return runner_dropped(radio_pause_args()) >> logged.info("Radio: Pause preempted")
+
+
+def radio_boot_timeout() -> Logged:
+    return radio_boot() >> logged.warning("Radio: Boot timed out")
+
+
+def radio_tune_timeout(station: Station) -> Logged:
+    return radio_tune(station) >> logged.warning(f"Radio: Tune timed out: {station!r}")
+
+
+def radio_retry(delay: float) -> Logged:
+    return logged.info(f"Radio: Retrying in {delay}s")
+
+
+def radio_mute_timeout() -> Logged:
+    return radio_mute() >> logged.warning("Radio: Mute timed out")
+
+
+def radio_pause_timeout() -> Logged:
+    return radio_pause() >> logged.warning("Radio: Pause timed out")
+
+
 # UX helpers.
 
 
 def ux_tune(station: Station) -> Logged:
     return (
-        (radio_boot() >> radio_tune(station))
+        (radio_booted() >> radio_tuned(station))
+        & led_fade("Play", 0.0, 1.0)
+        & led_fade("Next station", 0.0, 1.0)
+        & led_fade("Prev station", 0.0, 1.0)
+    )
+
+
+def ux_resume(station: Station) -> Logged:
+    return (
+        radio_tuned(station)
         & led_fade("Play", 0.0, 1.0)
         & led_fade("Next station", 0.0, 1.0)
         & led_fade("Prev station", 0.0, 1.0)
@@ -57,7 +191,7 @@ def ux_tune(station: Station) -> Logged:
 
 def ux_retune(station: Station) -> Logged:
     return (
-        radio_tune(station)
+        radio_tuned(station)
         & led_pulse("Play", 1.0, 0.0)
         & led_pulse("Next station", 1.0, 0.0)
         & led_pulse("Prev station", 1.0, 0.0)
@@ -65,16 +199,34 @@ def ux_retune(station: Station) -> Logged:
 
 
 def ux_next_station(station: Station) -> Logged:
-    return radio_tune(station) & led_pulse("Play", 1.0, 0.0) & led_pulse("Next station", 1.0, 0.0)
+    return radio_tuned(station) & led_pulse("Play", 1.0, 0.0) & led_pulse("Next station", 1.0, 0.0)
 
 
 def ux_prev_station(station: Station) -> Logged:
-    return radio_tune(station) & led_pulse("Play", 1.0, 0.0) & led_pulse("Prev station", 1.0, 0.0)
+    return radio_tuned(station) & led_pulse("Play", 1.0, 0.0) & led_pulse("Prev station", 1.0, 0.0)
 
 
 def ux_pause() -> Logged:
     return (
-        radio_pause()
+        radio_paused()
+        & led_fade("Play", 1.0, 0.0)
+        & led_fade("Next station", 1.0, 0.0)
+        & led_fade("Prev station", 1.0, 0.0)
+    )
+
+
+def ux_standby() -> Logged:
+    return (
+        radio_muted()
+        & led_fade("Play", 1.0, 0.0)
+        & led_fade("Next station", 1.0, 0.0)
+        & led_fade("Prev station", 1.0, 0.0)
+    )
+
+
+def ux_standby_pause() -> Logged:
+    return (
+        (radio_muted() >> radio_paused())
         & led_fade("Play", 1.0, 0.0)
         & led_fade("Next station", 1.0, 0.0)
         & led_fade("Prev station", 1.0, 0.0)
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from radiopi.benchmark import benchmark_spawn, percentile, run_benchmarks
+
+# Enough to exercise the ballast, without the cost of the real one.
+TEST_BALLAST = 1024 * 1024
+
+
+def test_percentile() -> None:
+    assert percentile([3.0, 1.0, 2.0], 0.5) == 2.0
+    assert percentile([3.0, 1.0, 2.0], 0.99) == 3.0
+
+
+def test_run_benchmarks() -> None:
+    results = run_benchmarks(transitions=10, repeats=2, ballast=TEST_BALLAST)
+    assert list(results) == [
+        "transitions",
+        "led_frames",
+        "running",
+        "stations",
+        "scan",
+        "spawn_helper",
+        "spawn",
+        "spawn_ballast",
+        "subprocess",
+    ]
+    assert results["transitions"]["handled"] >= 10
+    assert results["led_frames"]["frames"] == 31
+    assert results["running"]["startup_max"] >= results["running"]["startup_p50"]
+    assert results["spawn_ballast"]["ballast"] == TEST_BALLAST
+
+
+def test_benchmark_spawn() -> None:
+    results = benchmark_spawn(runner_name="spawn", repeats=3, ballast=TEST_BALLAST)
+    assert set(results) == {"ballast", "latency_p50", "latency_p99", "cpu_p50", "cpu_p99"}
+    assert results["ballast"] == TEST_BALLAST
+    assert results["latency_p99"] >= results["latency_p50"] >= 0.0
+    assert results["cpu_p99"] >= results["cpu_p50"] >= 0.0
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from time import perf_counter, sleep
+
+from radiopi.buttons import Scroller, create_buttons, scroller_daemon
+from radiopi.pin_factory import create_pin_factory
+from radiopi.radio import Radio, State
+from radiopi.runner import MockRunner
+from radiopi.station import StationCatalogue, load_stations
+
+
+def create_radio() -> Radio:
+    return Radio(State(playing=True, station_index=0, stations=StationCatalogue(load_stations()), stopping=False))
+
+
+def wait_until_settled(radio: Radio) -> None:
+    while radio.state.scroll_index is not None:
+        sleep(0.01)
+
+
+def test_scroller_accelerates() -> None:
+    radio = create_radio()
+    scroller = Scroller(radio, interval=0.1, min_interval=0.01, acceleration=0.5)
+    with scroller_daemon(scroller):
+        started = perf_counter()
+        scroller.hold(1)
+        while (radio.state.scroll_index or 0) < 20:
+            sleep(0.001)
+        elapsed = perf_counter() - started
+        # The station does not change until the button is released.
+        assert radio.state.station_index == 0
+        scroller.release(1)
+        wait_until_settled(radio)
+        scroller.stop()
+    # Accelerating is much faster than scrolling at the initial interval.
+    assert radio.state.station_index >= 20
+    assert elapsed < 0.1 * 20 / 2
+
+
+def test_scroller_stop_while_held() -> None:
+    radio = create_radio()
+    scroller = Scroller(radio, interval=0.01)
+    with scroller_daemon(scroller):
+        scroller.hold(-1)
+        while radio.state.scroll_index is None:
+            sleep(0.001)
+        scroller.stop()
+    # Stopping abandons the scroll selection, without tuning to it.
+    assert radio.state.scroll_index is not None
+    assert radio.state.station_index == 0
+
+
+def test_scroller_tap() -> None:
+    radio = create_radio()
+    scroller = Scroller(radio)
+    # Taps step once on release.
+    scroller.release(1)
+    scroller.release(1)
+    scroller.release(-1)
+    assert radio.state.station_index == 1
+    assert radio.state.scroll_index is None
+
+
+def test_scroller_hold_other_button() -> None:
+    radio = create_radio()
+    scroller = Scroller(radio, interval=0.01)
+    with scroller_daemon(scroller):
+        scroller.hold(1)
+        scroller.hold(-1)
+        # Releasing the first button neither taps nor stops the second button's scroll.
+        scroller.release(1)
+        while (radio.state.scroll_index or 0) >= 0:
+            sleep(0.001)
+        assert radio.state.station_index == 0
+        scroller.release(-1)
+        wait_until_settled(radio)
+        scroller.stop()
+    assert radio.state.station_index < 0
+
+
+def test_buttons_tap() -> None:
+    radio = create_radio()
+    with (
+        create_pin_factory("mock") as pin_factory,
+        create_buttons(pin_factory=pin_factory, radio=radio, runner=MockRunner()),
+    ):
+        pin = pin_factory.pin(16)  # type: ignore[attr-defined]
+        # Pressing doesn't tune until the button is released.
+        pin.drive_low()
+        assert radio.state.station_index == 0
+        pin.drive_high()
+        assert radio.state.station_index == 1
+
+
+def test_buttons_hold_to_scroll() -> None:
+    radio = create_radio()
+    with (
+        create_pin_factory("mock") as pin_factory,
+        create_buttons(pin_factory=pin_factory, radio=radio, runner=MockRunner()),
+    ):
+        pin = pin_factory.pin(16)  # type: ignore[attr-defined]
+        # Press and hold next station, until scrolling starts.
+        pin.drive_low()
+        while radio.state.scroll_index is None:
+            sleep(0.01)
+        pin.drive_high()
+        wait_until_settled(radio)
+    # Only the scroll moved on, since a hold doesn't tune on press.
+    assert radio.state.station_index >= 1
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import closing
+from threading import Event, Thread
+from time import sleep
+
+import pytest
+from logot import Logged, Logot
+
+from radiopi.compact import UNKNOWN, CompactingRunner, TunerState
+from radiopi.radio import (
+    Backoff,
+    Radio,
+    State,
+    radio_boot_args,
+    radio_mute_args,
+    radio_pause_args,
+    radio_tune_args,
+    radio_watcher,
+)
+from radiopi.runner import Args, Preempted, Runner
+from radiopi.station import StationCatalogue, load_stations
+from radiopi.stress import wait_until
+from tests import logged
+
+
+class RecordingRunner(Runner):
+    def __init__(self, *fail_args: Args) -> None:
+        self.fail_args = list(fail_args)
+        self.calls: list[Args] = []
+
+    def _call(self, args: Args, *, preempt: Event | None, timeout: float | None) -> None:
+        # Fail each of the given commands once.
+        if args in self.fail_args:
+            self.fail_args.remove(args)
+            raise Preempted(args)
+        self.calls.append(args)
+
+    def _stream(self, args: Args, *, timeout: float | None) -> Iterator[str]:
+        self.calls.append(args)
+        return iter(())
+
+
+def test_compacting_runner(logot: Logot) -> None:
+    stations = load_stations()
+    commands = (
+        radio_pause_args(),
+        radio_pause_args(),
+        radio_boot_args(),
+        radio_boot_args(),
+        radio_tune_args(stations[0]),
+        radio_tune_args(stations[0]),
+        radio_mute_args(),
+        radio_mute_args(),
+        radio_tune_args(stations[0]),
+        radio_tune_args(stations[1]),
+        radio_pause_args(),
+    )
+    recording_runner = RecordingRunner()
+    with closing(CompactingRunner(recording_runner)) as runner:
+        for args in commands:
+            runner(args)
+        assert runner.tuner_state == TunerState(booted=False, tuned=None, muted=False)
+    # Only commands with an effect were run.
+    assert recording_runner.calls == [
+        radio_pause_args(),
+        radio_boot_args(),
+        radio_tune_args(stations[0]),
+        radio_mute_args(),
+        radio_tune_args(stations[0]),
+        radio_tune_args(stations[1]),
+        radio_pause_args(),
+    ]
+    logot.assert_logged(
+        logged.runner_skipped(radio_pause_args())
+        >> logged.runner_skipped(radio_boot_args())
+        >> logged.runner_skipped(radio_tune_args(stations[0]))
+        >> logged.runner_skipped(radio_mute_args())
+        >> logged.runner_burst(4, 11)
+    )
+
+
+def test_compacting_runner_burst(logot: Logot) -> None:
+    with closing(CompactingRunner(RecordingRunner(), burst_interval=0.0)) as runner:
+        runner(radio_boot_args())
+        runner(radio_boot_args())
+    logot.assert_logged(logged.runner_burst(0, 1) >> logged.runner_burst(1, 1))
+
+
+def test_compacting_runner_burst_ended(logot: Logot) -> None:
+    with closing(CompactingRunner(RecordingRunner(), burst_interval=0.05)) as runner:
+        runner(radio_boot_args())
+        runner(radio_boot_args())
+        # The burst is reported once it ends, without waiting for another command.
+        logot.wait_for(logged.runner_burst(1, 2))
+
+
+class BlockingRunner(RecordingRunner):
+    def __init__(self, blocking_args: Args) -> None:
+        super().__init__()
+        self.blocking_args = blocking_args
+        self.blocked = Event()
+        self.unblock = Event()
+
+    def _call(self, args: Args, *, preempt: Event | None, timeout: float | None) -> None:
+        if args == self.blocking_args:
+            self.blocked.set()
+            self.unblock.wait()
+        super()._call(args, preempt=preempt, timeout=timeout)
+
+
+def test_compacting_runner_concurrent() -> None:
+    recording_runner = BlockingRunner(radio_boot_args())
+    with closing(CompactingRunner(recording_runner)) as runner:
+        booting = Thread(target=runner, args=(radio_boot_args(),))
+        booting.start()
+        recording_runner.blocked.wait()
+        # Commands are not queued behind a slow boot.
+        runner(("poweroff", "-h"))
+        assert recording_runner.calls == [("poweroff", "-h")]
+        recording_runner.unblock.set()
+        booting.join()
+    assert recording_runner.calls == [("poweroff", "-h"), radio_boot_args()]
+
+
+def test_compacting_runner_unknown_command() -> None:
+    recording_runner = RecordingRunner()
+    with closing(CompactingRunner(recording_runner)) as runner:
+        runner(radio_boot_args())
+        runner(("true",))
+        assert runner.tuner_state == UNKNOWN
+        runner(radio_boot_args())
+        runner(("radio_cli", "--status"))
+        runner(("radio_cli", "--status"))
+    assert recording_runner.calls == [
+        radio_boot_args(),
+        ("true",),
+        radio_boot_args(),
+        ("radio_cli", "--status"),
+        ("radio_cli", "--status"),
+    ]
+
+
+def test_compacting_runner_stream() -> None:
+    recording_runner = RecordingRunner()
+    with closing(CompactingRunner(recording_runner)) as runner:
+        runner(radio_boot_args())
+        assert list(runner.stream(("radio_cli", "--scan"))) == []
+        assert runner.tuner_state == UNKNOWN
+
+
+def test_compacting_runner_tune_failed() -> None:
+    station = load_stations()[0]
+    recording_runner = RecordingRunner(radio_tune_args(station))
+    with closing(CompactingRunner(recording_runner)) as runner:
+        runner(radio_boot_args())
+        with pytest.raises(Preempted):
+            runner(radio_tune_args(station))
+        # The tuner is still booted, but untuned.
+        assert runner.tuner_state == TunerState(booted=True, tuned=None, muted=False)
+        runner(radio_tune_args(station))
+    assert recording_runner.calls == [radio_boot_args(), radio_tune_args(station)]
+
+
+def test_compacting_runner_pause_failed() -> None:
+    recording_runner = RecordingRunner(radio_pause_args())
+    with closing(CompactingRunner(recording_runner)) as runner:
+        runner(radio_boot_args())
+        with pytest.raises(Preempted):
+            runner(radio_pause_args())
+        assert runner.tuner_state == UNKNOWN
+        runner(radio_boot_args())
+    assert recording_runner.calls == [radio_boot_args(), radio_boot_args()]
+
+
+@pytest.mark.parametrize(
+    ("standby_timeout", "preempted"),
+    ((None, logged.radio_pause_preempted()), (60.0, logged.radio_mute_preempted())),
+)
+def test_compacting_runner_pause_then_play(logot: Logot, standby_timeout: float | None, preempted: Logged) -> None:
+    stations = StationCatalogue(load_stations())
+    radio = Radio(State(playing=False, station_index=0, stations=stations, stopping=False))
+    recording_runner = RecordingRunner()
+    with closing(CompactingRunner(recording_runner)) as runner:
+        with radio_watcher(radio, runner=runner, backoff=Backoff(), standby_timeout=standby_timeout):
+            radio.play()
+            assert wait_until(lambda: len(recording_runner.calls) == 2, timeout=5.0)
+            # Playing again within the hold drops the pause, and skips the boot and tune.
+            radio.pause()
+            sleep(0.05)
+            radio.play()
+            logot.wait_for(preempted >> logged.runner_skipped(radio_tune_args(stations[0])))
+            assert recording_runner.calls == [radio_boot_args(), radio_tune_args(stations[0])]
+            radio.stop()
+    assert recording_runner.calls == [radio_boot_args(), radio_tune_args(stations[0]), radio_pause_args()]
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from time import perf_counter, sleep
+from typing import ClassVar
+
+import pytest
+
+from radiopi.benchmark import percentile
+from radiopi.compositor import blend, create_compositor
+from radiopi.curves import fade, pulse
+from radiopi.led_controller import MockLEDController
+from radiopi.pin_factory import PinFactory
+
+
+class RecordingLEDController(MockLEDController):
+    transition_duration: ClassVar[float] = 0.2
+    frame_rate: ClassVar[float] = 200.0
+    render_delay: ClassVar[float] = 0.0
+
+    def __init__(self) -> None:
+        super().__init__(0, name="Recording", pin_factory=PinFactory(None))
+        self.frames: list[tuple[float, float]] = []
+
+    def _set_value(self, value: float) -> None:
+        self.frames.append((perf_counter(), value))
+        sleep(self.render_delay)
+
+
+class SlowLEDController(RecordingLEDController):
+    frame_rate: ClassVar[float] = 1000.0
+    render_delay: ClassVar[float] = 0.005
+
+
+def test_blend() -> None:
+    assert blend(None, [0.0, 1.0]) == [0.0, 1.0]
+    assert blend(0.5, [1.0]) == [1.0]
+    assert blend(0.5, [0.0, 0.0, 0.0]) == pytest.approx([0.5, 0.25, 0.0])
+
+
+def test_compositor_frame_jitter() -> None:
+    led = RecordingLEDController()
+    with create_compositor(led_controller_cls=RecordingLEDController) as compositor:
+        compositor.animate(fade(0.0, 1.0, steps=compositor.transition_steps), led)
+    # All frames are rendered at a fixed frame rate.
+    assert [value for _, value in led.frames] == pytest.approx(fade(0.0, 1.0, steps=40))
+    intervals = [b - a for (a, _), (b, _) in zip(led.frames, led.frames[1:])]
+    assert percentile(intervals, 0.5) == pytest.approx(compositor.frame_interval, abs=0.002)
+
+
+def test_compositor_dropped_frames() -> None:
+    led = SlowLEDController()
+    with create_compositor(led_controller_cls=SlowLEDController) as compositor:
+        compositor.animate(fade(0.0, 1.0, steps=10), led)
+    # If rendering falls behind, the compositor skips waiting rather than rushing to catch up.
+    assert [value for _, value in led.frames] == pytest.approx(fade(0.0, 1.0, steps=10))
+
+
+def test_compositor_preempt() -> None:
+    led = RecordingLEDController()
+    with create_compositor(led_controller_cls=RecordingLEDController) as compositor:
+        compositor.animate(fade(0.0, 1.0, steps=200), led)
+        sleep(0.1)
+        preempted_at = perf_counter()
+        compositor.animate(pulse(1.0, 0.0, steps=4), led)
+    # The new animation replaced the running fade, blending from its current value.
+    values = [value for _, value in led.frames]
+    assert values[-10:] == pytest.approx(blend(values[-11], pulse(1.0, 0.0, steps=4)))
+    assert led.frames[-1][0] - preempted_at < 0.2
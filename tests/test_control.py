@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+from socket import AF_UNIX, SOCK_STREAM, socket
+from time import perf_counter
+from typing import Any
+
+import pytest
+from logot import Logot
+
+from radiopi.control import bind_control_socket, create_control_server
+from radiopi.radio import Radio, State, playing
+from radiopi.station import StationCatalogue, load_stations
+from tests import logged, running
+
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, data: Any) -> Any:
+    writer.write(json.dumps(data).encode() + b"\n")
+    return json.loads(await reader.readline())
+
+
+async def control(address: str, *requests: Any) -> list[Any]:
+    reader, writer = await asyncio.open_unix_connection(address)
+    try:
+        return [await request(reader, writer, data) for data in requests]
+    finally:
+        writer.close()
+
+
+def test_control_commands(tmp_path: Path, logot: Logot) -> None:
+    address = str(tmp_path / "radiopi.sock")
+    with running(control_address=address) as radio:
+        logot.wait_for(logged.ux_tune(radio.state.stations[0]))
+        responses = asyncio.run(
+            control(
+                address,
+                {"command": "next"},
+                {"command": "prev"},
+                {"command": "retune", "station_index": 3},
+                {"command": "pause"},
+                {"command": "play"},
+                {"command": "retune"},
+                {"command": "missing"},
+            )
+        )
+        assert responses[:5] == [{"ok": True}] * 5
+        assert "error" in responses[5]
+        assert "error" in responses[6]
+        logot.wait_for(logged.radio_tune(radio.state.stations[3]))
+    # The socket is removed on stop.
+    assert not Path(address).exists()
+
+
+def test_control_stale_socket(tmp_path: Path) -> None:
+    address = str(tmp_path / "radiopi.sock")
+    with socket(AF_UNIX, SOCK_STREAM) as stale_sock:
+        stale_sock.bind(address)
+    radio = Radio(State(playing=False, station_index=0, stations=StationCatalogue(load_stations()), stopping=False))
+    # A stale socket is replaced.
+    with create_control_server(radio, address=address), playing(radio):
+        assert asyncio.run(control(address, {"command": "pause"})) == [{"ok": True}]
+    assert not Path(address).exists()
+
+
+def test_control_not_socket(tmp_path: Path) -> None:
+    path = tmp_path / "radiopi.conf"
+    path.write_text("keep me")
+    # A file that isn't a socket is never deleted.
+    with pytest.raises(OSError):
+        bind_control_socket(str(path))
+    assert path.read_text() == "keep me"
+
+
+async def send_long_line(address: str) -> list[Any]:
+    reader, writer = await asyncio.open_unix_connection(address)
+    try:
+        writer.write(b"x" * 100_000 + b"\n")
+        # The client gets an error, then is disconnected.
+        return [json.loads(line) for line in [await reader.readline(), await reader.readline()] if line]
+    finally:
+        writer.close()
+
+
+def test_control_line_too_long(tmp_path: Path, logot: Logot) -> None:
+    address = str(tmp_path / "radiopi.sock")
+    radio = Radio(State(playing=False, station_index=0, stations=StationCatalogue(load_stations()), stopping=False))
+    with create_control_server(radio, address=address), playing(radio):
+        (response,) = asyncio.run(send_long_line(address))
+        assert "error" in response
+        logot.wait_for(logged.control_invalid_line())
+        # The server still serves other clients.
+        assert asyncio.run(control(address, {"command": "pause"})) == [{"ok": True}]
+
+
+async def subscribe(address: str, *, until: int, ready: asyncio.Semaphore) -> list[Any]:
+    reader, writer = await asyncio.open_unix_connection(address)
+    try:
+        writer.write(b'{"command": "subscribe"}\n')
+        states = [json.loads(await reader.readline())]
+        ready.release()
+        while states[-1]["station_index"] != until:
+            states.append(json.loads(await reader.readline()))
+        return states
+    finally:
+        writer.close()
+
+
+async def load_subscribers(radio: Radio, address: str, *, subscribers: int, transitions: int) -> list[float]:
+    ready = asyncio.Semaphore(0)
+    tasks = [asyncio.ensure_future(subscribe(address, until=transitions, ready=ready)) for _ in range(subscribers)]
+    # Wait for all subscribers to connect and receive the initial state.
+    for _ in range(subscribers):
+        await asyncio.wait_for(ready.acquire(), timeout=10.0)
+    # Change station, timing the button path.
+    latencies: list[float] = []
+    for _ in range(transitions):
+        started = perf_counter()
+        radio.next_station()
+        latencies.append(perf_counter() - started)
+        await asyncio.sleep(0.001)
+    results = await asyncio.wait_for(asyncio.gather(*tasks), timeout=10.0)
+    # All subscribers see the final state.
+    assert all(states[-1]["station_index"] == transitions for states in results)
+    return latencies
+
+
+def test_control_load(tmp_path: Path) -> None:
+    address = str(tmp_path / "radiopi.sock")
+    radio = Radio(State(playing=True, station_index=0, stations=StationCatalogue(load_stations()), stopping=False))
+    with create_control_server(radio, address=address), playing(radio):
+        latencies = asyncio.run(load_subscribers(radio, address, subscribers=300, transitions=50))
+    # Hundreds of subscribers do not slow down the button path.
+    assert max(latencies) < 0.01
+
+
+def test_control_tcp() -> None:
+    radio = Radio(State(playing=True, station_index=0, stations=StationCatalogue(load_stations()), stopping=False))
+    with create_control_server(radio, address="0") as sock, playing(radio):
+        host, port = sock.getsockname()
+
+        async def next_station() -> Any:
+            reader, writer = await asyncio.open_connection(host, port)
+            try:
+                return await request(reader, writer, {"command": "next"})
+            finally:
+                writer.close()
+
+        assert asyncio.run(next_station()) == {"ok": True}
+        assert radio.state.station_index == 1
+
+
+def test_control_subscribe_until_stop(tmp_path: Path) -> None:
+    address = str(tmp_path / "radiopi.sock")
+    radio = Radio(State(playing=True, station_index=0, stations=StationCatalogue(load_stations()), stopping=False))
+
+    async def subscribe_until_stop() -> list[Any]:
+        reader, writer = await asyncio.open_unix_connection(address)
+        try:
+            writer.write(b'{"command": "subscribe"}\n')
+            states = [json.loads(await reader.readline())]
+            radio.stop()
+            # The final state is delivered before the server closes the connection.
+            async for line in reader:
+                states.append(json.loads(line))
+            return states
+        finally:
+            writer.close()
+
+    with create_control_server(radio, address=address), playing(radio):
+        states = asyncio.run(subscribe_until_stop())
+    assert states[0]["stopping"] is False
+    assert states[-1]["stopping"] is True
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import pytest
+
+from radiopi.curves import EASINGS, EasingName, easing_table, fade, pulse
+
+
+def test_fade() -> None:
+    assert fade(0.0, 1.0, steps=5) == pytest.approx((0.0, 0.2, 0.4, 0.6, 0.8, 1.0))
+
+
+def test_pulse() -> None:
+    assert pulse(0.0, 1.0, steps=5) == pytest.approx((0.0, 0.2, 0.4, 0.6, 0.8, 1.0, 1.0, 0.8, 0.6, 0.4, 0.2, 0.0))
+
+
+def test_fade_cached() -> None:
+    assert fade(0.0, 1.0, steps=5) is fade(0.0, 1.0, steps=5)
+
+
+@pytest.mark.parametrize("easing_name", EASINGS)
+def test_easing_table(easing_name: EasingName) -> None:
+    table = easing_table(easing_name, 10)
+    assert table[0] == 0.0
+    assert table[-1] == 1.0
+    assert list(table) == sorted(table)
+
+
+def test_fade_ease_in_out() -> None:
+    assert fade(0.0, 1.0, steps=4, easing_name="ease-in-out") == pytest.approx(
+        (0.0, 0.146447, 0.5, 0.853553, 1.0), abs=1e-6
+    )
+
+
+def test_fade_gamma() -> None:
+    assert fade(1.0, 0.0, steps=4, gamma=2.0) == pytest.approx((1.0, 0.5625, 0.25, 0.0625, 0.0))
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from contextlib import ExitStack
+from threading import Event, current_thread
+from time import perf_counter
+
+import pytest
+from logot import Logot
+
+from radiopi.daemon import Deadline, daemon, sharing_deadline
+from radiopi.log import current_tuner, naming_tuner
+from tests import logged
+
+
+@daemon(name="Test")
+def thread_daemon(threads: list[str], idents: list[int | None]) -> None:
+    threads.append(current_thread().name)
+    idents.append(current_thread().ident)
+
+
+@daemon(name="Tuner")
+def tuner_daemon(tuners: list[str]) -> None:
+    tuners.append(current_tuner.get())
+
+
+@daemon(name="Stuck")
+def stuck_daemon(release: Event) -> None:
+    release.wait()
+
+
+def test_daemon_reuses_threads() -> None:
+    threads: list[str] = []
+    idents: list[int | None] = []
+    for _ in range(3):
+        with thread_daemon(threads, idents):
+            pass
+    assert threads == ["Test", "Test", "Test"]
+    assert len(set(idents)) == 1
+
+
+def test_daemon_context() -> None:
+    tuners: list[str] = []
+    with naming_tuner("Kitchen"), tuner_daemon(tuners):
+        pass
+    with tuner_daemon(tuners):
+        pass
+    # Daemons run in the context they were started in, even on a reused thread.
+    assert tuners == ["Kitchen", ""]
+
+
+def test_daemon_shared_deadline() -> None:
+    release = Event()
+    started = perf_counter()
+    try:
+        with pytest.raises(RuntimeError, match="Stuck: Zombie"):
+            with ExitStack() as stack:
+                stack.enter_context(sharing_deadline(0.1))
+                for _ in range(3):
+                    stack.enter_context(stuck_daemon(release))
+        # All daemons share one deadline, rather than waiting in turn.
+        assert perf_counter() - started < 0.2
+    finally:
+        release.set()
+
+
+def test_deadline() -> None:
+    deadline = Deadline(1.0)
+    assert deadline.remaining() == 1.0
+    deadline.start()
+    assert 0.0 < deadline.remaining() <= 1.0
+
+
+@daemon(name="Failing")
+def failing_daemon() -> None:
+    raise ValueError("Boom!")
+
+
+def test_daemon_failing(logot: Logot) -> None:
+    with failing_daemon():
+        logot.wait_for(logged.daemon_failed("Failing"))
+    # The worker survives the failure, so it can be reused.
+    threads: list[str] = []
+    idents: list[int | None] = []
+    with thread_daemon(threads, idents):
+        pass
+    assert threads == ["Test"]
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import logging
+
+import pytest
+from logot import Logot
+
+from radiopi.led_controller import (
+    LED_CONTROLLERS,
+    LEDController,
+    LEDControllerName,
+    MockLEDController,
+    resolve_led_controller,
+)
+from radiopi.pin_factory import PinFactory
+from tests import logged
+
+
+def test_set_value(logot: Logot) -> None:
+    led = MockLEDController(0, name="Play", pin_factory=PinFactory(None))
+    led.set_value(0.5)
+    logot.assert_logged(logged.led_value("Play", 0.5))
+
+
+def test_set_values(logot: Logot) -> None:
+    play_led = MockLEDController(0, name="Play", pin_factory=PinFactory(None))
+    next_station_led = MockLEDController(1, name="Next station", pin_factory=PinFactory(None))
+    LEDController.set_values({play_led: 0.5, next_station_led: 1.0})
+    logot.assert_logged(logged.led_value("Play", 0.5) >> logged.led_value("Next station", 1.0))
+
+
+def test_set_values_no_debug(logot: Logot) -> None:
+    led = MockLEDController(0, name="Play", pin_factory=PinFactory(None))
+    logger = logging.getLogger("radiopi")
+    logger.setLevel(logging.INFO)
+    try:
+        LEDController.set_values({led: 0.5})
+    finally:
+        logger.setLevel(logging.NOTSET)
+    logot.assert_not_logged(logged.led_value("Play", 0.5))
+
+
+@pytest.mark.parametrize("led_controller_name", LED_CONTROLLERS)
+def test_resolve_led_controller(led_controller_name: LEDControllerName) -> None:
+    assert issubclass(resolve_led_controller(led_controller_name), LEDController)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Generator
+from contextlib import ExitStack, contextmanager
+from io import StringIO
+from pathlib import Path
+from signal import SIGUSR2
+
+from radiopi.log import RateLimitFilter, dumping_log, log_contextmanager, logger, logging_pipeline, naming_tuner
+from radiopi.stress import wait_until
+
+
+def test_logging_pipeline() -> None:
+    stream = StringIO()
+    with logging_pipeline(stream=stream, capacity=2) as ring_buffer:
+        for n in range(3):
+            logger.info("Test: %s", n)
+        logger.debug("Test: Debug")
+    # All queued records are written on exit.
+    assert stream.getvalue() == "[INFO] Test: 0\n[INFO] Test: 1\n[INFO] Test: 2\n"
+    # Only the most recent records are kept in memory.
+    assert list(ring_buffer.lines) == ["[INFO] Test: 1", "[INFO] Test: 2"]
+
+
+def test_logging_pipeline_tuner() -> None:
+    stream = StringIO()
+    with logging_pipeline(stream=stream):
+        with naming_tuner("Kitchen"):
+            logger.info("Test: Tuner")
+            # An explicit tuner wins.
+            logger.info("Test: Other tuner", extra={"tuner": "Bedroom"})
+        logger.info("Test: No tuner")
+    assert (
+        stream.getvalue() == "[INFO] Kitchen: Test: Tuner\n[INFO] Bedroom: Test: Other tuner\n[INFO] Test: No tuner\n"
+    )
+
+
+@log_contextmanager(name="Test")
+@contextmanager
+def tuner_context() -> Generator[None, None, None]:
+    yield
+
+
+def test_log_contextmanager_tuner() -> None:
+    stream = StringIO()
+    with logging_pipeline(stream=stream), ExitStack() as stack:
+        with naming_tuner("Kitchen"):
+            stack.enter_context(tuner_context())
+    # Contexts stopped outside their tuner still log under it.
+    assert [line.split(" in ")[0] for line in stream.getvalue().splitlines()] == [
+        "[INFO] Kitchen: Test: Starting",
+        "[INFO] Kitchen: Test: Started",
+        "[INFO] Kitchen: Test: Stopping",
+        "[INFO] Kitchen: Test: Stopped",
+    ]
+
+
+def test_logging_pipeline_rate_limit() -> None:
+    stream = StringIO()
+    rate_limit_filter = RateLimitFilter(limit=2, interval=60.0)
+    with logging_pipeline(stream=stream, rate_limit_filter=rate_limit_filter):
+        for n in range(5):
+            logger.info("Test: Frame: %s", n)
+        logger.info("Test: Other")
+    assert stream.getvalue() == "[INFO] Test: Frame: 0\n[INFO] Test: Frame: 1\n[INFO] Test: Other\n"
+    assert rate_limit_filter.suppressed == 3
+
+
+def test_logging_pipeline_rate_limit_interval() -> None:
+    stream = StringIO()
+    with logging_pipeline(stream=stream, rate_limit_filter=RateLimitFilter(limit=1, interval=0.0)):
+        for n in range(3):
+            logger.info("Test: Frame: %s", n)
+    assert stream.getvalue().count("Test: Frame") == 3
+
+
+def test_dumping_log(tmp_path: Path) -> None:
+    path = tmp_path / "log.txt"
+    with logging_pipeline(stream=StringIO()) as ring_buffer:
+        with dumping_log(ring_buffer, path):
+            logger.info("Test: Dumped")
+            # Wait for the record to be written, then dump the log on demand with a signal.
+            assert wait_until(
+                lambda: bool(ring_buffer.lines) and ring_buffer.lines[-1] == "[INFO] Test: Dumped", timeout=5.0
+            )
+            os.kill(os.getpid(), SIGUSR2)
+            assert wait_until(path.exists, timeout=5.0)
+            assert path.read_text().endswith("[INFO] Test: Dumped\n")
+            path.unlink()
+    # The log is dumped on stop.
+    assert "[INFO] Test: Dumped\n" in path.read_text()
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from collections.abc import Generator
+from contextlib import contextmanager
+from pathlib import Path
+from time import perf_counter, sleep
+
+import pytest
+from logot import Logot
+
+import radiopi
+from radiopi.persist import SavedState, load_state, persist_daemon, restore_state, save_state, saved_state
+from radiopi.radio import Radio, State
+from radiopi.station import StationCatalogue, load_stations, station_key
+from tests import logged, running
+
+
+def create_state() -> State:
+    return State(playing=True, station_index=0, stations=StationCatalogue(load_stations()), stopping=False)
+
+
+def test_save_load_state(tmp_path: Path) -> None:
+    path = tmp_path / "state.json"
+    assert load_state(path) is None
+    saved = SavedState(playing=False, station_key=(18, 52672, 1))
+    save_state(path, saved)
+    assert load_state(path) == saved
+
+
+def test_load_state_invalid(tmp_path: Path, logot: Logot) -> None:
+    path = tmp_path / "state.json"
+    path.write_text("{}")
+    assert load_state(path) is None
+    logot.assert_logged(logged.persist_invalid(path))
+
+
+def test_save_state_error(tmp_path: Path, logot: Logot) -> None:
+    path = tmp_path / "missing" / "state.json"
+    save_state(path, SavedState(playing=False, station_key=(18, 52672, 1)))
+    logot.assert_logged(logged.persist_not_saved(path))
+
+
+def test_restore_state_reordered() -> None:
+    state = create_state()
+    station = state.stations[5]
+    # The station is found by identity, even if the stations are reordered.
+    reordered = StationCatalogue(reversed(state.stations))
+    restored = restore_state(
+        State(playing=False, station_index=0, stations=reordered, stopping=False),
+        SavedState(playing=True, station_key=station_key(station)),
+    )
+    assert restored.station == station
+
+
+def test_restore_state_missing(logot: Logot) -> None:
+    state = create_state()
+    assert restore_state(state, SavedState(playing=True, station_key=(-1, -1, -1))) is state
+    logot.assert_logged(logged.persist_station_not_found())
+
+
+def test_persist_debounced(tmp_path: Path, logot: Logot) -> None:
+    path = tmp_path / "state.json"
+    radio = Radio(create_state())
+    with persist_daemon(radio, path=path, saved=saved_state(radio.state), save_delay=0.2):
+        # A burst of changes is saved once.
+        for _ in range(10):
+            radio.next_station()
+            sleep(0.01)
+        logot.wait_for(logged.persist_saved())
+        # The radio pauses on stop, but the state from before the stop is kept.
+        radio.stop()
+    logot.assert_not_logged(logged.persist_saved())
+    assert load_state(path) == SavedState(playing=True, station_key=station_key(radio.state.stations[10]))
+
+
+def test_persist_on_stop(tmp_path: Path) -> None:
+    path = tmp_path / "state.json"
+    radio = Radio(create_state())
+    with persist_daemon(radio, path=path, saved=saved_state(radio.state), save_delay=60.0):
+        radio.pause()
+        sleep(0.1)
+        radio.stop()
+    # Pending changes are saved immediately on stop.
+    assert load_state(path) == SavedState(playing=False, station_key=station_key(radio.state.stations[0]))
+
+
+def test_running_restore(tmp_path: Path, logot: Logot) -> None:
+    path = tmp_path / "state.json"
+    stations = create_state().stations
+    save_state(path, SavedState(playing=True, station_key=station_key(stations[3])))
+    # The radio boots straight to the saved station.
+    with running(state_path=path):
+        logot.wait_for(logged.ux_tune(stations[3]))
+    logot.assert_not_logged(logged.radio_tune(stations[0]))
+
+
+def test_running_restore_paused(tmp_path: Path, logot: Logot) -> None:
+    path = tmp_path / "state.json"
+    stations = create_state().stations
+    save_state(path, SavedState(playing=False, station_key=station_key(stations[3])))
+    # The radio stays paused, and does not boot.
+    with running(state_path=path) as radio:
+        assert radio.state.station_index == 3
+        assert not radio.state.playing
+    logot.assert_not_logged(logged.radio_boot())
+
+
+@contextmanager
+def failing_pin_factory(pin_factory_name: str) -> Generator[None, None, None]:
+    raise RuntimeError("No GPIO")
+    yield
+
+
+def test_running_startup_failure(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(radiopi, "create_pin_factory", failing_pin_factory)
+    started = perf_counter()
+    # The original error is raised, without waiting for the persist daemon and radio watcher to time out.
+    with pytest.raises(RuntimeError, match="No GPIO"):
+        with running(state_path=tmp_path / "state.json"):
+            pass  # pragma: no cover
+    assert perf_counter() - started < 5.0
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from importlib import import_module
+from pathlib import Path
+
+import pytest
+from logot import Logot
+
+from radiopi.profiling import profile_imports, profiling_startup
+from tests import logged
+
+
+def busy() -> None:
+    for _ in range(100_000):
+        pass
+
+
+def test_profiling_startup(logot: Logot, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "profiled.py").write_text("VALUE = 1\n")
+    monkeypatch.syspath_prepend(tmp_path)
+    with profiling_startup(limit=1, package=None):
+        busy()
+        import_module("profiled")
+    logot.assert_logged(logged.profile_startup() >> logged.profile_import("profiled") >> logged.profile_run(__name__))
+    logot.assert_not_logged(logged.profile_import_time("radiopi"))
+
+
+def test_profiling_startup_package(logot: Logot) -> None:
+    # The package's own import cost is reported, even though it's already imported.
+    with profiling_startup(limit=1):
+        pass
+    logot.assert_logged(logged.profile_startup() >> logged.profile_import_time("radiopi"))
+
+
+def test_profile_imports() -> None:
+    import_durations = dict(profile_imports("radiopi"))
+    # Submodules imported eagerly by the package are included.
+    assert import_durations["radiopi"] >= import_durations["radiopi.radio"] > 0.0
+
+
+def test_import_is_lazy() -> None:
+    # Check in a fresh interpreter, since the tests have already imported everything.
+    output = subprocess.check_output(
+        (sys.executable, "-c", "import json, sys, radiopi; print(json.dumps(sorted(sys.modules)))"), text=True
+    )
+    modules = set(json.loads(output))
+    assert "radiopi" in modules
+    assert not modules & {"asyncio", "gpiozero", "radiopi.control", "radiopi.asyncio_runner"}
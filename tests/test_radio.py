@@ -1,7 +1,27 @@
 from __future__ import annotations
 
+from subprocess import TimeoutExpired
+from threading import Event
+from time import perf_counter, sleep
+
+import pytest
 from logot import Logot
 
+from radiopi.radio import (
+    Backoff,
+    Radio,
+    Snapshot,
+    State,
+    Subscription,
+    SubscriptionPolicyName,
+    radio_boot_args,
+    radio_mute_args,
+    radio_pause_args,
+    radio_tune_args,
+    radio_watcher,
+)
+from radiopi.runner import Args, Preempted, Runner
+from radiopi.station import StationCatalogue, load_stations
 from tests import logged, running
 
 
@@ -17,10 +37,289 @@ def test_running_pause_on_stop(logot: Logot) -> None:
 def test_running_pause_on_stop_already_paused(logot: Logot) -> None:
     with running() as radio:
         # On start, the radio will boot and tune.
-        logot.wait_for(logged.radio_boot())
-        logot.wait_for(logged.radio_tune(radio.state.stations[0]))
+        logot.wait_for(logged.radio_booted())
+        logot.wait_for(logged.radio_tuned(radio.state.stations[0]))
         # Pause the radio.
         radio.pause()
-        logot.wait_for(logged.radio_pause())
+        logot.wait_for(logged.radio_paused())
     # On stop, since the radio is already paused, nothing needs to be done.
     logot.assert_not_logged(logged.radio_pause())
+
+
+def test_running_boot_first(logot: Logot) -> None:
+    with running() as radio:
+        # The radio starts booting before the rest of the hardware is initialised.
+        logot.wait_for(
+            (
+                logged.context_started("Radio")
+                >> logged.context_starting("Pin factory")
+                >> logged.context_started("Main")
+            )
+            & (logged.radio_boot() >> logged.radio_tune(radio.state.stations[0]))
+        )
+
+
+class SlowRunner(Runner):
+    def __init__(self, *, delay: float) -> None:
+        self.delay = delay
+        self.calls: list[tuple[Args, float]] = []
+
+    def _call(self, args: Args, *, preempt: Event | None, timeout: float | None) -> None:
+        # Simulate a slow command, which can be preempted.
+        if preempt is None:
+            sleep(self.delay)
+        elif preempt.wait(self.delay):
+            raise Preempted(args)
+        self.calls.append((args, perf_counter()))
+
+
+@pytest.mark.parametrize("queued", (1, 3, 6))
+def test_preempted_tune_latency(queued: int) -> None:
+    stations = StationCatalogue(load_stations())
+    radio = Radio(State(playing=True, station_index=0, stations=stations, stopping=False))
+    runner = SlowRunner(delay=0.3)
+    with radio_watcher(radio, runner=runner, backoff=Backoff()):
+        # Start a tune, then keep pressing next station while it's in flight.
+        for _ in range(queued):
+            radio.next_station()
+            sleep(0.1)
+        pressed_at = perf_counter()
+        radio.next_station()
+        # Wait for the final tune.
+        final_tune_args = radio_tune_args(stations[queued + 1])
+        while not any(args == final_tune_args for args, _ in runner.calls):
+            sleep(0.01)
+        radio.stop()
+    # Only the final station was tuned, and it didn't wait for the queued tunes.
+    tuned_at = next(called_at for args, called_at in runner.calls if args == final_tune_args)
+    assert [args for args, _ in runner.calls] == [final_tune_args, radio_pause_args()]
+    assert tuned_at - pressed_at < 0.45
+
+
+def test_scroll_tunes_on_settle() -> None:
+    stations = StationCatalogue(load_stations())
+    radio = Radio(State(playing=True, station_index=0, stations=stations, stopping=False))
+    runner = SlowRunner(delay=0.0)
+    with radio_watcher(radio, runner=runner, backoff=Backoff()):
+        for _ in range(5):
+            radio.scroll(1)
+            sleep(0.01)
+        radio.settle()
+        while len(runner.calls) < 1:
+            sleep(0.01)
+        radio.stop()
+    # Only the settled station was tuned.
+    assert [args for args, _ in runner.calls] == [radio_tune_args(stations[5]), radio_pause_args()]
+
+
+def test_scroll_does_not_preempt_tune() -> None:
+    stations = StationCatalogue(load_stations())
+    radio = Radio(State(playing=False, station_index=0, stations=stations, stopping=False))
+    runner = SlowRunner(delay=0.2)
+    with radio_watcher(radio, runner=runner, backoff=Backoff()):
+        # Start scrolling while the first tune is in flight.
+        radio.play()
+        sleep(0.3)
+        radio.scroll(1)
+        while len(runner.calls) < 2:
+            sleep(0.01)
+        radio.stop()
+    # The tune completed, since scrolling does not supersede the tuner state.
+    assert [args for args, _ in runner.calls] == [radio_boot_args(), radio_tune_args(stations[0]), radio_pause_args()]
+
+
+class TimeoutRunner(Runner):
+    def __init__(self, *timeout_args: Args) -> None:
+        self.timeout_args = list(timeout_args)
+
+    def _call(self, args: Args, *, preempt: Event | None, timeout: float | None) -> None:
+        assert timeout is not None
+        # Time out each of the given commands once.
+        if args in self.timeout_args:
+            self.timeout_args.remove(args)
+            raise TimeoutExpired(args, timeout)
+
+
+def test_boot_timeout(logot: Logot) -> None:
+    stations = StationCatalogue(load_stations())
+    radio = Radio(State(playing=False, station_index=0, stations=stations, stopping=False))
+    with radio_watcher(radio, runner=TimeoutRunner(radio_boot_args()), backoff=Backoff(delay=0.01)):
+        radio.play()
+        # The boot is retried before tuning.
+        logot.wait_for(
+            logged.radio_boot_timeout()
+            >> logged.radio_retry(0.01)
+            >> logged.radio_boot()
+            >> logged.radio_tune(stations[0])
+        )
+        radio.stop()
+    logot.assert_logged(logged.radio_pause())
+
+
+def test_tune_timeout(logot: Logot) -> None:
+    stations = StationCatalogue(load_stations())
+    radio = Radio(State(playing=True, station_index=0, stations=stations, stopping=False))
+    runner = TimeoutRunner(*(radio_tune_args(stations[1]),) * 3)
+    with radio_watcher(radio, runner=runner, backoff=Backoff(delay=0.01)):
+        radio.next_station()
+        # The tune is retried, backing off further after each timeout.
+        logot.wait_for(
+            logged.radio_tune_timeout(stations[1])
+            >> logged.radio_retry(0.01)
+            >> logged.radio_tune_timeout(stations[1])
+            >> logged.radio_retry(0.02)
+            >> logged.radio_tune_timeout(stations[1])
+            >> logged.radio_retry(0.04)
+            >> logged.radio_tune(stations[1])
+        )
+        radio.stop()
+
+
+def test_tune_timeout_superseded(logot: Logot) -> None:
+    stations = StationCatalogue(load_stations())
+    radio = Radio(State(playing=True, station_index=0, stations=stations, stopping=False))
+    with radio_watcher(radio, runner=TimeoutRunner(radio_tune_args(stations[1])), backoff=Backoff(delay=30.0)):
+        radio.next_station()
+        logot.wait_for(logged.radio_tune_timeout(stations[1]) >> logged.radio_retry(30.0))
+        # A newer state is handled without waiting for the backoff.
+        radio.next_station()
+        logot.wait_for(logged.radio_tune(stations[2]))
+        radio.stop()
+
+
+def test_backoff() -> None:
+    backoff = Backoff(delay=1.0, max_delay=3.0)
+    assert [backoff.failed() for _ in range(4)] == [1.0, 2.0, 3.0, 3.0]
+    # Success resets the delay.
+    backoff.succeeded()
+    assert backoff.failed() == 1.0
+
+
+def test_pause_timeout(logot: Logot) -> None:
+    stations = StationCatalogue(load_stations())
+    radio = Radio(State(playing=True, station_index=0, stations=stations, stopping=False))
+    with radio_watcher(radio, runner=TimeoutRunner(radio_pause_args()), backoff=Backoff()):
+        radio.stop()
+    logot.assert_logged(logged.radio_pause_timeout())
+
+
+def test_mute_timeout(logot: Logot) -> None:
+    stations = StationCatalogue(load_stations())
+    radio = Radio(State(playing=True, station_index=0, stations=stations, stopping=False))
+    with radio_watcher(radio, runner=TimeoutRunner(radio_mute_args()), backoff=Backoff(), standby_timeout=60.0):
+        radio.pause()
+        # If the radio can't be muted, it's shut down instead.
+        logot.wait_for(logged.radio_mute_timeout() >> logged.radio_pause())
+        radio.stop()
+
+
+def drain(subscription: Subscription) -> list[int]:
+    versions: list[int] = []
+    while (snapshot := subscription.get(timeout=0.0)) is not None:
+        versions.append(snapshot.version)
+    return versions
+
+
+@pytest.mark.parametrize(
+    ("policy", "expected"),
+    (
+        ("latest", [3]),
+        ("all", [0, 1, 2, 3]),
+        ("first-last", [0, 3]),
+    ),
+)
+def test_subscribe_policy(policy: SubscriptionPolicyName, expected: list[int]) -> None:
+    radio = Radio(State(playing=True, station_index=0, stations=StationCatalogue(load_stations()), stopping=False))
+    with radio.subscribe(policy=policy) as subscription:
+        for _ in range(3):
+            radio.next_station()
+        assert drain(subscription) == expected
+        assert subscription.dropped == 0
+
+
+def test_subscribe_maxsize() -> None:
+    radio = Radio(State(playing=True, station_index=0, stations=StationCatalogue(load_stations()), stopping=False))
+    with radio.subscribe(policy="all", maxsize=2) as subscription:
+        for _ in range(3):
+            radio.next_station()
+        assert drain(subscription) == [2, 3]
+        assert subscription.dropped == 2
+
+
+def test_subscribe_fields() -> None:
+    radio = Radio(State(playing=True, station_index=0, stations=StationCatalogue(load_stations()), stopping=False))
+    with radio.subscribe(policy="all", fields=("playing",)) as subscription:
+        # Station changes are not delivered.
+        radio.next_station()
+        radio.pause()
+        # Stopping is always delivered.
+        radio.stop()
+        radio.stop()
+        assert drain(subscription) == [0, 2, 3]
+
+
+def test_unsubscribe() -> None:
+    radio = Radio(State(playing=True, station_index=0, stations=StationCatalogue(load_stations()), stopping=False))
+    with radio.subscribe() as subscription:
+        assert drain(subscription) == [0]
+    # Unsubscribed subscriptions receive nothing.
+    radio.next_station()
+    assert subscription.get(timeout=0.0) is None
+
+
+@pytest.mark.parametrize("method_name", ("pause", "toggle_play", "stop"))
+def test_pause_abandons_scroll(method_name: str) -> None:
+    radio = Radio(State(playing=True, station_index=0, stations=StationCatalogue(load_stations()), stopping=False))
+    radio.scroll(1)
+    getattr(radio, method_name)()
+    # The scroll selection is cleared, so the LEDs fade out instead of showing it.
+    assert radio.state.scroll_index is None
+    assert radio.state.station_index == 0
+
+
+def test_settle_after_stop() -> None:
+    radio = Radio(State(playing=True, station_index=0, stations=StationCatalogue(load_stations()), stopping=False))
+    radio.scroll(1)
+    radio.stop()
+    # Settling a scroll that raced with a stop can't restart the radio.
+    radio.settle()
+    assert not radio.state.playing
+    assert radio.state.station_index == 0
+
+
+class PublishedEvent(Event):
+    def __init__(self) -> None:
+        super().__init__()
+        self.subscription: Subscription | None = None
+        self.published: list[Snapshot | None] = []
+
+    def set(self) -> None:
+        assert self.subscription is not None
+        self.published.append(self.subscription.get(timeout=0.0))
+        super().set()
+
+
+def test_superseded_after_publish() -> None:
+    superseded = PublishedEvent()
+    stations = StationCatalogue(load_stations())
+    radio = Radio(State(playing=True, station_index=0, stations=stations, stopping=False, superseded=superseded))
+    with radio.subscribe() as subscription:
+        drain(subscription)
+        superseded.subscription = subscription
+        radio.next_station()
+    # A watcher woken by the superseded event finds the new state.
+    (snapshot,) = superseded.published
+    assert snapshot is not None
+    assert snapshot.state.station_index == 1
+    assert superseded.is_set()
+
+
+def test_stop_is_final() -> None:
+    radio = Radio(State(playing=True, station_index=0, stations=StationCatalogue(load_stations()), stopping=False))
+    radio.stop()
+    # Calls racing with a stop can't restart the radio.
+    radio.next_station()
+    radio.toggle_play()
+    assert not radio.state.playing
+    assert radio.state.station_index == 0
+    assert radio.state.stopping
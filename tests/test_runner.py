@@ -1,11 +1,161 @@
 from __future__ import annotations
 
+import json
+import os
+from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from io import BytesIO
+from pathlib import Path
+from signal import SIGKILL
+from subprocess import CalledProcessError, TimeoutExpired
+from threading import Event, Timer
+
 import pytest
 
-from radiopi.runner import RUNNERS, RunnerName, create_runner
+from radiopi.runner import RUNNERS, Preempted, Runner, RunnerName, command_name, create_runner
+from radiopi.spawn_helper import serve
+from radiopi.spawn_runner import HelperSpawnRunner
+
+
+@pytest.fixture()
+def runner(request: pytest.FixtureRequest) -> Generator[Runner, None, None]:
+    with closing(create_runner(request.param)) as runner:
+        yield runner
 
 
 @pytest.mark.parametrize("runner_name", RUNNERS)
 def test_create_runner(runner_name: RunnerName) -> None:
-    runner = create_runner(runner_name)
-    runner(("true",))
+    with closing(create_runner(runner_name)) as runner:
+        runner(("true",))
+
+
+def test_command_name() -> None:
+    assert command_name(("radio_cli", "--level=0", "--play")) == "radio_cli --level --play"
+
+
+@pytest.mark.parametrize("runner", ("async", "preemptible", "spawn", "spawn-helper", "subprocess"), indirect=True)
+def test_runner_stream(runner: Runner) -> None:
+    assert list(runner.stream(("echo", "hello"))) == ["hello\n"]
+
+
+@pytest.mark.parametrize("runner", ("async", "preemptible", "spawn", "spawn-helper", "subprocess"), indirect=True)
+def test_runner_stream_error(runner: Runner) -> None:
+    with pytest.raises(CalledProcessError):
+        list(runner.stream(("false",)))
+
+
+@pytest.mark.parametrize("runner", ("async", "preemptible", "spawn", "spawn-helper", "subprocess"), indirect=True)
+def test_runner_stream_timeout(runner: Runner) -> None:
+    assert list(runner.stream(("echo", "hello"), timeout=5.0)) == ["hello\n"]
+    with pytest.raises(TimeoutExpired):
+        list(runner.stream(("sleep", "10"), timeout=0.1))
+
+
+@pytest.mark.parametrize("runner", ("mock",), indirect=True)
+def test_mock_runner_stream(runner: Runner) -> None:
+    assert list(runner.stream(("echo", "hello"))) == []
+
+
+@pytest.mark.parametrize("runner", ("async", "preemptible", "spawn", "spawn-helper", "subprocess"), indirect=True)
+def test_runner_error(runner: Runner) -> None:
+    with pytest.raises(CalledProcessError):
+        runner(("false",))
+
+
+@pytest.mark.parametrize("runner", ("async", "preemptible", "spawn", "spawn-helper", "subprocess"), indirect=True)
+def test_runner_timeout(runner: Runner) -> None:
+    runner(("true",), timeout=5.0)
+    with pytest.raises(TimeoutExpired):
+        runner(("sleep", "10"), timeout=0.1)
+
+
+@pytest.mark.parametrize("runner", ("async", "preemptible", "spawn", "spawn-helper"), indirect=True)
+def test_runner_not_preempted(runner: Runner) -> None:
+    runner(("true",), preempt=Event())
+
+
+@pytest.mark.parametrize("runner", ("async", "preemptible", "spawn", "spawn-helper"), indirect=True)
+def test_runner_preempted(runner: Runner) -> None:
+    preempt = Event()
+    timer = Timer(0.1, preempt.set)
+    timer.start()
+    try:
+        with pytest.raises(Preempted):
+            runner(("sleep", "10"), preempt=preempt)
+    finally:
+        timer.join()
+
+
+@pytest.mark.parametrize("runner", ("async", "preemptible", "spawn", "spawn-helper"), indirect=True)
+def test_runner_preempted_reaped(runner: Runner, tmp_path: Path) -> None:
+    pid_path = tmp_path / "pid"
+    preempt = Event()
+    timer = Timer(0.2, preempt.set)
+    timer.start()
+    try:
+        with pytest.raises(Preempted):
+            runner(("sh", "-c", f"echo $$ > {pid_path}; exec sleep 10"), preempt=preempt)
+    finally:
+        timer.join()
+    # The preempted process is reaped before the call returns, so it can't overlap the next command.
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pid_path.read_text()), 0)
+
+
+@pytest.mark.parametrize("runner", ("spawn", "spawn-helper", "subprocess"), indirect=True)
+def test_runner_not_found(runner: Runner) -> None:
+    with pytest.raises(FileNotFoundError):
+        runner(("radiopi-not-found",))
+
+
+def test_helper_spawn_runner_exited() -> None:
+    with closing(HelperSpawnRunner()) as runner:
+        runner._helper.kill()
+        runner._helper.wait()
+        with pytest.raises(RuntimeError):
+            runner(("true",))
+
+
+def test_helper_spawn_runner_exited_while_running() -> None:
+    with closing(HelperSpawnRunner()) as runner, pytest.raises(RuntimeError):
+        runner(("sh", "-c", "kill -9 $PPID"))
+
+
+def test_helper_spawn_runner_concurrent() -> None:
+    preempt = Event()
+    with closing(HelperSpawnRunner()) as runner, ThreadPoolExecutor() as executor:
+        sleeping = executor.submit(runner, ("sleep", "10"), preempt=preempt)
+        try:
+            # Other commands run while the first is still running.
+            executor.submit(runner, ("true",)).result(timeout=5.0)
+            assert not sleeping.done()
+        finally:
+            preempt.set()
+        with pytest.raises(Preempted):
+            sleeping.result()
+
+
+def test_spawn_helper() -> None:
+    requests = (
+        {"id": 0, "args": ["false"]},
+        {"id": 1, "args": ["radiopi-not-found"]},
+        {"id": 2, "args": ["sleep", "10"]},
+        {"id": 2, "signal": SIGKILL},
+        {"id": 3, "signal": SIGKILL},
+    )
+    read_fd, write_fd = os.pipe()
+    with open(write_fd, "w") as write_file:
+        write_file.writelines(f"{json.dumps(request)}\n" for request in requests)
+    responses = BytesIO()
+    try:
+        serve(read_fd, responses)
+    finally:
+        os.close(read_fd)
+    data = [json.loads(line) for line in responses.getvalue().splitlines()]
+    # Each command responds with its pid, then its return code. Signals for unknown commands are ignored.
+    assert [response["id"] for response in data if "pid" in response] == [0, 2]
+    assert {"id": 1, "errno": 2} in data
+    assert {"id": 0, "returncode": 1} in data
+    assert {"id": 2, "returncode": -SIGKILL} in data
+    assert len(data) == 5
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+from logot import Logot, logged
+
+from radiopi.runner import ReplayRunner
+from radiopi.scan import ScanParser, StationScan
+from radiopi.station import STATIONS_PATH, load_stations
+
+
+def test_scan_parser() -> None:
+    source = STATIONS_PATH.read_text()
+    parser = ScanParser()
+    ensembles: list[dict[str, Any]] = []
+    for offset in range(0, len(source), 64):
+        ensembles.extend(parser.feed(source[offset : offset + 64]))
+    assert ensembles == json.loads(source)["ensembleList"]
+    assert parser.source == source
+
+
+def test_scan_parser_empty() -> None:
+    parser = ScanParser()
+    assert parser.feed('{"ensembleList": [') == []
+    assert parser.feed("]}") == []
+
+
+def test_station_scan(tmp_path: Path, logot: Logot) -> None:
+    path = tmp_path / "stations.json"
+    scan = StationScan(ReplayRunner(STATIONS_PATH.read_text(), chunk_size=256))
+    assert scan.ensembles_per_second == 0.0
+    stations = scan.run(path)
+    # Partial results are logged as each ensemble completes.
+    logot.assert_logged(logged.info("Scan: Ensemble 0: 0 stations"))
+    logot.assert_logged(logged.info("Scan: Ensemble 18: 13 stations"))
+    # The scan matches the recorded stations.
+    assert stations == load_stations(cache=False)
+    assert scan.stations == list(stations)
+    assert scan.ensembles == 41
+    assert scan.ensembles_per_second > 0.0
+    assert path.read_bytes() == STATIONS_PATH.read_bytes()
+
+
+def test_station_scan_invalid(tmp_path: Path) -> None:
+    path = tmp_path / "stations.json"
+    scan = StationScan(ReplayRunner('{"ensembleList": [{"EnsembleNo": 0}'))
+    with pytest.raises(json.JSONDecodeError):
+        scan.run(path)
+    # Partial results are available, but the incomplete scan is not written.
+    assert scan.ensembles == 1
+    assert not path.exists()
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Sequence
+from functools import partial
+from math import inf
+from pathlib import Path
+from threading import Event
+
+import pytest
+
+from radiopi.radio import radio_boot_args, radio_mute_args, radio_pause_args, radio_tune_args
+from radiopi.simulate import ButtonEvent, VirtualClock, load_button_trace, random_button_trace, simulate
+from radiopi.station import StationCatalogue, load_stations
+
+
+@pytest.fixture()
+def stations() -> StationCatalogue:
+    return StationCatalogue(load_stations())
+
+
+def command_stream(report: dict[str, object]) -> Sequence[str]:
+    stream = report["command_stream"]
+    assert isinstance(stream, list)
+    return [command for _, command in stream]
+
+
+def test_virtual_clock() -> None:
+    clock = VirtualClock()
+    called: list[tuple[str, float]] = []
+    clock.call_at(2.0, lambda: called.append(("B", clock.now)))
+    clock.call_at(1.0, lambda: called.append(("A", clock.now)))
+    assert not clock.advance(1.5)
+    assert called == [("A", 1.0)]
+    assert clock.now == 1.5
+    # Waits are interrupted by events set in callbacks.
+    event = Event()
+    clock.call_later(1.0, event.set)
+    assert clock.wait(event, 10.0)
+    assert called == [("A", 1.0), ("B", 2.0)]
+    assert clock.now == 2.5
+    assert clock.wait(event, None)
+    # Waiting forever returns once nothing else can happen.
+    assert not clock.wait(Event(), None)
+    assert clock.now == 2.5
+
+
+def test_virtual_clock_tasks() -> None:
+    clock = VirtualClock()
+    event = Event()
+    called: list[tuple[str, float, bool]] = []
+
+    def wait(name: str, event: Event, timeout: float | None) -> bool:
+        result = clock.wait(event, timeout)
+        called.append((name, clock.now, result))
+        return result
+
+    def wait_for_event() -> None:
+        # Tasks resume as soon as their wait is over, without waiting for the timeout.
+        wait("A", event, 10.0)
+        # Waiting forever returns once nothing else can happen.
+        wait("B", Event(), None)
+
+    def set_event() -> None:
+        wait("C", Event(), 1.0)
+        event.set()
+
+    clock.spawn(wait_for_event, name="Wait")
+    clock.spawn(set_event, name="Set event")
+    assert not clock.advance(inf)
+    assert called == [("C", 1.0, False), ("A", 1.0, True), ("B", 1.0, False)]
+    assert clock.now == 1.0
+
+
+def test_virtual_clock_task_error() -> None:
+    clock = VirtualClock()
+    clock.spawn(partial(clock.wait_for, lambda: 1 / 0 > 0, 1.0), name="Error")
+    # Errors in tasks are raised by the clock.
+    with pytest.raises(ZeroDivisionError):
+        clock.advance(inf)
+
+
+def test_simulate_taps(stations: StationCatalogue) -> None:
+    trace = (
+        ButtonEvent(10.0, "next_station", True),
+        ButtonEvent(10.1, "next_station", False),
+        ButtonEvent(20.0, "prev_station", True),
+        ButtonEvent(20.1, "prev_station", False),
+        ButtonEvent(30.0, "toggle_play", True),
+        ButtonEvent(30.1, "toggle_play", False),
+    )
+    report = simulate(trace, stations=stations)
+    assert command_stream(report) == [
+        " ".join(radio_boot_args()),
+        " ".join(radio_tune_args(stations[0])),
+        " ".join(radio_tune_args(stations[1])),
+        " ".join(radio_tune_args(stations[0])),
+        " ".join(radio_pause_args()),
+    ]
+    assert report["latency_p50"] == pytest.approx(0.8)
+    assert report["latency_max"] == pytest.approx(2.8)
+    # The LEDs fade out when the radio pauses.
+    assert report["led_values"] == {"Play": 0.0, "Next station": 0.0, "Prev station": 0.0}
+
+
+def test_simulate_preempted_tunes(stations: StationCatalogue) -> None:
+    trace = [ButtonEvent(3.0 + n * 0.1, "next_station", n % 2 == 0) for n in range(6)]
+    report = simulate(trace, stations=stations)
+    # Tunes superseded while in flight are preempted. Only the last tune completes.
+    assert command_stream(report)[-2:] == [" ".join(radio_tune_args(stations[3])), " ".join(radio_pause_args())]
+    assert report["commands"] == {
+        "radio_cli --boot": 1,
+        "radio_cli --component --service --frequency --play --level": 4,
+        "radio_cli --shutdown": 1,
+    }
+
+
+def test_simulate_scroll(stations: StationCatalogue) -> None:
+    trace = (
+        ButtonEvent(10.0, "next_station", True),
+        # Holding another button settles the scroll selection, and scrolls the other way.
+        ButtonEvent(13.0, "prev_station", True),
+        ButtonEvent(14.0, "next_station", False),
+        ButtonEvent(15.0, "prev_station", False),
+    )
+    report = simulate(trace, stations=stations)
+    # Holds don't tune on press. Scrolling only tunes once it settles, when the other button takes over and when it's
+    # released.
+    assert report["commands"] == {
+        "radio_cli --boot": 1,
+        "radio_cli --component --service --frequency --play --level": 3,
+        "radio_cli --shutdown": 1,
+    }
+
+
+def test_simulate_scroll_timing(stations: StationCatalogue) -> None:
+    trace = (ButtonEvent(10.0, "next_station", True), ButtonEvent(10.6, "next_station", False))
+    report = simulate(trace, stations=stations)
+    # Scrolling starts as soon as the button is held, so releasing straight after tunes the next station.
+    assert report["command_stream"][-2:] == [
+        [pytest.approx(10.6), " ".join(radio_tune_args(stations[1]))],
+        [pytest.approx(15.6), " ".join(radio_pause_args())],
+    ]
+
+
+def test_simulate_standby(stations: StationCatalogue) -> None:
+    trace = (
+        ButtonEvent(10.0, "toggle_play", True),
+        ButtonEvent(10.1, "toggle_play", False),
+        ButtonEvent(20.0, "toggle_play", True),
+        ButtonEvent(20.1, "toggle_play", False),
+    )
+    report = simulate(trace, stations=stations, standby_timeout=30.0)
+    # Resuming within the standby timeout only retunes.
+    assert command_stream(report) == [
+        " ".join(radio_boot_args()),
+        " ".join(radio_tune_args(stations[0])),
+        " ".join(radio_mute_args()),
+        " ".join(radio_tune_args(stations[0])),
+        " ".join(radio_pause_args()),
+    ]
+
+
+def test_simulate_shutdown(stations: StationCatalogue) -> None:
+    trace = (ButtonEvent(10.0, "shutdown", True), ButtonEvent(12.0, "shutdown", False))
+    report = simulate(trace, stations=stations)
+    assert "poweroff -h" in command_stream(report)
+
+
+def test_simulate_boot_timeout(stations: StationCatalogue) -> None:
+    report = simulate((), stations=stations, latencies={"radio_cli --boot": 60.0})
+    assert command_stream(report) == [" ".join(radio_boot_args())]
+    assert report["duration"] == 30.0
+
+
+def test_load_button_trace(tmp_path: Path) -> None:
+    path = tmp_path / "trace.json"
+    path.write_text(json.dumps([[1, "next_station", 1], [1.5, "next_station", 0]]))
+    assert load_button_trace(path) == [
+        ButtonEvent(1.0, "next_station", True),
+        ButtonEvent(1.5, "next_station", False),
+    ]
+
+
+def test_random_button_trace(stations: StationCatalogue) -> None:
+    trace = random_button_trace(duration=3600.0, seed=1)
+    assert trace == random_button_trace(duration=3600.0, seed=1)
+    # An hour of usage replays every button event, and simulates the same command stream each time.
+    report = simulate(trace, stations=stations)
+    assert report["button_events"] == len(trace)
+    assert report["duration"] >= trace[-1].at
+    assert report["command_stream"] == simulate(trace, stations=stations)["command_stream"]
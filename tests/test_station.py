@@ -1,9 +1,171 @@
 from __future__ import annotations
 
-from radiopi.station import Station, load_stations
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+from logot import Logot, logged
+
+from radiopi.station import (
+    STATIONS_PATH,
+    SignalQuality,
+    Station,
+    StationCatalogue,
+    load_stations,
+    order_stations,
+)
+
+
+@pytest.fixture()
+def stations_path(tmp_path: Path) -> Path:
+    return Path(shutil.copy(STATIONS_PATH, tmp_path / "stations.json"))
 
 
 def test_load_stations() -> None:
     stations = load_stations()
     assert len(stations) > 0
     assert all(isinstance(station, Station) for station in stations)
+
+
+def test_load_stations_cache(stations_path: Path, tmp_path: Path, logot: Logot) -> None:
+    cache_path = tmp_path / "stations.cache"
+    stations = load_stations(stations_path, cache=False)
+    # The first load compiles the cache.
+    assert load_stations(stations_path, cache_path=cache_path) == stations
+    logot.assert_logged(logged.info(f"Stations: Cache written: {cache_path}"))
+    # The second load uses the cache.
+    assert load_stations(stations_path, cache_path=cache_path) == stations
+    logot.assert_not_logged(logged.info(f"Stations: Cache written: {cache_path}"))
+
+
+def test_load_stations_cache_touched(stations_path: Path, tmp_path: Path, logot: Logot) -> None:
+    cache_path = tmp_path / "stations.cache"
+    stations = load_stations(stations_path, cache_path=cache_path)
+    # Touching the source file keeps the cached stations, but updates the cache key.
+    stat = stations_path.stat()
+    os.utime(stations_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert load_stations(stations_path, cache_path=cache_path) == stations
+    logot.assert_logged(logged.info(f"Stations: Cache written: {cache_path}"))
+
+
+def test_load_stations_cache_changed(stations_path: Path, tmp_path: Path) -> None:
+    cache_path = tmp_path / "stations.cache"
+    load_stations(stations_path, cache_path=cache_path)
+    # Changing the source file invalidates the cache.
+    stations_path.write_bytes(b'{"ensembleList": []}')
+    assert load_stations(stations_path, cache_path=cache_path) == ()
+
+
+def test_load_stations_cache_invalid(stations_path: Path, tmp_path: Path, logot: Logot) -> None:
+    cache_path = tmp_path / "stations.cache"
+    cache_path.write_bytes(b"invalid")
+    assert load_stations(stations_path, cache_path=cache_path) == load_stations(stations_path, cache=False)
+    logot.assert_logged(logged.warning(f"Stations: Invalid cache: {cache_path}: Invalid magic"))
+
+
+def test_load_stations_cache_unwritable(stations_path: Path, tmp_path: Path, logot: Logot) -> None:
+    cache_path = tmp_path / "missing" / "stations.cache"
+    assert load_stations(stations_path, cache_path=cache_path) == load_stations(stations_path, cache=False)
+    logot.assert_logged(logged.warning(f"Stations: Cache not written: {cache_path}: %s"))
+
+
+@pytest.fixture()
+def catalogue() -> StationCatalogue:
+    return StationCatalogue(load_stations())
+
+
+def test_catalogue_sequence(catalogue: StationCatalogue) -> None:
+    stations = load_stations()
+    assert len(catalogue) == len(stations)
+    assert catalogue[0] == stations[0]
+    assert catalogue[1:3] == stations[1:3]
+    assert list(catalogue) == list(stations)
+    assert repr(catalogue) == f"StationCatalogue({stations!r})"
+
+
+def test_catalogue_index_by_service_id(catalogue: StationCatalogue) -> None:
+    assert catalogue.index_by_service_id(catalogue[3].service_id) == 3
+    with pytest.raises(KeyError):
+        catalogue.index_by_service_id(-1)
+
+
+def test_catalogue_index_by_key(catalogue: StationCatalogue) -> None:
+    station = catalogue[3]
+    assert catalogue.index_by_key((station.frequency_index, station.service_id, station.component_id)) == 3
+
+
+def test_catalogue_index_by_label(catalogue: StationCatalogue) -> None:
+    assert catalogue.index_by_label(f"  {catalogue[3].label.upper()}  ") == 3
+    with pytest.raises(KeyError):
+        catalogue.index_by_label("Missing")
+
+
+def test_catalogue_search(catalogue: StationCatalogue) -> None:
+    assert [station.label for station in catalogue.search("bbc radio1")] == ["BBC Radio1", "BBC Radio1Xtra"]
+    assert catalogue.search("missing") == ()
+
+
+def test_load_stations_quality() -> None:
+    stations = load_stations()
+    assert all(station.quality is not None and station.quality.acquired for station in stations)
+    # Signal quality is preserved by the cache.
+    assert [station.quality for station in load_stations(cache=False)] == [station.quality for station in stations]
+
+
+def test_load_stations_no_quality(tmp_path: Path) -> None:
+    stations_path = tmp_path / "stations.json"
+    stations_path.write_text(
+        json.dumps(
+            {
+                "ensembleList": [
+                    {
+                        "EnsembleNo": 1,
+                        "DigitalServiceList": {
+                            "ServiceList": [{"ServId": 2, "Label": "Foo ", "ComponentList": [{"comp_ID": 3}]}]
+                        },
+                    }
+                ]
+            }
+        )
+    )
+    cache_path = tmp_path / "stations.cache"
+    stations = load_stations(stations_path, cache_path=cache_path)
+    assert stations == (Station(frequency_index=1, service_id=2, component_id=3, label="Foo"),)
+    assert stations[0].quality is None
+    # Missing signal quality is preserved by the cache.
+    stations_path.touch()
+    assert load_stations(stations_path, cache_path=cache_path)[0].quality is None
+
+
+def make_station(frequency_index: int, *, fic_quality: int = 0, acquired: bool = True) -> Station:
+    quality = SignalQuality(rssi=0, snr=0, cnr=0, fic_quality=fic_quality, valid=acquired, acquired=acquired)
+    return Station(frequency_index=frequency_index, service_id=0, component_id=0, label="", quality=quality)
+
+
+def test_order_stations_file() -> None:
+    stations = (make_station(1, fic_quality=10), make_station(2, fic_quality=90))
+    assert order_stations(stations, station_order_name="file", prune=False) == stations
+
+
+def test_order_stations_signal() -> None:
+    stations = (
+        make_station(1, fic_quality=10),
+        make_station(2, fic_quality=90),
+        Station(frequency_index=3, service_id=0, component_id=0, label=""),
+        make_station(4, acquired=False),
+        make_station(2, fic_quality=90),
+    )
+    ordered = order_stations(stations, station_order_name="signal", prune=False)
+    assert [station.frequency_index for station in ordered] == [2, 2, 1, 3, 4]
+
+
+def test_order_stations_prune() -> None:
+    stations = (
+        make_station(1, acquired=False),
+        make_station(2),
+        Station(frequency_index=3, service_id=0, component_id=0, label=""),
+    )
+    ordered = order_stations(stations, station_order_name="file", prune=True)
+    assert [station.frequency_index for station in ordered] == [2, 3]
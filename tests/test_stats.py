@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from signal import SIGUSR1
+
+import pytest
+from logot import Logot
+
+from radiopi.log import naming_tuner
+from radiopi.radio import radio_tune_args
+from radiopi.runner import command_name
+from radiopi.stats import Histogram, Stats, dumping_stats, stats
+from radiopi.stress import wait_until
+from tests import logged, running
+
+
+def test_histogram() -> None:
+    histogram = Histogram()
+    histogram.record(0.003)
+    histogram.record(0.004)
+    histogram.record(100.0)
+    data = histogram.to_json()
+    assert data["count"] == 3
+    assert data["total"] == pytest.approx(100.007)
+    assert data["max"] == 100.0
+    assert data["buckets"] == {
+        **{bound: 0 for bound in ("0.001", "0.002", "0.01", "0.02", "0.05", "0.1", "0.2", "0.5")},
+        **{bound: 0 for bound in ("1.0", "2.0", "5.0", "10.0", "20.0", "50.0")},
+        "0.005": 2,
+        "+Inf": 1,
+    }
+
+
+def test_stats_dump(tmp_path: Path) -> None:
+    stats = Stats()
+    stats.record("Foo", 0.1)
+    stats.record("Foo", 0.2)
+    stats.dump(tmp_path / "stats.json")
+    data = json.loads((tmp_path / "stats.json").read_text())
+    assert list(data) == ["Foo"]
+    assert data["Foo"]["count"] == 2
+
+
+def test_stats_tuner() -> None:
+    stats = Stats()
+    stats.record("Foo", 0.1)
+    with naming_tuner("Kitchen"):
+        stats.record("Foo", 0.2)
+    # Each tuner's histograms are kept apart.
+    assert list(stats.to_json()) == ["Foo", "Kitchen: Foo"]
+
+
+def test_dumping_stats_while_locked(tmp_path: Path) -> None:
+    path = tmp_path / "stats.json"
+    with dumping_stats(path):
+        # A signal arriving while the main thread records stats can't deadlock the dump.
+        with stats._lock:
+            os.kill(os.getpid(), SIGUSR1)
+            assert not path.exists()
+        assert wait_until(path.exists, timeout=5.0)
+
+
+def test_running_stats(tmp_path: Path, logot: Logot) -> None:
+    stats_path = tmp_path / "stats.json"
+    with running(stats_path=stats_path) as radio:
+        logot.wait_for(logged.ux_tune(radio.state.stations[0]))
+        # The stats can be dumped on demand with a signal.
+        os.kill(os.getpid(), SIGUSR1)
+        assert wait_until(stats_path.exists, timeout=5.0)
+        data = json.loads(stats_path.read_text())
+        assert {"Radio: Woken", "Radio: Handled", "Radio: Booted", "Radio: Tuned", "LEDs: Woken"} <= set(data)
+        assert f"Runner: {command_name(radio_tune_args(radio.state.station))}" in data
+    # The stats are dumped on stop.
+    data = json.loads(stats_path.read_text())
+    assert "Radio: Paused" in data
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from radiopi.log import logger
+from radiopi.stress import observing, run_stress, wait_until
+
+
+def test_run_stress() -> None:
+    # A smoke test. Run radiopi-stress for a real workout.
+    results = run_stress(threads=4, calls=20, timeout=2.0)
+    assert results["calls"] == 80
+    assert results["calls_per_second"] > 0.0
+    assert results["call_latency_max"] >= results["call_latency_p99"] >= results["call_latency_p50"]
+    # The final command and LEDs match the final state, both while running and once stopped.
+    assert results["commands_match"]
+    assert results["leds_match"]
+    assert results["stopped_commands_match"]
+    assert results["stopped_leds_match"]
+
+
+def test_observing() -> None:
+    with observing() as observer:
+        # Records with no args, or a mapping, are ignored.
+        logger.info("Stress: No args")
+        logger.info("Stress: %(name)s", {"name": "Mapping"})
+        logger.info("Runner: %s", "radio_cli --shutdown")
+        logger.debug("LED: %s: Value: %s", "Play", 0.5)
+    assert observer.last_command == "radio_cli --shutdown"
+    assert observer.led_values == {"Play": 0.5}
+
+
+def test_wait_until() -> None:
+    assert wait_until(lambda: True, timeout=0.0)
+    assert not wait_until(lambda: False, timeout=0.0)
+    # Predicates are polled until they pass.
+    results = iter((False, True))
+    assert wait_until(lambda: next(results), timeout=1.0)
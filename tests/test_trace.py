@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from logot import Logot
+
+from radiopi.log import naming_tuner
+from radiopi.trace import NULL_SPAN, Tracer, current_trace_id, tracing
+from tests import logged, running
+
+
+def test_tracer_disabled() -> None:
+    tracer = Tracer()
+    assert tracer.next_trace_id() == 0
+    assert tracer.span("Test") is NULL_SPAN
+    assert tracer.to_json()["traceEvents"] == []
+
+
+def test_tracer_nested_spans() -> None:
+    tracer = Tracer()
+    tracer.enabled = True
+    trace_id = tracer.next_trace_id()
+    with tracer.span("Outer", trace_id):
+        # Nested spans join the enclosing trace.
+        assert current_trace_id.get() == trace_id
+        with tracer.span("Inner"):
+            pass
+    assert current_trace_id.get() == 0
+    inner, outer = tracer.to_json()["traceEvents"]
+    assert (inner["name"], inner["args"]) == ("Inner", {"trace_id": trace_id, "tuner": ""})
+    assert (outer["name"], outer["args"]) == ("Outer", {"trace_id": trace_id, "tuner": ""})
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+
+
+def test_tracer_tuner() -> None:
+    tracer = Tracer()
+    tracer.enabled = True
+    with naming_tuner("Kitchen"), tracer.span("Test"):
+        pass
+    (event,) = tracer.to_json()["traceEvents"]
+    assert event["args"]["tuner"] == "Kitchen"
+
+
+def test_tracer_capacity() -> None:
+    tracer = Tracer(capacity=2)
+    tracer.enabled = True
+    for name in ("A", "B", "C"):
+        with tracer.span(name):
+            pass
+    # Only the most recent spans are kept.
+    assert [event["name"] for event in tracer.to_json()["traceEvents"]] == ["B", "C"]
+
+
+def test_tracing(tmp_path: Path, logot: Logot) -> None:
+    trace_path = tmp_path / "trace.json"
+    with tracing(trace_path), running() as radio:
+        logot.wait_for(logged.ux_tune(radio.state.stations[0]))
+    events = json.loads(trace_path.read_text())["traceEvents"]
+    # The radio watcher and the runner join the trace of the state change that started playing.
+    trace_ids = {event["args"]["trace_id"] for event in events if event["name"] == "Radio: Set state"}
+    names = {(event["name"], event["args"]["trace_id"]) for event in events}
+    assert any(
+        ("Radio", trace_id) in names and ("Runner: radio_cli --boot", trace_id) in names for trace_id in trace_ids
+    )
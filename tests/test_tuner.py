@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Iterator
+from pathlib import Path
+from threading import Event
+
+import pytest
+from logot import Logot
+
+from radiopi import running_tuners
+from radiopi.radio import radio_boot_args
+from radiopi.runner import Args, Runner
+from radiopi.station import StationCatalogue, load_stations
+from radiopi.stats import stats
+from radiopi.tuner import DEFAULT_PIN_MAP, DeviceRunner, PinMap, TunerConfig, load_tuners, tuner_stations
+from tests import logged
+
+SECOND_PIN_MAP = PinMap(
+    toggle_play_button=20,
+    next_station_button=19,
+    prev_station_button=18,
+    shutdown_button=None,
+    play_led=17,
+    next_station_led=22,
+    prev_station_led=23,
+)
+
+
+class RecordingRunner(Runner):
+    def __init__(self) -> None:
+        self.calls: list[Args] = []
+        self.closed = False
+
+    def _call(self, args: Args, *, preempt: Event | None, timeout: float | None) -> None:
+        self.calls.append(args)
+
+    def _stream(self, args: Args, *, timeout: float | None) -> Iterator[str]:
+        self.calls.append(args)
+        return iter(())
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_load_tuners(tmp_path: Path) -> None:
+    path = tmp_path / "tuners.json"
+    path.write_text(
+        json.dumps(
+            [
+                {},
+                {
+                    "name": "Kitchen",
+                    "pins": SECOND_PIN_MAP._asdict(),
+                    "device_args": ["--device=1"],
+                    "stations": ["Radio 1"],
+                    "control_address": "127.0.0.1:0",
+                    "state_path": "state-1.json",
+                },
+            ]
+        )
+    )
+    # Unnamed tuners are named by their index.
+    assert load_tuners(path) == (
+        TunerConfig(name="Tuner 0"),
+        TunerConfig(
+            name="Kitchen",
+            pins=SECOND_PIN_MAP,
+            device_args=("--device=1",),
+            stations=("Radio 1",),
+            control_address="127.0.0.1:0",
+            state_path=Path("state-1.json"),
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    ("data", "match"),
+    (
+        ([{"name": "Kitchen"}, {"name": "Kitchen", "pins": SECOND_PIN_MAP._asdict()}], "Duplicate name: Kitchen"),
+        ([{}, {"pins": {**SECOND_PIN_MAP._asdict(), "play_led": 13}}], "Duplicate pin: 13"),
+        ([{}, {"pins": {**SECOND_PIN_MAP._asdict(), "shutdown_button": 26}}], "Duplicate pin: 26"),
+        ([{"state_path": "state.json"}, {"pins": SECOND_PIN_MAP._asdict(), "state_path": "state.json"}], "state_path"),
+        (
+            [{"control_address": "127.0.0.1:0"}, {"pins": SECOND_PIN_MAP._asdict(), "control_address": "127.0.0.1:0"}],
+            "Duplicate control_address: 127.0.0.1:0",
+        ),
+    ),
+)
+def test_load_tuners_duplicate(tmp_path: Path, data: object, match: str) -> None:
+    path = tmp_path / "tuners.json"
+    path.write_text(json.dumps(data))
+    with pytest.raises(ValueError, match=match):
+        load_tuners(path)
+
+
+def test_tuner_stations() -> None:
+    catalogue = StationCatalogue(load_stations())
+    assert tuner_stations(catalogue, None) is catalogue
+    # Selected stations are shared with the catalogue.
+    stations = tuner_stations(catalogue, [catalogue[2].label, catalogue[1].label])
+    assert len(stations) == 2
+    assert stations[0] is catalogue[2]
+    assert stations[1] is catalogue[1]
+
+
+def test_running_tuners_unknown_station(logot: Logot) -> None:
+    catalogue = StationCatalogue(load_stations())
+    tuners = (TunerConfig(name="Kitchen", stations=(catalogue[0].label, "Not a station")),)
+    with pytest.raises(ValueError, match="Kitchen: Unknown station: Not a station"):
+        with running_tuners(
+            tuners=tuners,
+            duration=0.0,
+            led_controller_name="mock",
+            pin_factory_name="mock",
+            runner_name="mock",
+            station_order_name="file",
+            prune_stations=False,
+            standby_timeout=None,
+            stats_path=None,
+        ):
+            pass  # pragma: no cover
+    # No tuner was booted.
+    logot.assert_not_logged(logged.radio_boot())
+
+
+def test_device_runner() -> None:
+    recording_runner = RecordingRunner()
+    runner = DeviceRunner(recording_runner, ("--device=1",))
+    runner(radio_boot_args())
+    runner(("poweroff", "-h"))
+    assert list(runner.stream(("radio_cli", "--scan"))) == []
+    # Only tuner commands select a device.
+    assert recording_runner.calls == [
+        ("radio_cli", "--device=1", "--boot=D"),
+        ("poweroff", "-h"),
+        ("radio_cli", "--device=1", "--scan"),
+    ]
+    runner.close()
+    assert recording_runner.closed
+
+
+def test_running_tuners(logot: Logot) -> None:
+    catalogue = StationCatalogue(load_stations())
+    tuners = (
+        TunerConfig(name="Kitchen", pins=DEFAULT_PIN_MAP, device_args=("--device=0",)),
+        TunerConfig(name="Bedroom", pins=SECOND_PIN_MAP, device_args=("--device=1",), stations=(catalogue[2].label,)),
+    )
+    with running_tuners(
+        tuners=tuners,
+        duration=0.0,
+        led_controller_name="mock",
+        pin_factory_name="mock",
+        runner_name="mock",
+        station_order_name="file",
+        prune_stations=False,
+        standby_timeout=None,
+        stats_path=None,
+    ) as radios:
+        # Each radio boots and tunes to its own first station.
+        logot.wait_for(logged.radio_tuned(catalogue[0]) & logged.radio_tuned(catalogue[2]))
+        # The radios share the stations.
+        assert radios[1].state.station is radios[0].state.stations[2]
+        # The radios are independent.
+        radios[0].pause()
+        logot.wait_for(logged.radio_pause())
+        assert radios[1].state.playing
+    # Each tuner records its own stats.
+    assert {"Kitchen: Radio: Tuned", "Kitchen: Radio: Paused", "Bedroom: Radio: Tuned"} <= set(stats.to_json())
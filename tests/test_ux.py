@@ -83,3 +83,69 @@ def test_pause_prev_station(radio: Radio, logot: Logot) -> None:
     # Since we're paused, this will first boot, then tune.
     radio.prev_station()
     logot.wait_for(logged.ux_tune(radio.state.stations[-1]))
+
+
+@pytest.fixture()
+def standby_radio(logot: Logot) -> Generator[Radio, None, None]:
+    with running(standby_timeout=60.0) as radio:
+        # Wait for the radio to boot and tune.
+        logot.wait_for(logged.ux_tune(radio.state.stations[0]))
+        # All done!
+        yield radio
+
+
+def test_standby_pause_play(standby_radio: Radio, logot: Logot) -> None:
+    # Pausing mutes the radio, keeping it booted.
+    standby_radio.pause()
+    logot.wait_for(logged.ux_standby())
+    # Since we're still booted, this only tunes.
+    standby_radio.play()
+    logot.wait_for(logged.ux_resume(standby_radio.state.stations[0]))
+    logot.assert_not_logged(logged.radio_boot())
+
+
+def test_standby_pause_next_station(standby_radio: Radio, logot: Logot) -> None:
+    standby_radio.pause()
+    logot.wait_for(logged.ux_standby())
+    # Since we're still booted, this only tunes.
+    standby_radio.next_station()
+    logot.wait_for(logged.ux_resume(standby_radio.state.stations[1]))
+    logot.assert_not_logged(logged.radio_boot())
+
+
+def test_standby_timeout(logot: Logot) -> None:
+    with running(standby_timeout=0.0) as radio:
+        logot.wait_for(logged.ux_tune(radio.state.stations[0]))
+        # Once the standby timeout expires, the radio shuts down.
+        radio.pause()
+        logot.wait_for(logged.ux_standby_pause())
+        # Since we're shut down, this will first boot, then tune.
+        radio.play()
+        logot.wait_for(logged.ux_tune(radio.state.stations[0]))
+
+
+def test_retune_by_service(radio: Radio, logot: Logot) -> None:
+    radio.retune_by_service(radio.state.stations[3].service_id)
+    # We're already booted, so we just tune.
+    logot.wait_for(logged.ux_retune(radio.state.stations[3]))
+
+
+def test_retune_by_label(radio: Radio, logot: Logot) -> None:
+    radio.retune_by_label(radio.state.stations[3].label.lower())
+    # We're already booted, so we just tune.
+    logot.wait_for(logged.ux_retune(radio.state.stations[3]))
+
+
+def test_scroll(radio: Radio, logot: Logot) -> None:
+    for _ in range(3):
+        radio.scroll(1)
+    # The play LED shows scroll progress.
+    logot.wait_for(logged.led_value("Play", 3 / (len(radio.state.stations) - 1)))
+    # The radio tunes once scrolling settles, and the LEDs pulse back from the scroll progress.
+    radio.settle()
+    logot.wait_for(
+        logged.radio_tune(radio.state.stations[3])
+        & logged.led_value("Play", 1.0)
+        & logged.led_pulse("Next station", 1.0, 0.0)
+        & logged.led_pulse("Prev station", 1.0, 0.0)
+    )